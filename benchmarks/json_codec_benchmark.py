@@ -0,0 +1,61 @@
+"""
+Compares the json codecs on the response of a get_all_resources_route returning
+many resources, against the encoding previously used by the adapters (json.dumps,
+then encoding the str to bytes).
+
+usage: python benchmarks/json_codec_benchmark.py [resource_count] [repeat]
+"""
+
+import sys
+import json
+import timeit
+
+from rest_helpers import json_codec, responses, rest_helper_context
+from rest_helpers.framework_adapter import BaseFrameworkAdapter
+from rest_helpers.jsonapi_objects import Resource
+
+class Book(Resource):
+    resource_type = "/books"
+
+    def __init__(self, index):
+        super(Book, self).__init__("book{}".format(index))
+        self.title = "Title of the book number {}".format(index)
+        self.pages = index % 500
+        self.price = index / 7
+        self.tags = ["tag{}".format(i) for i in range(5)]
+        self.authors = [{"first_name": "first", "last_name": "last {}".format(i)} for i in range(3)]
+
+class BenchmarkAdapter(BaseFrameworkAdapter):
+    def __init__(self):
+        self.context = rest_helper_context.RestHelperContext()
+
+    def get_current_request_query_string_args(self):
+        return {}
+
+    def get_rest_helper_request_context(self):
+        return self.context
+
+    def make_json_response(self, obj, status=200, headers=None, title=None):
+        return obj
+
+def main(resource_count=20000, repeat=5):
+    adapter = BenchmarkAdapter()
+    jsonable = responses.ok(adapter, [Book(i) for i in range(resource_count)])
+
+    encoders = [("json.dumps + encode", lambda: json.dumps(jsonable).encode("utf-8"))]
+    for name in json_codec._codec_factories:
+        try:
+            codec = json_codec.get_json_codec(name)
+        except ImportError:
+            print("{0}: not installed".format(name))
+            continue
+        encoders.append((name, lambda codec=codec: codec.dumps(jsonable)))
+
+    baseline = None
+    for name, encode in encoders:
+        duration = min(timeit.repeat(encode, number=1, repeat=repeat))
+        baseline = baseline or duration
+        print("{0:<25}{1:>10.1f} ms{2:>10.1f}x".format(name, duration * 1000, baseline / duration))
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
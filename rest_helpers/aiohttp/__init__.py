@@ -5,6 +5,7 @@ import aiotask_context
 from aiohttp import web,web_request
 from multidict import MultiDict
 from rest_helpers.framework_adapter import BaseFrameworkAdapter
+from rest_helpers.route_registry import RouteRegistry
 
 def aiohttp_adapter_builder(*args, **kwargs):
     if any(args) and isinstance(args[0], web.Application):
@@ -15,19 +16,48 @@ def aiohttp_adapter_builder(*args, **kwargs):
 
     return adapter, args, kwargs
 
+_ROUTE_REGISTRY_KEY = "rest_helpers_route_registry"
+
+def get_app_route_registry(app):
+    """
+    Gets the registry of the routes of an aiohttp app, created on first use.
+
+    Arguments:
+        app {web.Application} -- the app
+
+    Returns:
+        RouteRegistry -- the registry of the app
+    """
+    route_registry = app.get(_ROUTE_REGISTRY_KEY)
+    if route_registry is None:
+        route_registry = app[_ROUTE_REGISTRY_KEY] = RouteRegistry()
+
+    return route_registry
 
 class AioHttpFrameworkAdapter(BaseFrameworkAdapter):
+    # the aiohttp server decompresses the gzip and deflate request bodies
+    decompresses_request_body = True
+
     def __init__(self, app=None):
         self.app = app
         if app is not None:
             app.loop.set_task_factory(aiotask_context.task_factory)
+            self.route_registry = get_app_route_registry(app)
 
     def is_in_test(self):
         # TODO
         return False #not has_request_context() or request_context.top.app.config["TESTING"] is True
 
     async def get_current_request_body(self):
-        return await self.get_rest_helper_request_context().request.text()
+        body = await self.get_current_request_body_bytes()
+        return body.decode(self.get_rest_helper_request_context().request.charset or "utf-8")
+
+    async def read_current_request_body_bytes(self):
+        return await self.get_rest_helper_request_context().request.read()
+
+    async def read_current_request_body_chunks(self, chunk_size=65536):
+        async for chunk in self.get_rest_helper_request_context().request.content.iter_chunked(chunk_size):
+            yield chunk
 
     def get_current_request_query_string_args(self):
         query_multidict=self.get_rest_helper_request_context().request.query
@@ -63,6 +93,11 @@ class AioHttpFrameworkAdapter(BaseFrameworkAdapter):
         #return asyncio.Task.current_task().rest_helper_context  if hasattr(asyncio.Task.current_task(), "rest_helper_context") else None
         return aiotask_context.get(key="rest_helper_context", default=None)
 
+    def get_current_request_path_params(self, args, kwargs):
+        if len(args)>0 and isinstance(args[0], web_request.Request):
+            return args[0].match_info
+        return kwargs
+
     def set_request_args(self, args):
         if len(args)>0 and isinstance(args[0], web_request.Request):
             self.get_rest_helper_request_context().request = args[0]
@@ -82,8 +117,9 @@ class AioHttpFrameworkAdapter(BaseFrameworkAdapter):
 
     def make_json_response(self, obj, status = 200, headers=None, title=None):
         headers = headers or {}
-        json_content = json.dumps(obj)
-        return web.Response(body=json_content, headers = MultiDict(headers), status=status, reason=title)
+        json_content = self.get_json_codec().dumps(obj)
+        content_type = None if "Content-Type" in headers else "application/json"
+        return web.Response(body=json_content, headers = MultiDict(headers), status=status, reason=title, content_type=content_type)
 
 def add_default_swagger_routes(app, source):
     import rest_helpers.routes as native_routes
@@ -1,25 +1,34 @@
+import asyncio
+import copy
 import functools
 import json
 import traceback
 import inspect
 import typing
-import requests
-import re
 from urllib.parse import urlparse
 
 from jose import jws,jwt
 
-from rest_helpers import type_deserializers, validators, await_if_needed
-from rest_helpers.common import decorators
+from rest_helpers import type_deserializers, validators, oauth, rest_helper_context, await_if_needed
+from rest_helpers.common import decorators, json_stream, content_encoding
 from rest_helpers.rest_exceptions import InvalidDataException, UnauthorizedException, ForbiddenException
 
-_input_decorators = {}
-
 class MissingFieldException(Exception):
     pass
 
 class bind_hints(object):
     def __init__(self, framework_adapter):
+        """
+        This class is to be used as a decorator: it binds every argument of
+        the decorated function annotated with a binder.
+        The annotation binders and the binders already stacked on the function
+        are compiled into a single binding plan: on each request, one coroutine
+        pulls, validates and deserializes all the arguments, then calls the view
+        function once.
+
+        Arguments:
+            framework_adapter {BaseFrameworkAdapter} -- The adapter used to interact with the framework
+        """
         self.framework_adapter = framework_adapter
 
 
@@ -39,12 +48,19 @@ class bind_hints(object):
                 potential_binding_decorator.set_field(field)
                 functools.update_wrapper(potential_binding_decorator, return_value)
                 return_value = potential_binding_decorator(return_value)
-                
-        if return_value != func:
-            functools.update_wrapper(return_value, func)
+
         return return_value
 
 class base_binder(object):
+    # Binders whose get_value waits on I/O (request stream, network...) are
+    # evaluated concurrently when a view has more than one of them.
+    is_io_bound = False
+
+    # Binders reading the json body: when all of them stream their field, the
+    # body is never parsed whole.
+    reads_json_body = False
+    stream = False
+
     def __init__(self, framework_adapter, field=None, validator=None, deserializer=None, type=None):
         if (deserializer is not None) and (type is not None):
             raise Exception("deserializer and type cannot be provided at the same time.")
@@ -68,6 +84,14 @@ class base_binder(object):
             self.type = type_hints.get(self.field, None)
             self.type = self.type[0] if isinstance(self.type, tuple) else self.type
 
+        # The deserializer and validator are resolved once, when the view is decorated,
+        # so that binding a request neither looks them up nor mutates the binder.
+        if self.deserializer is None and self.type is not None:
+            self.deserializer = type_deserializers.get_default_deserializer(self.type)
+
+        if self.validator is None and self.type is not None:
+            self.validator = validators.get_type_validators(self.type)
+
         f_args = self.real_view_function.__code__.co_varnames[:self.real_view_function.__code__.co_argcount]
 
         try:
@@ -78,21 +102,16 @@ class base_binder(object):
         self.has_default = f_args != None and self.real_view_function.__defaults__!=None and arg_index >= len(f_args) - len(self.real_view_function.__defaults__)
         self.default = self.real_view_function.__defaults__[arg_index - (len(f_args) - len(self.real_view_function.__defaults__))] if self.has_default else None
 
-        async def return_value(*args, **kwargs):
-            args = self.framework_adapter.set_request_args(args)
-            kwargs = self.framework_adapter.set_request_kwargs(kwargs)
-            return await _on_request_binding(self, *args, **kwargs)
-
-        functools.update_wrapper(return_value, f)
-
-
         self.real_view_function_id = decorators.get_decorated_id(self.real_view_function)
-        if self.real_view_function_id not in _input_decorators:
-            _input_decorators[self.real_view_function_id] = []
+        self.framework_adapter.get_route_registry().add_binder(self.real_view_function, self)
 
-        _input_decorators[self.real_view_function_id].append(self)
+        # Stacked binders are flattened: if f already is a binding plan, its binders
+        # are merged with this one so that only one plan is run per request.
+        plan = _get_binding_plan(f)
+        if plan is None:
+            return _compile_binding_plan(self.framework_adapter, [self], f, f)
 
-        return return_value
+        return _compile_binding_plan(self.framework_adapter, [self] + plan.binders, plan.view_function, f)
 
     async def get_value(self): #pragma no cover
         raise NotImplementedError()
@@ -102,6 +121,9 @@ class base_binder(object):
 
 class from_json_body(base_binder):
     __name__ = "from_json_body"
+    is_io_bound = True
+    reads_json_body = True
+
     def __init__(self, framework_adapter, field="data", validator=None, deserializer=None):
         """
         This class is to be used as a decorator:
@@ -150,7 +172,10 @@ class from_json_body(base_binder):
 # TODO: support optimization fot stacking
 class field_from_json_body(base_binder):
     __name__ = "field_from_json_body"
-    def __init__(self, framework_adapter, field=None, json_field=None, validator=None, deserializer=None):
+    is_io_bound = True
+    reads_json_body = True
+
+    def __init__(self, framework_adapter, field=None, json_field=None, validator=None, deserializer=None, stream=False):
         """
         This function is to be used as a decorator:
         it will fill the parameter of a method by parsing the
@@ -189,8 +214,13 @@ class field_from_json_body(base_binder):
         validator = a function that take the input as a value and returns a
                     tuple (bool,reason) to indicate if the input is valid or not
         deserializer = a function used to deserialize the input to an object
+        stream = if True, the field is extracted while the body is received, without
+                parsing the whole body: for large bodies of which only some fields are used.
+                The body is parsed whole if an other binder of the function needs it, or
+                if the requested version has a body or body_dict hook.
         """
         self.json_field = json_field or field
+        self.stream = stream
         super(field_from_json_body, self).__init__(framework_adapter, field, validator, deserializer)
 
     def set_field(self, field):
@@ -201,8 +231,60 @@ class field_from_json_body(base_binder):
         self.field = field.split("/")[-1]
 
     async def get_value(self):
-        return await _get_field_from_json_body(self.framework_adapter, self.json_field)
+        return await _get_field_from_json_body(self.framework_adapter, self.json_field, self.stream)
 
+class from_body_stream(base_binder):
+    __name__ = "from_body_stream"
+
+    def __init__(self, framework_adapter, field="body", max_size=None, decompress=True, chunk_size=65536):
+        """
+        This class is to be used as a decorator:
+        it will fill the parameter of a method with an async iterator over the
+        chunks of bytes of the body of the request, as they are received: the
+        body is never buffered whole, eg: to pipe a large upload to a storage.
+
+        The body is decompressed according to its Content-Encoding header (gzip or deflate) if the framework
+        adapter decompresses the request bodies, and the size limits of the route are enforced, by the framework adapter.
+        If its size exceeds max_size, a PayloadTooLargeException is raised: before the method
+        is called if the Content-Length header already exceeds it, while iterating otherwise.
+
+        eg:
+        @from_body_stream(field="content", max_size=100*1024*1024)
+        async def method(content):
+            async for chunk in content:
+                await storage.write(chunk)
+
+        Arguments:
+            framework_adapter {BaseFrameworkAdapter} -- The adapter used to interact with the framework
+
+        Keyword Arguments:
+            field {str} -- the name of the function argument to be filled (default: {"body"})
+            max_size {int} -- the maximum size of the body in bytes, once decompressed (default: {None}, no limit)
+            decompress {bool} -- if False, the body is given as received, compressed or not, and max_size applies
+                                 to it. The frameworks decompressing the bodies themselves (aiohttp) give it decompressed
+                                 anyway (default: {True})
+            chunk_size {int} -- the maximum size of the chunks, in bytes (default: {65536})
+        """
+        super(from_body_stream, self).__init__(framework_adapter, field, lambda x,y:(True,"always valid"), lambda x:x)
+        self.max_size = max_size
+        self.decompress = decompress
+        self.chunk_size = chunk_size
+
+    async def get_value(self):
+        # the limits of the route are checked before the function is called
+        encoding, max_size, max_decompressed_size = self.framework_adapter.get_current_request_body_decoding()
+        headers = rest_helper_context.get_headers(self.framework_adapter)
+        if encoding == "identity" or not self.decompress:
+            content_encoding.check_content_length(headers, self.max_size)
+
+        if not self.decompress:
+            context = self.framework_adapter.get_rest_helper_request_context()
+            limits = [l for l in (self.max_size, context.max_body_size if context is not None else None) if l is not None]
+            chunks = self.framework_adapter.read_current_request_body_chunks(self.chunk_size)
+            return content_encoding.decode_chunks(chunks, "identity", self.chunk_size, max_size=min(limits) if limits else None)
+
+        chunks = self.framework_adapter.get_current_request_body_chunks(self.chunk_size)
+        return content_encoding.decode_chunks(chunks, "identity", self.chunk_size, max_decoded_size=self.max_size)
 
 class from_header(base_binder):
     __name__ = "from_header"
@@ -310,10 +392,46 @@ class from_query_string(base_binder):
             self.query_field,
             self.as_list)
 
-_key_clean_regex=re.compile('[^a-zA-Z0-9]+')
+class from_dependency(base_binder):
+    __name__ = "from_dependency"
+
+    def __init__(self, framework_adapter, provider, field=None):
+        """
+        This function is to be used as a decorator:
+        it will fill the parameter of a method with the dependency
+        created by the provider, according to the provider scope.
+
+        eg:
+        db_session = dependencies.Provider(create_session, scope="request", teardown=close_session)
+
+        @from_dependency(db_session, field="session")
+        def method(session):
+            ...
+
+        The dependencies of async providers are created concurrently with the other I/O bound
+        binders. The request and transient dependencies are torn down once the response is built.
+
+        Arguments:
+            framework_adapter {BaseFrameworkAdapter} -- The adapter used to interact with the framework
+            provider {dependencies.Provider} -- the provider of the dependency
+
+        Keyword Arguments:
+            field {str} -- the name of the function argument to be filled (default: {None})
+        """
+        super(from_dependency, self).__init__(framework_adapter, field, lambda x,y:(True,"always valid"), lambda x:x)
+        self.provider = provider
+        self.is_io_bound = provider.is_async
+
+    async def get_value(self):
+        return await self.provider.resolve(self.framework_adapter.get_rest_helper_request_context())
+
+_not_cached = object()
+
 class from_Oauth(base_binder):
     __name__ = "from_Oauth"
-    def __init__(self, framework_adapter, allowed_domains=None, validate_options=None, client_id=None, audience=None, field=None, valid_tokens=None, deserializer=None):
+    is_io_bound = True
+
+    def __init__(self, framework_adapter, allowed_domains=None, validate_options=None, client_id=None, audience=None, field=None, valid_tokens=None, deserializer=None, key_store=None, token_cache=None, executor=None, prefetch_issuers=None, static_keys=None):
         """
         This function is to be used as a decorator:
         it will fill the parameter of a method by parsing the
@@ -340,14 +458,41 @@ class from_Oauth(base_binder):
         field = the method argument to be filled with auth infos
         valid_tokens = a dict of tokens that are valid and bypass auth, values associated with a valid token will be passed to the field.
         deserializer = a function used to deserialize the auth result into an object.
+        key_store = the oauth.JwksKeyStore caching the issuers public keys, defaults to the store shared by the whole process.
+        token_cache = the oauth.TokenCache caching the deserialized auth result of verified tokens, defaults to a cache
+                    of 1024 tokens for this binding.
+        executor = a concurrent.futures thread or process pool executor in which the token signatures are verified, so that
+                    the verification does not block the event loop. Only the tokens missing from the token cache are verified.
+                    If not provided, the signatures are verified on the event loop.
+        prefetch_issuers = the issuers whose keys are fetched by the key store start_rotation, awaited when the app starts, and
+                    refreshed before they expire, so that no request waits for them.
+        static_keys = jwks keyed by issuer, for issuers whose keys are provided by configuration and never fetched. They are
+                    only used by this binding.
         """
-        super(from_Oauth, self).__init__(framework_adapter, (field or "user_auth"), lambda x,y:(True,"always valid"), deserializer or (lambda x:x))
-        self._public_keys = {}
+        # The deserialization is done by get_value so that its result is cached along with the token.
+        super(from_Oauth, self).__init__(framework_adapter, (field or "user_auth"), lambda x,y:(True,"always valid"), lambda x:x)
+        self.token_deserializer = deserializer or (lambda x:x)
+        self.key_store = key_store or oauth.default_key_store
+        self.token_cache = token_cache if token_cache is not None else oauth.TokenCache()
         self.allowed_domains = allowed_domains
         self.client_id = client_id
         self.validate_options = validate_options
         self.valid_tokens = valid_tokens or {}
         self.audience = audience
+        self.executor = executor
+        if prefetch_issuers:
+            self.key_store.add_prefetch_issuers(prefetch_issuers)
+        if static_keys:
+            self.key_store = oauth.StaticKeyStore(static_keys, self.key_store)
+        # A token is cached for the parameters it was verified with: a cache shared by several
+        # bindings never accepts a token that was only verified against an other audience or domain.
+        self.token_cache_scope = oauth.get_verification_scope(
+            self.audience,
+            self.client_id,
+            sorted(self.allowed_domains) if self.allowed_domains is not None else None,
+            self.validate_options,
+            id(self.key_store),
+            id(self.token_deserializer))
 
 
     async def get_value(self):
@@ -357,7 +502,13 @@ class from_Oauth(base_binder):
         token = token.replace("Bearer ", "")
 
         if token in self.valid_tokens:
-            return self.valid_tokens[token]
+            return self.token_deserializer(self.valid_tokens[token])
+
+        # the cached value is shared by the requests of the token: each one gets its copy, so that
+        # a view modifying its argument does not modify the value of the next requests.
+        cached_value = self.token_cache.get(token, _not_cached, self.token_cache_scope)
+        if cached_value is not _not_cached:
+            return copy.deepcopy(cached_value)
 
         unauthorized_exception = UnauthorizedException("""You are not authorized to access the requested resource or operation.
             Make sure the supplied token is valid and that the user associated with it has access rights""")
@@ -369,31 +520,27 @@ class from_Oauth(base_binder):
 
         dirty_key_id = decoded_token['kid']
 
-        cleaned_key_id = re.sub(_key_clean_regex, '', dirty_key_id)
-
-        if cleaned_key_id not in self._public_keys:
-            unverified_claims = jwt.get_unverified_claims(id_token)
-            dirty_url = urlparse(unverified_claims['iss'])
+        cleaned_key_id = oauth.clean_key_id(dirty_key_id)
 
-            if self.allowed_domains is not None and dirty_url.netloc not in self.allowed_domains:
-                raise UnauthorizedException("The issuer of the token does not belong to the list of approved domains : " + str(self.allowed_domains))
+        unverified_claims = jwt.get_unverified_claims(id_token)
+        dirty_url = urlparse(unverified_claims['iss'])
 
-            cleaned_issuer = dirty_url.geturl()
-            oidc_discovery_url = "{}/.well-known/openid-configuration".format(cleaned_issuer)
-            openid_configuration = requests.get(oidc_discovery_url).json()
-            jwks_uri = openid_configuration['jwks_uri']
-            jwks = requests.get(jwks_uri).json()
-            self._public_keys = {re.sub(_key_clean_regex, '',key['kid']):key for key in jwks['keys']}
+        if self.allowed_domains is not None and dirty_url.netloc not in self.allowed_domains:
+            raise UnauthorizedException("The issuer of the token does not belong to the list of approved domains : " + str(self.allowed_domains))
 
-            if cleaned_key_id not in self._public_keys:
-                raise UnauthorizedException("The public key used to sign the token is not valid.")
+        cleaned_issuer = dirty_url.geturl()
+        public_key = await self.key_store.get_key(cleaned_issuer, cleaned_key_id)
+        if public_key is None:
+            raise UnauthorizedException("The public key used to sign the token is not valid.")
 
         try:
-            decoded = jwt.decode(
+            decode = functools.partial(
+                jwt.decode,
                 id_token,
-                key=self._public_keys[cleaned_key_id],
+                key=public_key,
                 audience=self.audience,
                 options=self.validate_options)
+            decoded = decode() if self.executor is None else await asyncio.get_event_loop().run_in_executor(self.executor, decode)
         except Exception as ex:
             raise ForbiddenException("""You are not authorized to access the requested resource or operation.
             Make sure the supplied token is valid and that the user associated with it has access rights.
@@ -402,22 +549,83 @@ class from_Oauth(base_binder):
             {}
             """.format(ex))
 
-        return decoded
+        value = self.token_deserializer(decoded)
+        self.token_cache.set(token, value, decoded.get("exp") if isinstance(decoded, dict) else None, self.token_cache_scope)
+        return copy.deepcopy(value)
 
 #region private
 
-async def _on_request_binding(decorator, *args, **kwargs):
-    # if we are not within a request context (testing for instance)
-    # there is no work to be done.
-    if decorator.framework_adapter.is_in_test():
-        return await await_if_needed(decorator.func(*args, **kwargs))
-
-    if decorator.deserializer is None and decorator.type is not None:
-        decorator.deserializer = type_deserializers.get_default_deserializer(decorator.type)
+class _binding_plan(object):
+    def __init__(self, binders, view_function):
+        """
+        The flat list of binders of a view function, in the order the values are bound.
 
-    if decorator.validator is None and decorator.type is not None:
-        decorator.validator = validators.get_type_validators(decorator.type)
+        Arguments:
+            binders {list} -- the binders, outermost first
+            view_function {callable} -- the function called once all the arguments are bound
+        """
+        self.binders = binders
+        self.view_function = view_function
+        self.entry_point = None
+
+        # Independent I/O bound binders are gathered, the others are awaited in order.
+        io_bound_binders = [b for b in binders if b.is_io_bound]
+        self.concurrent_binders = io_bound_binders if len(io_bound_binders) > 1 else []
+        self.steps = [(b, self.concurrent_binders.index(b) if b in self.concurrent_binders else None) for b in binders]
+
+        body_binders = [b for b in binders if b.reads_json_body]
+        self.streamed_json_paths = frozenset(b.json_field for b in body_binders) if body_binders and all(b.stream for b in body_binders) else None
+
+def _get_binding_plan(f):
+    # functools.update_wrapper copies the function __dict__, so a plain decorator
+    # wrapping a binding plan entry point also carries the plan: it must not be skipped.
+    plan = getattr(f, "_binding_plan", None)
+    return plan if plan is not None and plan.entry_point is f else None
+
+def _compile_binding_plan(framework_adapter, binders, view_function, wrapped):
+    plan = _binding_plan(binders, view_function)
+    concurrent_binders = plan.concurrent_binders
+    steps = plan.steps
+    streamed_json_paths = plan.streamed_json_paths
+
+    async def return_value(*args, **kwargs):
+        args = framework_adapter.set_request_args(args)
+        kwargs = framework_adapter.set_request_kwargs(kwargs)
+
+        # if we are not within a request context (testing for instance)
+        # there is no work to be done.
+        if not framework_adapter.is_in_test():
+            if streamed_json_paths is not None:
+                context = framework_adapter.get_rest_helper_request_context()
+                if context is not None and context.streamed_json_paths is None:
+                    context.streamed_json_paths = streamed_json_paths
+
+            concurrent_values = await _gather_fail_fast([_get_bound_value(b) for b in concurrent_binders]) if concurrent_binders else None
+            for binder, concurrent_index in steps:
+                kwargs[binder.field] = await _get_bound_value(binder) if concurrent_index is None else concurrent_values[concurrent_index]
+
+        return await await_if_needed(view_function(*args, **kwargs))
+
+    functools.update_wrapper(return_value, wrapped)
+    return_value._binding_plan = plan
+    plan.entry_point = return_value
+
+    return return_value
+
+async def _gather_fail_fast(coroutines):
+    """
+    Runs the coroutines concurrently and returns their results in order.
+    As soon as one of them fails, the others are cancelled and the exception is raised.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
 
+async def _get_bound_value(decorator):
     try:
         value = await decorator.get_value()
         is_valid,reason = decorator.validator(value, False) if decorator.validator is not None else (True,"")
@@ -425,7 +633,10 @@ async def _on_request_binding(decorator, *args, **kwargs):
             raise InvalidDataException("The value of the field {field} is not valid: {reason}".format(field=decorator.field, reason=reason))
 
         if callable(decorator.deserializer):
-            value = decorator.deserializer(value)
+            try:
+                value = decorator.deserializer(value)
+            except InvalidDataException as ex:
+                raise InvalidDataException("The value of the field {field} is not valid: {reason}".format(field=decorator.field, reason=ex))
 
         # post deserialization validation
         is_valid,reason = decorator.validator(value, True) if decorator.validator is not None else (True,"")
@@ -437,29 +648,68 @@ async def _on_request_binding(decorator, *args, **kwargs):
         else:
             raise
 
-    kwargs.pop(decorator.field,None)
-    kwargs[decorator.field] = value
-
-    return await await_if_needed(decorator.func(*args, **kwargs))
+    return value
 
 async def _get_dict_from_json_body(framework_adapter):
+    context = framework_adapter.get_rest_helper_request_context()
+    if context is None:
+        return await _parse_json_body(framework_adapter, context)
+
+    # The parsing is shared through a future so that body binders evaluated
+    # concurrently wait for the same parsing instead of starting their own.
+    if context.json_body_future is None:
+        context.json_body_future = asyncio.ensure_future(_parse_json_body(framework_adapter, context))
+
+    # the parsing is shared: a binder cancelled on an other binder failure must not cancel it.
+    return await asyncio.shield(context.json_body_future)
+
+async def _parse_json_body(framework_adapter, context):
     try:
-        body = await framework_adapter.get_current_request_body()
-        context = framework_adapter.get_rest_helper_request_context()
+        body = await framework_adapter.get_current_request_body_bytes()
 
-        if context is not None and context.versionner is not None:
-            body = context.versionner.body(body)
-        if body == "":
+        # The body is decoded to text only for the versions that rewrite it,
+        # the codec decodes the bytes directly.
+        if context is not None and context.versionner is not None and context.versionner.has_hook("body"):
+            body = context.versionner.body(body.decode("utf-8"))
+        if not body:
             raise MissingFieldException("The body of the request is not valid: a json object is expected.")
         else:
-            data = json.loads(body)
+            data = framework_adapter.get_json_codec().loads(body)
 
         data = context.versionner.body_dict(data) if context is not None and context.versionner is not None else data
         return data
     except (SyntaxError,ValueError) as ex:
         raise InvalidDataException("request data is not valid JSON: {message}".format(message=ex))
 
-async def _get_field_from_json_body(framework_adapter, json_field):
+async def _get_streamed_json_fields(framework_adapter, context):
+    if context.streamed_json_fields_future is None:
+        context.streamed_json_fields_future = asyncio.ensure_future(_extract_json_fields(framework_adapter, context.streamed_json_paths))
+
+    # the parsing is shared: a binder cancelled on an other binder failure must not cancel it.
+    return await asyncio.shield(context.streamed_json_fields_future)
+
+async def _extract_json_fields(framework_adapter, json_paths):
+    try:
+        return await json_stream.extract_json_paths(framework_adapter.get_current_request_body_chunks(), json_paths)
+    except ValueError as ex:
+        raise InvalidDataException("request data is not valid JSON: {message}".format(message=ex))
+
+def _can_stream_json_field(context, json_field):
+    # a body parsed already (eg: by the request validation) is read instead of streamed again
+    return context is not None \
+        and context.streamed_json_paths is not None \
+        and json_field in context.streamed_json_paths \
+        and context.json_body_future is None \
+        and (context.versionner is None or not context.versionner.has_body_hooks())
+
+async def _get_field_from_json_body(framework_adapter, json_field, stream=False):
+    context = framework_adapter.get_rest_helper_request_context() if stream else None
+    if _can_stream_json_field(context, json_field):
+        fields = await _get_streamed_json_fields(framework_adapter, context)
+        if json_field not in fields:
+            raise MissingFieldException("The field {json_field} is not present in the content of the request.".format(json_field=json_field))
+        return fields[json_field]
+
     data = await _get_dict_from_json_body(framework_adapter)
 
     json_field_segments = json_field.split("/")
@@ -472,25 +722,18 @@ async def _get_field_from_json_body(framework_adapter, json_field):
     return data
 
 def _get_field_from_query_string(framework_adapter, query_field, as_list):
-    query_string_args = framework_adapter.get_current_request_query_string_args()
-
-    context = framework_adapter.get_rest_helper_request_context()
-    if context is not None and context.versionner is not None:
-        query_string_args = context.versionner.query_string_args(query_string_args)
+    query_string_args = rest_helper_context.get_query_string_args(framework_adapter)
 
     if query_field not in query_string_args:
         raise MissingFieldException("The field {query_field} is not present in the query string.".format(query_field=query_field))
     else:
-        associated_list = query_string_args[query_field]
-        field_value = associated_list[0] if len(associated_list) == 1 and not as_list else associated_list
+        associated_values = query_string_args[query_field]
+        field_value = associated_values[0] if len(associated_values) == 1 and not as_list else list(associated_values)
 
     return field_value
 
 def _get_field_from_headers(framework_adapter, header_field):
-    headers = framework_adapter.get_current_request_headers_dict()
-    context = framework_adapter.get_rest_helper_request_context()
-    if context is not None and context.versionner is not None:
-        headers = context.versionner.headers(headers)
+    headers = rest_helper_context.get_headers(framework_adapter)
 
     if header_field not in headers:
         raise MissingFieldException("The field {header_field} is not present in the requests headers.".format(header_field=header_field))
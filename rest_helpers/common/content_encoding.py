@@ -0,0 +1,123 @@
+"""
+This module decodes the request bodies according to their Content-Encoding
+header, while they are received, and enforces their size limits.
+"""
+
+import zlib
+
+from rest_helpers.rest_exceptions import InvalidDataException, PayloadTooLargeException
+
+class _ZlibDecoder(object):
+    def __init__(self, encoding, wbits):
+        self.encoding = encoding
+        self.wbits = wbits
+        self.decompressor = zlib.decompressobj(wbits)
+        self.started = False
+
+    def decode(self, data, chunk_size):
+        """
+        Decompresses data, yielding chunks of at most chunk_size bytes so that
+        a highly compressed body is never inflated whole in memory.
+        """
+        try:
+            while True:
+                try:
+                    chunk = self.decompressor.decompress(data, chunk_size)
+                except zlib.error:
+                    # "deflate" is sent by some clients without the zlib header
+                    if self.started or self.wbits != zlib.MAX_WBITS:
+                        raise
+                    self.wbits = -zlib.MAX_WBITS
+                    self.decompressor = zlib.decompressobj(self.wbits)
+                    continue
+
+                self.started = True
+                data = self.decompressor.unconsumed_tail
+                if chunk:
+                    yield chunk
+
+                # a full chunk may leave some output pending, even once all the data is consumed
+                if not data and len(chunk) < chunk_size:
+                    return
+        except zlib.error as ex:
+            raise InvalidDataException("The body of the request is not valid {0} data: {1}".format(self.encoding, ex))
+
+    def finish(self):
+        if not self.decompressor.eof:
+            raise InvalidDataException("The body of the request is not valid {0} data: it is truncated.".format(self.encoding))
+
+_decoders = {
+    "identity": None,
+    "gzip": lambda: _ZlibDecoder("gzip", zlib.MAX_WBITS | 16),
+    "x-gzip": lambda: _ZlibDecoder("gzip", zlib.MAX_WBITS | 16),
+    "deflate": lambda: _ZlibDecoder("deflate", zlib.MAX_WBITS),
+}
+
+def get_content_encoding(headers, decode=True):
+    """
+    Arguments:
+        headers {Headers} -- the headers of the request
+
+    Keyword Arguments:
+        decode {bool} -- True if the body is to be decoded, the content encoding must then be supported (default: {True})
+
+    Raises:
+        InvalidDataException -- if the body is to be decoded and its content encoding is not supported
+
+    Returns:
+        str -- the content encoding of the body, in lower case
+    """
+    encoding = headers.get("Content-Encoding", "identity").strip().lower() or "identity"
+    if decode and encoding not in _decoders:
+        raise InvalidDataException("The content encoding {0} of the request body is not supported.".format(encoding))
+
+    return encoding
+
+def check_content_length(headers, max_size):
+    """
+    Raises:
+        PayloadTooLargeException -- if the Content-Length header of the request exceeds max_size
+    """
+    content_length = headers.get("Content-Length")
+    if max_size is not None and content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise PayloadTooLargeException(payload_too_large_message(max_size))
+
+def payload_too_large_message(max_size):
+    return "The body of the request exceeds the maximum size of {0} bytes.".format(max_size)
+
+async def decode_chunks(chunks, encoding, chunk_size=65536, max_size=None, max_decoded_size=None):
+    """
+    Decodes a body received as chunks of bytes.
+
+    Arguments:
+        chunks {async iterable} -- the body, as received
+        encoding {str} -- the content encoding of the body
+
+    Keyword Arguments:
+        chunk_size {int} -- the maximum size of the decoded chunks (default: {65536})
+        max_size {int} -- the maximum size of the body as received (default: {None}, no limit)
+        max_decoded_size {int} -- the maximum size of the decoded body (default: {None}, no limit)
+
+    Raises:
+        PayloadTooLargeException -- as soon as a limit is exceeded
+        InvalidDataException -- if the body is not valid for its encoding
+
+    Returns:
+        async iterator -- the chunks of the decoded body
+    """
+    decoder = _decoders[encoding]() if _decoders[encoding] is not None else None
+    size = 0
+    decoded_size = 0
+    async for received in chunks:
+        size += len(received)
+        if max_size is not None and size > max_size:
+            raise PayloadTooLargeException(payload_too_large_message(max_size))
+
+        for chunk in (decoder.decode(received, chunk_size) if decoder is not None else (received,)):
+            decoded_size += len(chunk)
+            if max_decoded_size is not None and decoded_size > max_decoded_size:
+                raise PayloadTooLargeException(payload_too_large_message(max_decoded_size))
+            yield chunk
+
+    if decoder is not None:
+        decoder.finish()
@@ -1,2 +1,2 @@
 def get_decorated_id(f):
-    return "{0}:{1}:{2}".format(f.__module__, f.__class__, f.__name__)
\ No newline at end of file
+    return "{0}:{1}".format(f.__module__, f.__qualname__)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from collections.abc import MutableMapping
+
+class Headers(MutableMapping):
+    """
+    A case insensitive dictionary of http headers, iterated over as they were first set.
+    When built from headers containing a name several times, the first value is kept.
+
+    The names received are only folded to lower case: a header sent as "X_User" does not
+    replace a header "X-User" (eg: set by a proxy). A name looked up with "_" matches the
+    header with "-" first (as in wsgi), then the header named as is.
+    """
+
+    def __init__(self, headers=None):
+        self._headers = {}
+        if headers is not None:
+            for name, value in headers.items():
+                self._headers.setdefault(name.lower(), (name, value))
+
+    def __getitem__(self, name):
+        return self._headers[self._get_key(name)][1]
+
+    def __setitem__(self, name, value):
+        self._headers[self._get_key(name)] = (name, value)
+
+    def __delitem__(self, name):
+        del self._headers[self._get_key(name)]
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._get_key(name) in self._headers
+
+    def get(self, name, default=None):
+        entry = self._headers.get(self._get_key(name))
+        return default if entry is None else entry[1]
+
+    def __iter__(self):
+        return (name for name, _ in self._headers.values())
+
+    def __len__(self):
+        return len(self._headers)
+
+    def __repr__(self):
+        return "Headers({0!r})".format(dict(self.items()))
+
+    def _get_key(self, name):
+        key = name.lower()
+        folded_key = key.replace("_", "-")
+        return folded_key if folded_key in self._headers else key
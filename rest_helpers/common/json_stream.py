@@ -0,0 +1,265 @@
+"""
+This module extracts values from a json document received as a stream of bytes,
+without building the whole document: only the objects leading to the requested
+values are parsed, everything else is skipped.
+"""
+
+import re
+import json
+
+_NON_WHITESPACE = re.compile(rb'[^ \t\n\r]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_SCALAR_END = re.compile(rb'[,\]} \t\n\r]')
+
+_QUOTE = ord('"')
+_COLON = ord(':')
+_COMMA = ord(',')
+_OPEN_BRACE = ord('{')
+_CLOSE_BRACE = ord('}')
+_OPENINGS = (ord('{'), ord('['))
+
+async def extract_json_paths(chunks, paths):
+    """
+    Extracts the values at the given paths of a json document.
+
+    The chunks are read until all the values are found, the rest of the document
+    is not read. The skipped parts of the document are only checked for their structure,
+    and if a key appears several times in an object, its first value is extracted.
+
+    Arguments:
+        chunks {async iterable} -- the json document, as chunks of bytes
+        paths {iterable} -- the paths of the values, as "/" separated object keys. eg: data/attributes/name
+
+    Raises:
+        ValueError -- if the document is not valid json
+
+    Returns:
+        dict -- the values, keyed by path. The paths absent from the document are missing from the dictionary.
+    """
+    parser = _JsonPathParser(paths)
+    steps = parser.parse()
+    try:
+        next(steps)
+        async for chunk in chunks:
+            if chunk:
+                steps.send(chunk)
+        steps.send(None)
+    except StopIteration:
+        pass
+
+    return parser.get_values()
+
+class _AllFound(Exception):
+    pass
+
+class _JsonPathParser(object):
+    """
+    A parser written as a generator: it yields whenever it needs more bytes,
+    which are sent to it, None marking the end of the document.
+    """
+    def __init__(self, paths):
+        self.paths = set(paths)
+        keys = {tuple(p.split("/")) for p in self.paths}
+
+        # A value containing an other requested value is extracted as a whole.
+        self.targets = {k for k in keys if not any(k[:i] in keys for i in range(1, len(k)))}
+        self.prefixes = {t[:i] for t in self.targets for i in range(1, len(t))}
+        self.found = {}
+
+        self.buffer = bytearray()
+        self.pos = 0
+        self.consumed = 0
+        self.mark = None
+        self.eof = False
+
+    def get_values(self):
+        values = {}
+        for path in self.paths:
+            keys = tuple(path.split("/"))
+            target = next((keys[:i] for i in range(1, len(keys) + 1) if keys[:i] in self.found), None)
+            if target is None:
+                continue
+
+            value = self.found[target]
+            for key in keys[len(target):]:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]
+            else:
+                values[path] = value
+
+        return values
+
+    def parse(self):
+        yield from self._skip_whitespace()
+        if self._current() is None or not self.targets:
+            return
+
+        try:
+            if self._current() == _OPEN_BRACE:
+                yield from self._parse_object(())
+            else:
+                yield from self._skip_value()
+        except _AllFound:
+            return
+
+        yield from self._skip_whitespace()
+        if self._current() is not None:
+            raise self._error("Extra data")
+
+    def _parse_object(self, path):
+        self.pos += 1
+        yield from self._skip_whitespace()
+        if self._current() == _CLOSE_BRACE:
+            self.pos += 1
+            return
+
+        while True:
+            yield from self._skip_whitespace()
+            if self._current() != _QUOTE:
+                raise self._error("Expecting property name enclosed in double quotes")
+            key = yield from self._read_string()
+
+            yield from self._skip_whitespace()
+            if self._current() != _COLON:
+                raise self._error("Expecting ':' delimiter")
+            self.pos += 1
+
+            yield from self._skip_whitespace()
+            value_path = path + (key,)
+            if value_path in self.targets and value_path not in self.found:
+                self.found[value_path] = yield from self._read_value()
+                if len(self.found) == len(self.targets):
+                    raise _AllFound()
+            elif value_path in self.prefixes and self._current() == _OPEN_BRACE:
+                yield from self._parse_object(value_path)
+            else:
+                yield from self._skip_value()
+
+            yield from self._skip_whitespace()
+            current = self._current()
+            if current == _CLOSE_BRACE:
+                self.pos += 1
+                return
+            if current != _COMMA:
+                raise self._error("Expecting ',' delimiter")
+            self.pos += 1
+
+    def _read_string(self):
+        self.mark = self.pos
+        yield from self._skip_string()
+        raw = bytes(self.buffer[self.mark:self.pos])
+        self.mark = None
+        return json.loads(raw.decode("utf-8"))
+
+    def _read_value(self):
+        self.mark = self.pos
+        yield from self._skip_value()
+        raw = bytes(self.buffer[self.mark:self.pos])
+        self.mark = None
+        return json.loads(raw.decode("utf-8"))
+
+    def _skip_value(self):
+        current = self._current()
+        if current is None:
+            raise self._error("Expecting value")
+        if current == _QUOTE:
+            yield from self._skip_string()
+        elif current in _OPENINGS:
+            yield from self._skip_container()
+        else:
+            yield from self._skip_scalar()
+
+    def _skip_string(self):
+        self.pos += 1
+        while True:
+            match = _STRING_SPECIAL.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+            elif self.buffer[match.start()] == _QUOTE:
+                self.pos = match.start() + 1
+                return
+            elif match.start() + 1 < len(self.buffer):
+                self.pos = match.start() + 2
+                continue
+            else:
+                # the escaped character is in the next chunk
+                self.pos = match.start()
+
+            if not (yield from self._fill()):
+                raise self._error("Unterminated string")
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                if not (yield from self._fill()):
+                    raise self._error("Unterminated object or array")
+                continue
+
+            self.pos = match.start()
+            current = self.buffer[self.pos]
+            if current == _QUOTE:
+                yield from self._skip_string()
+                continue
+
+            self.pos += 1
+            depth += 1 if current in _OPENINGS else -1
+            if depth == 0:
+                return
+
+    def _skip_scalar(self):
+        start = self.consumed + self.pos
+        while True:
+            match = _SCALAR_END.search(self.buffer, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                break
+
+            self.pos = len(self.buffer)
+            if not (yield from self._fill()):
+                break
+
+        if self.consumed + self.pos == start:
+            raise self._error("Expecting value")
+
+    def _skip_whitespace(self):
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return
+
+            self.pos = len(self.buffer)
+            if not (yield from self._fill()):
+                return
+
+    def _fill(self):
+        if self.eof:
+            return False
+
+        chunk = yield
+
+        # The bytes already parsed are dropped, except for the value being read.
+        keep = self.pos if self.mark is None else self.mark
+        del self.buffer[:keep]
+        self.consumed += keep
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark = 0
+
+        if chunk is None:
+            self.eof = True
+        else:
+            self.buffer += chunk
+
+        return True
+
+    def _current(self):
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else None
+
+    def _error(self, message):
+        return ValueError("{0}: char {1}".format(message, self.consumed + self.pos))
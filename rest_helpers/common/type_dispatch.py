@@ -0,0 +1,61 @@
+import inspect
+
+_MUTATING_METHODS = ["append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+                     "__setitem__", "__delitem__", "__iadd__", "__imul__"]
+
+class TypeDispatchList(list):
+    """
+    A list of (type, value) tuples used to associate a value (a deserializer,
+    a validator...) to a type hint.
+
+    The entry associated to a type hint is looked up following the method resolution
+    order of the type hint (of its class if the hint is an instance, eg: a schematics
+    type), the first entry of the list matching the most specific class wins.
+    Lookups are cached by class: any modification of the list clears the cache.
+    """
+
+    def __init__(self, *args):
+        super(TypeDispatchList, self).__init__(*args)
+        self._cache = {}
+
+    def lookup(self, type_hint):
+        """
+        Gets the first (type, value) tuple matching the type hint.
+
+        Arguments:
+            type_hint {type|object} -- the type hint, or an instance of the type to look up.
+
+        Returns:
+            tuple -- the matching (type, value) tuple or None if no entry matches.
+        """
+        is_class = isinstance(type_hint, type)
+        key = (type_hint if is_class else type(type_hint), is_class)
+        try:
+            return self._cache[key]
+        except KeyError:
+            entry = self._cache[key] = self._resolve(type_hint, key[0])
+            return entry
+
+    def _resolve(self, type_hint, cls):
+        exact_entries = {}
+        for entry in self:
+            exact_entries.setdefault(entry[0], entry)
+
+        entry = next((exact_entries[c] for c in inspect.getmro(cls) if c in exact_entries), None)
+        if entry is not None:
+            return entry
+
+        # Virtual subclasses (abc.ABCMeta.register) do not appear in the mro.
+        return next((x for x in self
+                     if isinstance(type_hint, type) and issubclass(type_hint, x[0]) or isinstance(type_hint, x[0])), None)
+
+def _invalidating(name):
+    method = getattr(list, name)
+    def _call(self, *args, **kwargs):
+        self._cache.clear()
+        return method(self, *args, **kwargs)
+    _call.__name__ = name
+    return _call
+
+for _name in _MUTATING_METHODS:
+    setattr(TypeDispatchList, _name, _invalidating(_name))
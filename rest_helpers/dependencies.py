@@ -0,0 +1,178 @@
+"""
+This module contains the providers of the dependencies injected by the
+from_dependency binder: database sessions, http clients...
+
+A provider has a scope:
+- app: the dependency is created once, on its first use, and shared by all the requests (eg: a connection pool).
+- request: the dependency is created on its first use in a request, shared by all the binders of the
+           request, and torn down once the response is built (eg: a database session).
+- transient: a new dependency is created for each binder, and torn down once the response is built.
+"""
+
+import asyncio
+import inspect
+import logging
+import functools
+
+from rest_helpers import await_if_needed
+
+LOGGER = logging.getLogger(__name__)
+
+APP_SCOPE = "app"
+REQUEST_SCOPE = "request"
+TRANSIENT_SCOPE = "transient"
+
+class Provider(object):
+    def __init__(self, factory, scope=REQUEST_SCOPE, teardown=None):
+        """
+        Provides a dependency.
+
+        Arguments:
+            factory {callable} -- creates the dependency, it can be a coroutine function. It can also be a generator
+                                  or an async generator function yielding the dependency once: the code after the
+                                  yield tears it down.
+
+        Keyword Arguments:
+            scope {str} -- app, request or transient (default: {request})
+            teardown {callable} -- called with the dependency to tear it down, it can be a coroutine function (default: {None})
+        """
+        if scope not in (APP_SCOPE, REQUEST_SCOPE, TRANSIENT_SCOPE):
+            raise ValueError("Unknown dependency scope: {0}".format(scope))
+
+        self.factory = factory
+        self.scope = scope
+        self.teardown = teardown
+        self.is_async = asyncio.iscoroutinefunction(factory) or inspect.isasyncgenfunction(factory)
+        self._app_future = None
+
+    async def resolve(self, context):
+        """
+        Gets the dependency for the current request.
+
+        Arguments:
+            context {RestHelperContext} -- the context of the current request. Without context, the
+                                           request and transient dependencies are never torn down.
+
+        Returns:
+            object -- the dependency
+        """
+        if self.scope == APP_SCOPE:
+            return await self._resolve_app_dependency()
+
+        if context is None:
+            value, _ = await self._create()
+            return value
+
+        if self.scope == TRANSIENT_SCOPE:
+            return await self._create_for_request(context)
+
+        if context.dependencies is None:
+            context.dependencies = {}
+        if self not in context.dependencies:
+            context.dependencies[self] = asyncio.ensure_future(self._create_for_request(context))
+
+        # the creation is shared: a binder cancelled on an other binder failure must not cancel it.
+        return await asyncio.shield(context.dependencies[self])
+
+    async def close(self):
+        """
+        Tears down the app dependency, if it was created: the next use creates a new one.
+        """
+        future, self._app_future = self._app_future, None
+        if future is None:
+            return
+
+        try:
+            _, teardown = await future
+        except Exception:
+            return
+        if teardown is not None:
+            await await_if_needed(teardown())
+
+    async def _resolve_app_dependency(self):
+        if self._app_future is None:
+            self._app_future = asyncio.ensure_future(self._create())
+
+        future = self._app_future
+        try:
+            value, _ = await asyncio.shield(future)
+        except Exception:
+            # a failed creation is retried by the next request
+            if self._app_future is future:
+                self._app_future = None
+            raise
+
+        return value
+
+    async def _create_for_request(self, context):
+        value, teardown = await self._create()
+        if teardown is not None:
+            if context.dependency_teardowns is None:
+                context.dependency_teardowns = []
+            context.dependency_teardowns.append(teardown)
+
+        return value
+
+    async def _create(self):
+        """
+        Returns:
+            tuple -- (the dependency, the function tearing it down or None)
+        """
+        if inspect.isasyncgenfunction(self.factory):
+            generator = self.factory()
+            return await generator.__anext__(), functools.partial(_finish_async_generator, generator)
+
+        if inspect.isgeneratorfunction(self.factory):
+            generator = self.factory()
+            return next(generator), functools.partial(_finish_generator, generator)
+
+        value = await await_if_needed(self.factory())
+        return value, (functools.partial(self.teardown, value) if self.teardown is not None else None)
+
+def provider(scope=REQUEST_SCOPE, teardown=None):
+    """
+    A decorator creating a Provider from its factory.
+
+    eg:
+    @provider(scope="request")
+    async def db_session():
+        session = await pool.acquire()
+        yield session
+        await pool.release(session)
+    """
+    return lambda factory: Provider(factory, scope, teardown)
+
+async def teardown_request_dependencies(context):
+    """
+    Tears down the request and transient dependencies of a request, the last created first.
+    The errors are logged: a dependency failing to tear down does not prevent the others from being torn down.
+
+    Arguments:
+        context {RestHelperContext} -- the context of the request
+    """
+    if context.dependencies:
+        # the dependencies still being created are torn down as well.
+        await asyncio.gather(*[f for f in context.dependencies.values() if not f.done()], return_exceptions=True)
+
+    teardowns, context.dependency_teardowns = context.dependency_teardowns or [], None
+    for teardown in reversed(teardowns):
+        try:
+            await await_if_needed(teardown())
+        except Exception as ex:
+            LOGGER.error("The teardown of a dependency failed: {0}".format(ex), exc_info=True)
+
+#region private
+
+def _finish_generator(generator):
+    try:
+        next(generator)
+    except StopIteration:
+        pass
+
+async def _finish_async_generator(generator):
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        pass
+
+#endregion
@@ -2,10 +2,12 @@ import sys
 import asyncio
 import inspect
 import functools
-from flask import jsonify,request,has_request_context, Blueprint, jsonify, Flask
+from flask import jsonify,request,has_request_context, Blueprint, jsonify, Flask, current_app
 from flask.globals import _request_ctx_stack as request_context
 from multiprocessing.pool import ThreadPool
+from rest_helpers import json_codec as json_codecs
 from rest_helpers.framework_adapter import BaseFrameworkAdapter
+from rest_helpers.route_registry import RouteRegistry
 
 def flask_adapter_builder(*args, **kwargs):
     if any(args) and isinstance(args[0], Blueprint):
@@ -16,6 +18,29 @@ def flask_adapter_builder(*args, **kwargs):
 
     return adapter, args, kwargs
 
+_ROUTE_REGISTRY_KEY = "rest_helpers_route_registry"
+
+def get_app_route_registry(app):
+    """
+    Gets the registry of the routes of a flask app or blueprint, created on first use. The registry
+    of an app gets the routes of the blueprints when they are registered on the app.
+
+    Arguments:
+        app {Flask|Blueprint} -- the app or the blueprint
+
+    Returns:
+        RouteRegistry -- the registry of the app or of the blueprint
+    """
+    if isinstance(app, Flask):
+        return app.extensions.setdefault(_ROUTE_REGISTRY_KEY, RouteRegistry())
+
+    route_registry = getattr(app, _ROUTE_REGISTRY_KEY, None)
+    if route_registry is None:
+        route_registry = RouteRegistry()
+        setattr(app, _ROUTE_REGISTRY_KEY, route_registry)
+        app.record_once(lambda state: get_app_route_registry(state.app).update(route_registry))
+
+    return route_registry
 
 _async_handled = False
 _async_map = {}
@@ -62,6 +87,8 @@ def handle_async_route(loop=None):
 class FlaskFrameworkAdapter(BaseFrameworkAdapter):
     def __init__(self, blueprint=None):
         self.blueprint = blueprint
+        if blueprint is not None:
+            self.route_registry = get_app_route_registry(blueprint)
         handle_async_route()
         try:
             self.loop = asyncio.get_event_loop()
@@ -72,7 +99,18 @@ class FlaskFrameworkAdapter(BaseFrameworkAdapter):
         return not has_request_context() or request_context.top.app.config["TESTING"] is True
 
     async def get_current_request_body(self):
-        return request.data.decode()
+        body = await self.get_current_request_body_bytes()
+        return body.decode()
+
+    async def read_current_request_body_bytes(self):
+        return request.get_data()
+
+    async def read_current_request_body_chunks(self, chunk_size=65536):
+        stream = request.stream
+        chunk = stream.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = stream.read(chunk_size)
 
     def get_current_request_query_string_args(self):
         return dict(request.args.lists())
@@ -112,7 +150,12 @@ class FlaskFrameworkAdapter(BaseFrameworkAdapter):
 
     def make_json_response(self, obj, status = 200, headers=None, title=None):
         headers = headers or {}
-        response = jsonify(obj)
+        # flask's jsonify is kept unless a codec is configured: it applies the json settings of the app.
+        codec = self.json_codec if self.json_codec is not None else json_codecs.get_configured_json_codec()
+        if codec is None:
+            response = jsonify(obj)
+        else:
+            response = current_app.response_class(codec.dumps(obj), mimetype="application/json")
         if title is not None:
             response._status = str(status)+" "+title
             response._status_code = status
@@ -126,5 +169,8 @@ class FlaskFrameworkAdapter(BaseFrameworkAdapter):
 def add_default_swagger_routes(app, source, **kwargs):
     swagger_ui = Blueprint('swagger_ui', 'swagger_ui', url_prefix='')
     import rest_helpers.routes as native_routes
-    native_routes.add_default_swagger_routes(FlaskFrameworkAdapter(swagger_ui), source, **kwargs)
+    # the swagger description lists the routes of all the blueprints of the app
+    adapter = FlaskFrameworkAdapter(swagger_ui)
+    adapter.route_registry = get_app_route_registry(app)
+    native_routes.add_default_swagger_routes(adapter, source, **kwargs)
     app.register_blueprint(swagger_ui)
@@ -1,6 +1,9 @@
 import  json
 import functools
 
+from rest_helpers import json_codec as json_codecs, rest_helper_context, route_registry as route_registries
+from rest_helpers.common import content_encoding
+
 class Proxy(object):
     def __init__(self, proxied, adapter_builder):
         self.proxied = proxied
@@ -66,9 +69,133 @@ class BaseFrameworkAdapter(object):  # pragma: no cover
     #endregion
 
     #region optional
+
+    # The codec decoding the request bodies and encoding the responses.
+    # If None, the default codec of the process is used.
+    json_codec = None
+
+    # If True, the routes registered afterwards validate every request against their
+    # swagger parameters before binding it, see request_validation.
+    validate_requests = False
+
+    def get_json_codec(self):
+        return self.json_codec if self.json_codec is not None else json_codecs.get_json_codec()
+
+    # The registry of the routes and binders registered through this adapter, read by the swagger
+    # generation. If None, the registry of the process is used.
+    route_registry = None
+
+    def get_route_registry(self):
+        return self.route_registry if self.route_registry is not None else route_registries.get_route_registry()
+
     def is_in_test(self):
         return False
 
+    # True if the framework decompresses the request bodies itself: their
+    # size as received is then only known from their Content-Length.
+    decompresses_request_body = False
+
+    # If True, the request bodies are decompressed according to their Content-Encoding
+    # (gzip or deflate) while they are read. Otherwise they are given as received.
+    decompress_request_bodies = False
+
+    async def get_current_request_body_bytes(self):
+        """
+        Gets the body of the request as bytes, decompressed according to its Content-Encoding
+        but not decoded to text. The body is read once per request: it is cached on the rest helper context.
+        """
+        context = self.get_rest_helper_request_context()
+        if context is None:
+            return await self._read_decoded_request_body_bytes()
+
+        if context.body_bytes is None:
+            context.body_bytes = await self._read_decoded_request_body_bytes()
+
+        return context.body_bytes
+
+    async def read_current_request_body_bytes(self):
+        body = await self.get_current_request_body()
+        return body.encode()
+
+    async def read_current_request_body_chunks(self, chunk_size=65536):
+        """
+        Reads the body of the request as chunks of bytes, as they are received.
+        """
+        yield await self.read_current_request_body_bytes()
+
+    async def get_current_request_body_chunks(self, chunk_size=65536):
+        """
+        Gets the body of the request as chunks of bytes, decompressed according to
+        its Content-Encoding, for the binders that do not need the whole body at once.
+        """
+        context = self.get_rest_helper_request_context()
+        if context is not None and context.body_bytes is not None:
+            yield context.body_bytes
+            return
+
+        async for chunk in self._iter_decoded_request_body_chunks(chunk_size):
+            yield chunk
+
+    def get_current_request_body_decoding(self):
+        """
+        Gets how the body of the request is decoded: its content encoding, and the limits of its size
+        as received and once decompressed, set by the route on the rest helper context.
+
+        Raises:
+            PayloadTooLargeException -- if the Content-Length of the request already exceeds the limits
+            InvalidDataException -- if the body is to be decompressed and its content encoding is not supported
+
+        Returns:
+            tuple -- (content encoding, max size, max decompressed size), the sizes being None if not limited.
+        """
+        context = self.get_rest_helper_request_context()
+        max_size = context.max_body_size if context is not None else None
+        max_decompressed_size = context.max_decompressed_body_size if context is not None else None
+
+        headers = rest_helper_context.get_headers(self)
+        decompress = self.decompress_request_bodies and not self.decompresses_request_body
+        encoding = content_encoding.get_content_encoding(headers, decode=decompress)
+        content_encoding.check_content_length(headers, max_size)
+        if encoding == "identity" or not (decompress or self.decompresses_request_body):
+            # the body is given as received, both limits apply to the bytes received
+            content_encoding.check_content_length(headers, max_decompressed_size)
+            limits = [l for l in (max_size, max_decompressed_size) if l is not None]
+            return "identity", None, min(limits) if limits else None
+
+        if self.decompresses_request_body:
+            return "identity", None, max_decompressed_size
+
+        return encoding, max_size, max_decompressed_size
+
+    async def _read_decoded_request_body_bytes(self):
+        encoding, max_size, max_decompressed_size = self.get_current_request_body_decoding()
+        if encoding == "identity" and max_size is None and max_decompressed_size is None:
+            return await self.read_current_request_body_bytes()
+
+        return b"".join([chunk async for chunk in self._iter_decoded_request_body_chunks()])
+
+    async def _iter_decoded_request_body_chunks(self, chunk_size=65536):
+        encoding, max_size, max_decompressed_size = self.get_current_request_body_decoding()
+        chunks = self.read_current_request_body_chunks(chunk_size)
+        if encoding != "identity" or max_size is not None or max_decompressed_size is not None:
+            chunks = content_encoding.decode_chunks(chunks, encoding, chunk_size, max_size, max_decompressed_size)
+
+        async for chunk in chunks:
+            yield chunk
+
+    def get_current_request_path_params(self, args, kwargs):
+        """
+        Gets the parameters of the route matched by the current request.
+
+        Arguments:
+            args {tuple} -- the positional arguments the route was called with by the framework
+            kwargs {dict} -- the keyword arguments the route was called with by the framework
+
+        Returns:
+            {Mapping} -- the values of the route parameters, keyed by name
+        """
+        return kwargs
+
     def set_request_args(self, args):
         return args
 
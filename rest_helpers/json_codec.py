@@ -0,0 +1,166 @@
+"""
+This module contains the codecs used by the framework adapters to decode the
+json bodies of the requests and to encode the responses.
+
+The codec used by default is the first registered codec whose library is
+installed: orjson if it is available, the standard library json module otherwise.
+"""
+
+import json
+import datetime
+
+from decimal import Decimal
+from collections import OrderedDict
+from rest_helpers.common.type_dispatch import TypeDispatchList
+
+def _isoformat(value):
+    return value.isoformat()
+
+class JsonCodec(object):
+    name = None
+
+    def __init__(self, default_hooks=None):
+        """
+        A json encoder and decoder. Objects the codec cannot encode natively
+        are converted by the first default hook matching their type.
+
+        Keyword Arguments:
+            default_hooks {list} -- (type, function) tuples, the function converting an object of the type into
+                                    an object the codec can encode (default: {Decimal as float, dates and times
+                                    as iso 8601 strings})
+        """
+        self.default_hooks = TypeDispatchList(default_hooks if default_hooks is not None else [
+            (Decimal, float),
+            (datetime.datetime, _isoformat),
+            (datetime.date, _isoformat),
+            (datetime.time, _isoformat)
+        ])
+
+    def default(self, obj):
+        hook = self.default_hooks.lookup(obj)
+        if hook is None:
+            raise TypeError("Object of type {0} is not JSON serializable".format(obj.__class__.__name__))
+
+        return hook[1](obj)
+
+    def loads(self, data):
+        """
+        Arguments:
+            data {str|bytes} -- a json document
+
+        Raises:
+            ValueError -- if the document is not valid json
+
+        Returns:
+            object -- the decoded document
+        """
+        raise NotImplementedError()
+
+    def dumps(self, obj):
+        """
+        Arguments:
+            obj {object} -- the object to encode
+
+        Returns:
+            bytes -- the utf-8 encoded json document
+        """
+        raise NotImplementedError()
+
+class StdlibJsonCodec(JsonCodec):
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=self.default).encode("utf-8")
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self, default_hooks=None):
+        import orjson
+
+        super(OrjsonCodec, self).__init__(default_hooks)
+        self._orjson = orjson
+        # Dates go through the default hooks so that every codec encodes them the same way.
+        self._options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj, default=self.default, option=self._options)
+
+_codec_factories = OrderedDict()
+_default_codec = None
+_configured_codec = None
+
+def register_json_codec(name, factory, preferred=False):
+    """
+    Registers a codec.
+
+    Arguments:
+        name {str} -- the name of the codec
+        factory {callable} -- returns a new codec. It raises an ImportError if the library
+                              the codec relies on is not installed.
+
+    Keyword Arguments:
+        preferred {bool} -- if True, the codec is preferred to the ones already registered,
+                            otherwise it is used only if none of them is installed (default: {False})
+    """
+    global _default_codec
+
+    _codec_factories[name] = factory
+    if preferred:
+        _codec_factories.move_to_end(name, last=False)
+    _default_codec = None
+
+def get_json_codec(name=None):
+    """
+    Gets a codec.
+
+    Keyword Arguments:
+        name {str} -- the name of the codec (default: {the default codec})
+
+    Returns:
+        JsonCodec -- a new codec if a name is given, otherwise the codec shared by the whole process.
+    """
+    global _default_codec
+
+    if name is not None:
+        return _codec_factories[name]()
+
+    if _default_codec is None:
+        _default_codec = _create_first_installed_codec()
+
+    return _default_codec
+
+def set_default_json_codec(codec):
+    """
+    Sets the codec shared by the whole process.
+
+    Arguments:
+        codec {JsonCodec|str} -- the codec, or the name of a registered codec
+    """
+    global _default_codec, _configured_codec
+    _default_codec = _configured_codec = get_json_codec(codec) if isinstance(codec, str) else codec
+
+def get_configured_json_codec():
+    """
+    Returns:
+        JsonCodec -- the codec set with set_default_json_codec, or None if it was never set.
+    """
+    return _configured_codec
+
+def _create_first_installed_codec():
+    for factory in _codec_factories.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+
+    return StdlibJsonCodec()
+
+register_json_codec(OrjsonCodec.name, OrjsonCodec)
+register_json_codec(StdlibJsonCodec.name, StdlibJsonCodec)
@@ -0,0 +1,448 @@
+"""
+This module contains the helpers used by the from_Oauth binding to get
+the public keys used by the token issuers to sign their tokens.
+"""
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+
+from time import monotonic, time
+from collections import OrderedDict
+from requests_futures.sessions import FuturesSession
+
+LOGGER = logging.getLogger(__name__)
+
+_key_clean_regex=re.compile('[^a-zA-Z0-9]+')
+
+def clean_key_id(key_id):
+    return re.sub(_key_clean_regex, '', key_id)
+
+class _IssuerKeys(object):
+    def __init__(self, keys, fetched_at, ttl, refresh_ahead):
+        self.keys = keys
+        self.fetched_at = fetched_at
+        self.expires_at = fetched_at + ttl
+        self.refresh_at = self.expires_at - refresh_ahead
+
+class JwksKeyStore(object):
+    def __init__(self, ttl=3600, refresh_ahead=300, min_refresh_interval=30, unknown_key_ttl=300, max_unknown_keys=1024, keys_fetcher=None,
+                 rotation_interval=None, snapshot_path=None, static_keys=None, failure_ttl=30, max_issuers=1024):
+        """
+        A cache of the public keys of token issuers, keyed by issuer.
+
+        The keys of an issuer are fetched following the open id discovery protocol:
+        the discovery document gives the jwks uri, which gives the keys. The http calls
+        do not block the event loop, and concurrent lookups of an issuer whose keys are
+        missing wait for the same fetch. An issuer whose keys could not be fetched has
+        no keys until failure_ttl seconds later: it is not fetched again meanwhile.
+
+        Keyword Arguments:
+            ttl {int} -- number of seconds the keys of an issuer are kept (default: {3600})
+            refresh_ahead {int} -- number of seconds before expiration during which a lookup
+                                   refreshes the keys in the background (default: {300})
+            min_refresh_interval {int} -- minimum number of seconds between two fetches caused
+                                          by an unknown key id (default: {30})
+            unknown_key_ttl {int} -- number of seconds an unknown key id is remembered, during which
+                                     it does not cause any fetch (default: {300})
+            max_unknown_keys {int} -- maximum number of unknown key ids remembered (default: {1024})
+            keys_fetcher {coroutine function} -- takes an issuer and returns its keys as a dictionary
+                                     keyed by cleaned key id (default: {open id discovery})
+            rotation_interval {int} -- number of seconds between two refreshes of the prefetched issuers
+                                       keys (default: {ttl - refresh_ahead})
+            snapshot_path {str} -- path of a json file where the keys are saved after each fetch, and from
+                                   which they are loaded when the store is created (default: {None})
+            static_keys {dict} -- jwks keyed by issuer: the keys of these issuers are never fetched (default: {None})
+            failure_ttl {int} -- number of seconds a failed fetch of the keys of an issuer is remembered (default: {30})
+            max_issuers {int} -- maximum number of issuers whose keys, or failed fetch, are kept: the least
+                                 recently fetched ones are evicted (default: {1024})
+        """
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refresh_interval = min_refresh_interval
+        self.unknown_key_ttl = unknown_key_ttl
+        self.max_unknown_keys = max_unknown_keys
+        self.keys_fetcher = keys_fetcher or fetch_issuer_keys
+        self.rotation_interval = rotation_interval or (ttl - refresh_ahead)
+        self.snapshot_path = snapshot_path
+        self.failure_ttl = failure_ttl
+        self.max_issuers = max_issuers
+
+        # the issuers come from the unverified tokens: both maps are bounded.
+        self._issuers = OrderedDict()
+        self._failures = OrderedDict()
+        self._static_issuers = {}
+        self._unknown_keys = OrderedDict()
+        self._refreshes = {}
+        self._prefetch_issuers = set()
+        self._rotations = {}
+
+        self.add_static_keys(static_keys or {})
+        if snapshot_path is not None:
+            self.load_snapshot()
+
+    async def get_key(self, issuer, key_id):
+        """
+        Gets the public key of an issuer.
+
+        Arguments:
+            issuer {str} -- the url of the token issuer
+            key_id {str} -- the cleaned id of the key
+
+        Returns:
+            dict -- the key, as found in the issuer jwks, or None if the issuer has no such key or its keys
+                    could not be fetched.
+        """
+        static_keys = self._static_issuers.get(issuer)
+        if static_keys is not None:
+            return static_keys.get(key_id)
+
+        now = monotonic()
+        issuer_keys = self._issuers.get(issuer)
+        if issuer_keys is None or now >= issuer_keys.expires_at:
+            issuer_keys = await self._get_refreshed_keys(issuer, now)
+            if issuer_keys is None:
+                return None
+        elif now >= issuer_keys.refresh_at and not self._is_failing(issuer, now):
+            # the current keys are still valid: they are used while new ones are fetched.
+            self._refresh(issuer)
+
+        key = issuer_keys.keys.get(key_id)
+        if key is not None:
+            return key
+
+        # The issuer might have rotated its keys since they were fetched: they are fetched again
+        # unless they are very recent or the key id is already known not to exist.
+        if now - issuer_keys.fetched_at >= self.min_refresh_interval and not self._is_unknown_key(issuer, key_id, now):
+            issuer_keys = await self._get_refreshed_keys(issuer, now)
+            key = issuer_keys.keys.get(key_id) if issuer_keys is not None else None
+
+        if key is None:
+            self._add_unknown_key(issuer, key_id, now)
+
+        return key
+
+    def set_keys(self, issuer, keys, fetched_at=None):
+        """
+        Sets the keys of an issuer, as if they were just fetched.
+
+        Arguments:
+            issuer {str} -- the url of the token issuer
+            keys {dict} -- the keys, keyed by cleaned key id
+
+        Keyword Arguments:
+            fetched_at {float} -- when the keys were fetched, as a time.monotonic value (default: {now})
+        """
+        self._issuers.pop(issuer, None)
+        self._issuers[issuer] = _IssuerKeys(keys, monotonic() if fetched_at is None else fetched_at, self.ttl, self.refresh_ahead)
+        self._failures.pop(issuer, None)
+        while len(self._issuers) > self.max_issuers:
+            self._issuers.popitem(last=False)
+
+    def add_static_keys(self, static_keys):
+        """
+        Adds issuers whose keys are provided by configuration: they never expire and are never fetched.
+
+        Arguments:
+            static_keys {dict} -- jwks (eg: {"keys": [{"kid": ...}]}) keyed by issuer
+        """
+        for issuer, jwks in static_keys.items():
+            self._static_issuers[issuer] = {clean_key_id(key['kid']):key for key in jwks['keys']}
+
+    def clear(self):
+        self._issuers.clear()
+        self._failures.clear()
+        self._unknown_keys.clear()
+
+    async def prefetch(self, issuers):
+        """
+        Fetches the keys of the issuers concurrently. Failures are logged and not raised.
+
+        Arguments:
+            issuers {list} -- the urls of the token issuers
+        """
+        await asyncio.gather(*(self._refresh(i) for i in issuers if i not in self._static_issuers), return_exceptions=True)
+
+    def add_prefetch_issuers(self, issuers):
+        """
+        Adds issuers whose keys are fetched by start_rotation, then refreshed in the background.
+
+        Arguments:
+            issuers {list} -- the urls of the token issuers
+        """
+        self._prefetch_issuers.update(issuers)
+
+    async def start_rotation(self, app=None):
+        """
+        Fetches the keys of the prefetched issuers, then refreshes them every rotation_interval
+        seconds, in the background of the running event loop. It is awaited when the app starts:
+        eg: app.on_startup.append(key_store.start_rotation) with aiohttp.
+
+        Keyword Arguments:
+            app {any} -- ignored, so that it can be used as a startup hook (default: {None})
+        """
+        await self.prefetch(list(self._prefetch_issuers))
+
+        loop = asyncio.get_event_loop()
+        if loop not in self._rotations:
+            self._rotations[loop] = asyncio.ensure_future(self._rotate())
+
+    def stop_rotation(self):
+        for rotation in self._rotations.values():
+            if rotation is not None:
+                rotation.cancel()
+        self._rotations.clear()
+
+    def load_snapshot(self):
+        """
+        Loads the keys saved in the snapshot file: a fresh process can verify
+        tokens before making any network call.
+        """
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as ex:
+            LOGGER.warning("The keys snapshot {0} could not be loaded: {1}".format(self.snapshot_path, ex))
+            return
+
+        # the snapshot timestamps are wall clock timestamps, converted to monotonic ones.
+        offset = monotonic() - time()
+        for issuer, issuer_keys in snapshot.get("issuers", {}).items():
+            if issuer not in self._issuers:
+                self.set_keys(issuer, issuer_keys["keys"], issuer_keys["fetched_at"] + offset)
+
+    def save_snapshot(self):
+        """
+        Saves the keys to the snapshot file. The file is replaced atomically so
+        that concurrent processes never read a partial snapshot.
+        """
+        offset = time() - monotonic()
+        snapshot = {
+            "issuers": {issuer:{"fetched_at": k.fetched_at + offset, "keys": k.keys} for issuer, k in list(self._issuers.items())}
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".jwks_snapshot")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    async def _rotate(self):
+        while True:
+            await asyncio.sleep(self.rotation_interval)
+            await self.prefetch(list(self._prefetch_issuers))
+
+    def _refresh(self, issuer):
+        # Refreshes are futures bound to an event loop, hence the loop in the key.
+        refresh_key = (issuer, asyncio.get_event_loop())
+        refresh = self._refreshes.get(refresh_key)
+        if refresh is None:
+            refresh = self._refreshes[refresh_key] = asyncio.ensure_future(self._fetch(issuer))
+            refresh.add_done_callback(lambda f: self._on_refresh_done(refresh_key, f))
+
+        return refresh
+
+    async def _get_refreshed_keys(self, issuer, now):
+        if self._is_failing(issuer, now):
+            return None
+
+        try:
+            # the refresh is shared: a lookup cancelled (eg: client disconnected) must not cancel it.
+            return await asyncio.shield(self._refresh(issuer))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # the failure is logged and remembered by the refresh
+            return None
+
+    async def _fetch(self, issuer):
+        try:
+            keys = await self.keys_fetcher(issuer)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._add_failure(issuer)
+            raise
+
+        self.set_keys(issuer, keys)
+        if self.snapshot_path is not None:
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self.save_snapshot)
+            except Exception as ex:
+                LOGGER.warning("The keys snapshot {0} could not be saved: {1}".format(self.snapshot_path, ex))
+
+        return self._issuers[issuer]
+
+    def _on_refresh_done(self, refresh_key, refresh):
+        self._refreshes.pop(refresh_key, None)
+        if not refresh.cancelled() and refresh.exception() is not None:
+            LOGGER.warning("The keys of the issuer {0} could not be fetched: {1}".format(refresh_key[0], refresh.exception()))
+
+    def _is_failing(self, issuer, now):
+        retry_at = self._failures.get(issuer)
+        return retry_at is not None and now < retry_at
+
+    def _add_failure(self, issuer):
+        self._failures.pop(issuer, None)
+        self._failures[issuer] = monotonic() + self.failure_ttl
+        while len(self._failures) > self.max_issuers:
+            self._failures.popitem(last=False)
+
+    def _is_unknown_key(self, issuer, key_id, now):
+        expires_at = self._unknown_keys.get((issuer, key_id))
+        return expires_at is not None and now < expires_at
+
+    def _add_unknown_key(self, issuer, key_id, now):
+        self._unknown_keys.pop((issuer, key_id), None)
+        self._unknown_keys[(issuer, key_id)] = now + self.unknown_key_ttl
+        while len(self._unknown_keys) > self.max_unknown_keys:
+            self._unknown_keys.popitem(last=False)
+
+class StaticKeyStore(object):
+    def __init__(self, static_keys, key_store):
+        """
+        The keys of issuers provided by configuration, owned by a binding: the keys of the
+        other issuers are looked up in a key store, that can be shared by other bindings.
+
+        Arguments:
+            static_keys {dict} -- jwks (eg: {"keys": [{"kid": ...}]}) keyed by issuer
+            key_store {JwksKeyStore} -- the store of the keys of the other issuers
+        """
+        self.key_store = key_store
+        self._static_issuers = {issuer:{clean_key_id(key['kid']):key for key in jwks['keys']} for issuer, jwks in static_keys.items()}
+
+    async def get_key(self, issuer, key_id):
+        static_keys = self._static_issuers.get(issuer)
+        if static_keys is not None:
+            return static_keys.get(key_id)
+
+        return await self.key_store.get_key(issuer, key_id)
+
+class TokenCache(object):
+    def __init__(self, max_size=1024, leeway=0):
+        """
+        A bounded LRU cache of verified tokens, keyed by a hash of the token and of the scope
+        it was verified in. An entry expires when its token does (minus the leeway), tokens
+        without expiration are not cached.
+
+        Keyword Arguments:
+            max_size {int} -- maximum number of tokens cached, 0 disables the cache (default: {1024})
+            leeway {int} -- number of seconds before the token expiration at which the entry expires (default: {0})
+        """
+        self.max_size = max_size
+        self.leeway = leeway
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token, default=None, scope=b""):
+        """
+        Gets the value cached for a token.
+
+        Arguments:
+            token {str} -- the token
+
+        Keyword Arguments:
+            default {any} -- the value returned when the token is not cached (default: {None})
+            scope {bytes} -- a digest of the parameters the token was verified with (eg: its audience): a
+                             token verified in a scope is not considered verified in the others (default: {b""})
+
+        Returns:
+            any -- the cached value, or default.
+        """
+        token_hash = _hash_token(token, scope)
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is not None and time() < entry[0]:
+                self._entries.move_to_end(token_hash)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[token_hash]
+            self.misses += 1
+            return default
+
+    def set(self, token, value, expiration, scope=b""):
+        """
+        Caches the value associated to a verified token.
+
+        Arguments:
+            token {str} -- the token
+            value {any} -- the value to be cached
+            expiration {int} -- the expiration of the token (its exp claim), as a timestamp
+
+        Keyword Arguments:
+            scope {bytes} -- a digest of the parameters the token was verified with (default: {b""})
+        """
+        if expiration is None or self.max_size <= 0:
+            return
+
+        token_hash = _hash_token(token, scope)
+        with self._lock:
+            self._entries[token_hash] = (expiration - self.leeway, value)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+def get_verification_scope(*parameters):
+    """
+    Gets the digest of the parameters a token is verified with, used as a TokenCache scope.
+
+    Arguments:
+        parameters {any} -- json serializable parameters (eg: the audience, the allowed domains)
+
+    Returns:
+        bytes -- the digest of the parameters.
+    """
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True, default=repr).encode()).digest()
+
+def _hash_token(token, scope):
+    return hashlib.sha256(scope + b"\0" + token.encode()).digest()
+
+_session = None
+
+async def fetch_issuer_keys(issuer):
+    """
+    Fetches the keys of an issuer following the open id discovery protocol.
+
+    Arguments:
+        issuer {str} -- the url of the token issuer
+
+    Returns:
+        dict -- the keys of the issuer, keyed by cleaned key id.
+    """
+    openid_configuration = await _get_json("{}/.well-known/openid-configuration".format(issuer))
+    jwks = await _get_json(openid_configuration['jwks_uri'])
+    return {clean_key_id(key['kid']):key for key in jwks['keys']}
+
+async def _get_json(url):
+    # requests are sent from a thread pool so that the event loop is not blocked.
+    global _session
+    if _session is None:
+        _session = FuturesSession()
+
+    response = await asyncio.wrap_future(_session.get(url))
+    return response.json()
+
+default_key_store = JwksKeyStore()
@@ -0,0 +1,252 @@
+"""
+This module compiles the swagger parameters of a route into a request validator.
+
+The validator checks the query string, the headers and the json body of a request
+in a single pass, before any binder runs, and rejects the request with one
+InvalidDataException listing every problem found.
+"""
+
+import functools
+
+from rest_helpers import swagger, binding, rest_helper_context, type_deserializers
+from rest_helpers.rest_exceptions import InvalidDataException
+
+def compile_request_validator(route):
+    """
+    Compiles the request validator of a route, from the parameters of its swagger
+    documentation: the default ones inferred from its binders, augmented by its docstring.
+
+    Arguments:
+        route {route} -- the route, once its view function is decorated
+
+    Returns:
+        coroutine function -- validate_request(framework_adapter), raising an InvalidDataException
+                              listing all the problems of the current request, or None if the
+                              route has nothing to validate.
+    """
+    checks = []
+    for parameter in swagger._get_parameters(route, route.framework_adapter.get_route_registry()):
+        if parameter["in"] == "query":
+            checks.append(_compile_query_check(parameter))
+        elif parameter["in"] == "header":
+            checks.append(_compile_header_check(parameter))
+        elif parameter["in"] == "body":
+            checks.append(_compile_body_check(parameter))
+
+    if not checks:
+        return None
+
+    async def validate_request(framework_adapter):
+        problems = []
+        for check in checks:
+            await check(framework_adapter, problems)
+
+        if problems:
+            raise InvalidDataException("The request is not valid: {0} problem(s): {1}".format(len(problems), "; ".join(problems)))
+
+    return validate_request
+
+#region private
+
+def _compile_query_check(parameter):
+    name = parameter["name"]
+    required = parameter.get("required", False)
+    check_value = _compile_string_check(parameter.get("items", {}) if parameter.get("type") == "array" else parameter)
+
+    async def check_query(framework_adapter, problems):
+        values = rest_helper_context.get_query_string_args(framework_adapter).get(name)
+        if values is None:
+            if required:
+                problems.append("query parameter {0}: this parameter is required".format(name))
+            return
+
+        for value in values:
+            check_value(value, "query parameter {0}".format(name), problems)
+
+    return check_query
+
+def _compile_header_check(parameter):
+    name = parameter["name"]
+    required = parameter.get("required", False)
+    check_value = _compile_string_check(parameter)
+
+    async def check_header(framework_adapter, problems):
+        value = rest_helper_context.get_headers(framework_adapter).get(name)
+        if value is None:
+            if required:
+                problems.append("header {0}: this header is required".format(name))
+            return
+
+        check_value(value, "header {0}".format(name), problems)
+
+    return check_header
+
+def _compile_body_check(parameter):
+    required = parameter.get("required", False)
+    # the swagger definitions are only built if the schema references them.
+    get_schemas = functools.lru_cache(maxsize=None)(swagger.get_swagger_definitions)
+    check_value = _compile_json_check(parameter.get("schema", {}), {}, get_schemas)
+
+    async def check_body(framework_adapter, problems):
+        # the body is parsed once per request: the binders reuse this parsing.
+        try:
+            body = await binding._get_dict_from_json_body(framework_adapter)
+        except binding.MissingFieldException:
+            if required:
+                problems.append("body: a json object is required")
+            return
+        except InvalidDataException as ex:
+            problems.append("body: {0}".format(ex))
+            return
+
+        check_value(body, "body", problems)
+
+    return check_body
+
+def _compile_string_check(schema):
+    """
+    Compiles the check of a query string or header value, received as a string.
+    """
+    # a value is valid if the binder can deserialize it: bool_deserializer accepts any string.
+    checks = []
+    p_type = schema.get("type")
+    if p_type == "integer":
+        checks.append((_deserializes(type_deserializers.int_deserializer), "expected an integer"))
+    elif p_type == "number":
+        checks.append((_deserializes(type_deserializers.float_deserializer), "expected a number"))
+    elif schema.get("format") == "date-time":
+        checks.append((_is_datetime, "expected a datetime"))
+
+    if "enum" in schema:
+        allowed = frozenset(str(e) for e in schema["enum"])
+        checks.append((lambda x: x in allowed, "expected one of {0}".format(", ".join(sorted(allowed)))))
+
+    def check_string(value, path, problems):
+        for is_valid, message in checks:
+            if not is_valid(value):
+                problems.append("{0}: {1}, got {2!r}".format(path, message, value))
+                return
+
+    return check_string
+
+_json_types = {
+    "object": (lambda x: isinstance(x, dict), "an object"),
+    "array": (lambda x: isinstance(x, list), "an array"),
+    "string": (lambda x: isinstance(x, str), "a string"),
+    "boolean": (lambda x: isinstance(x, bool), "a boolean"),
+    "integer": (lambda x: isinstance(x, int) and not isinstance(x, bool), "an integer"),
+    "number": (lambda x: isinstance(x, (int, float)) and not isinstance(x, bool), "a number"),
+}
+
+def _compile_json_check(schema, definitions, get_schemas):
+    """
+    Compiles the check of a json value against a swagger schema. The compiled
+    definitions are shared by the references to them, resolved from the swagger
+    definitions returned by get_schemas.
+    """
+    if "$ref" in schema:
+        return _compile_ref_check(schema["$ref"], definitions, get_schemas)
+
+    checks = [_compile_json_check(s, definitions, get_schemas) for s in schema.get("allOf", [])]
+    nullable = schema.get("x-nullable", False)
+
+    type_check = _json_types.get(schema.get("type"))
+    if "enum" in schema:
+        checks.append(_compile_enum_check(schema["enum"]))
+
+    if schema.get("type") == "object":
+        checks.append(_compile_object_check(schema, definitions, get_schemas))
+    elif schema.get("type") == "array" and "items" in schema:
+        checks.append(_compile_array_check(schema["items"], definitions, get_schemas))
+    elif schema.get("type") == "string" and schema.get("format") == "date-time":
+        checks.append(_check_datetime)
+
+    def check_json(value, path, problems):
+        if value is None and nullable:
+            return
+        if type_check is not None and not type_check[0](value):
+            problems.append("{0}: expected {1}, got {2!r}".format(path, type_check[1], value))
+            return
+
+        for check in checks:
+            check(value, path, problems)
+
+    return check_json
+
+def _compile_object_check(schema, definitions, get_schemas):
+    properties = [(name, _compile_json_check(s, definitions, get_schemas)) for name, s in schema.get("properties", {}).items()]
+    required = schema.get("required", [])
+    additional_properties = schema.get("additionalProperties")
+    check_additional = _compile_json_check(additional_properties, definitions, get_schemas) if isinstance(additional_properties, dict) else None
+    known_names = frozenset(name for name, _ in properties)
+
+    def check_object(value, path, problems):
+        for name in required:
+            if name not in value:
+                problems.append("{0}.{1}: this field is required".format(path, name))
+
+        for name, check in properties:
+            if name in value:
+                check(value[name], "{0}.{1}".format(path, name), problems)
+
+        if check_additional is not None:
+            for name, field_value in value.items():
+                if name not in known_names:
+                    check_additional(field_value, "{0}.{1}".format(path, name), problems)
+
+    return check_object
+
+def _compile_array_check(items_schema, definitions, get_schemas):
+    check_item = _compile_json_check(items_schema, definitions, get_schemas)
+
+    def check_array(value, path, problems):
+        for index, item in enumerate(value):
+            check_item(item, "{0}[{1}]".format(path, index), problems)
+
+    return check_array
+
+def _compile_enum_check(allowed):
+    def check_enum(value, path, problems):
+        if value not in allowed:
+            problems.append("{0}: expected one of {1}, got {2!r}".format(path, ", ".join(str(e) for e in allowed), value))
+
+    return check_enum
+
+def _check_datetime(value, path, problems):
+    if not _is_datetime(value):
+        problems.append("{0}: expected a datetime, got {1!r}".format(path, value))
+
+def _compile_ref_check(ref, definitions, get_schemas):
+    name = ref.split("/")[-1]
+    if name not in definitions:
+        schemas = get_schemas()
+        if name not in schemas:
+            raise ValueError("The swagger definition {0} does not exist: define it before the routes using it".format(ref))
+
+        # registered before it is compiled, for the recursive definitions.
+        definitions[name] = None
+        definitions[name] = _compile_json_check(schemas[name], definitions, get_schemas)
+
+    def check_ref(value, path, problems):
+        definitions[name](value, path, problems)
+
+    return check_ref
+
+def _deserializes(deserializer):
+    def is_valid(value):
+        try:
+            deserializer(value)
+            return True
+        except (ValueError, TypeError, ArithmeticError):
+            return False
+
+    return is_valid
+
+def _is_datetime(value):
+    try:
+        type_deserializers.datetime_deserializer(value)
+        return True
+    except (ValueError, TypeError, OverflowError):
+        return False
+
+#endregion
@@ -7,7 +7,7 @@ from functools import reduce
 from time import time
 from rest_helpers.jsonapi_objects import Error, Resource, SuccessResponse, ErrorResponse, Response, Link
 from rest_helpers.type_serializers import to_jsonable,response_to_jsonable
-from rest_helpers import rest_exceptions, binding
+from rest_helpers import rest_exceptions, binding, rest_helper_context
 
 LOGGER = logging.getLogger(__name__)
 def base_exception_handler(framework_adapter, exception):
@@ -15,6 +15,8 @@ def base_exception_handler(framework_adapter, exception):
         return bad_request(framework_adapter, exception)
     elif isinstance(exception, binding.MissingFieldException):
         return bad_request(framework_adapter, exception)
+    elif isinstance(exception, rest_exceptions.PayloadTooLargeException):
+        return payload_too_large(framework_adapter, exception)
     elif isinstance(exception, rest_exceptions.UnauthorizedException):
         return error(framework_adapter, 401, "Unauthorized", "Your authentication was not successful.")
     elif isinstance(exception, rest_exceptions.ForbiddenException):
@@ -32,6 +34,10 @@ def not_found(framework_adapter, details=None):
     """Creates an HTTP Status code 404 response with the given message."""
     return error(framework_adapter, 404, "Not found", "Client error: The requested resource does not exist.{}".format(("\n"+details) if details else ""))
 
+def payload_too_large(framework_adapter, exception):
+    """Creates an HTTP Status code 413 response with the given message."""
+    return error(framework_adapter, 413, "Payload too large", "Client error: "+str(exception))
+
 def internal_server_error(framework_adapter, exception, stack_trace=""):
     """Creates an HTTP Status code 500 response with the given message."""
     details = "Server error: {exception_type} {exception_str} \n {stack_trace}".format(
@@ -45,7 +51,7 @@ def error(framework_adapter, status_code, title, detail, retry_after=None):
     """Creates an error response with the given status code, error title and detail."""
     assert status_code >= 400
     error_obj = Error(
-        error_id = framework_adapter.get_current_request_headers_dict().get("X-Unique-ID") or str(time()),
+        error_id = rest_helper_context.get_headers(framework_adapter).get("X-Unique-ID") or str(time()),
         status = status_code,
         title = title,
         detail = detail
@@ -86,10 +92,10 @@ def accepted(framework_adapter, data=None):
 def success(framework_adapter, data, status_code, meta=None, links=None, page_size=None, id_only=False, is_private=None):
     """ Create a success response with the given object, status code, and meta. """
     assert status_code < 300 and status_code >= 200
-    request_args=framework_adapter.get_current_request_query_string_args()
+    request_args = rest_helper_context.get_query_string_args(framework_adapter)
 
     if isinstance(data, list):
-        actual_page_size = request_args.get("page_size") or page_size or framework_adapter.get_rest_helper_request_context().page_size
+        actual_page_size = request_args.get("page_size", (None,))[0] or page_size or framework_adapter.get_rest_helper_request_context().page_size
 
         if actual_page_size is not None:
             meta = meta if meta is not None else {}
@@ -141,7 +147,7 @@ def _paginate(framework_adapter, data, page_size, links, meta):
     next_link = None
 
     # This is a zero based page index
-    query_string_args = framework_adapter.get_current_request_query_string_args()
+    query_string_args = rest_helper_context.get_query_string_args(framework_adapter)
     page = int(query_string_args.get("page",[1])[0])-1
     left = page * page_size
     right = min(len(data), left + page_size)
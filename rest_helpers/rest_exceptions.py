@@ -31,3 +31,10 @@ class ForbiddenException(BaseExceptionHandle):
     perform the requested operation.
     """
     pass
+
+class PayloadTooLargeException(BaseExceptionHandle):
+    """
+    This exception indicates a client error : the
+    body of the request exceeds the allowed size.
+    """
+    pass
@@ -1,4 +1,84 @@
+from types import MappingProxyType
+from rest_helpers.common.headers import Headers
+
 class RestHelperContext:
     def __init__(self):
         self.page_size=None
-        self.versionner=None
\ No newline at end of file
+        self.versionner=None
+
+        # The body of the request, read (and decompressed) at most once.
+        self.body_bytes=None
+
+        # The limits of the size of the body, as received and once decompressed, set by the route.
+        self.max_body_size=None
+        self.max_decompressed_body_size=None
+
+        # The versionned query string args and headers, parsed at most once.
+        self.query_string_args=None
+        self.headers=None
+
+        # The json body is parsed (and versionned) at most once per request,
+        # all the body binders await this future.
+        self.json_body_future=None
+
+        # The json body fields bound in streaming mode are extracted in a
+        # single pass over the body, shared by their binders.
+        self.streamed_json_paths=None
+        self.streamed_json_fields_future=None
+
+        # The request dependencies, keyed by provider, and the teardowns of the
+        # request and transient dependencies, run once the response is built.
+        self.dependencies=None
+        self.dependency_teardowns=None
+
+def get_query_string_args(framework_adapter):
+    """
+    Gets the query string args of the current request, with the requested version applied.
+    They are parsed once per request and cached on the rest helper context.
+
+    Arguments:
+        framework_adapter {BaseFrameworkAdapter} -- The adapter used to interact with the framework
+
+    Returns:
+        {Mapping} -- an immutable mapping of the arg names to the tuple of their values.
+    """
+    context = framework_adapter.get_rest_helper_request_context()
+    if context is not None and context.query_string_args is not None:
+        return context.query_string_args
+
+    query_string_args = framework_adapter.get_current_request_query_string_args()
+    if context is not None and context.versionner is not None:
+        query_string_args = context.versionner.query_string_args(query_string_args)
+
+    query_string_args = MappingProxyType({k:tuple(v) if isinstance(v, (list, tuple)) else (v,) for k,v in query_string_args.items()})
+    if context is not None:
+        context.query_string_args = query_string_args
+
+    return query_string_args
+
+def get_headers(framework_adapter):
+    """
+    Gets the headers of the current request, with the requested version applied.
+    They are copied once per request, in a case insensitive dictionary cached on the rest helper context.
+
+    Arguments:
+        framework_adapter {BaseFrameworkAdapter} -- The adapter used to interact with the framework
+
+    Returns:
+        {Headers} -- the headers, keyed by case insensitive name.
+    """
+    context = framework_adapter.get_rest_helper_request_context()
+    if context is not None and context.headers is not None:
+        return context.headers
+
+    headers = Headers(framework_adapter.get_current_request_headers_dict())
+
+    # The versionner is not called at all for the versions without headers hook.
+    if context is not None and context.versionner is not None and context.versionner.has_hook("headers"):
+        headers = context.versionner.headers(headers)
+        headers = headers if isinstance(headers, Headers) else Headers(headers)
+
+    if context is not None:
+        context.headers = headers
+
+    return headers
@@ -0,0 +1,123 @@
+"""
+This module contains the registry of the routes and of the binders of their view
+functions, read by the swagger generation and the request validation.
+
+The flask and aiohttp adapters built for a blueprint or an app use the registry of this
+blueprint or app. The other adapters share the registry of the process, unless the
+route_registry attribute of the adapter is set (eg: in a test).
+"""
+
+class RouteRegistry(object):
+    def __init__(self):
+        """
+        The routes registered through a framework adapter, and the binders of their view functions.
+        The lookups are indexed: they do not scan the registered routes or binders.
+        """
+        self.routes = []
+        self._routes_by_id = {}
+        self._routes_by_resource_class = {}
+        self._routes_by_method = {}
+        self._binders_by_view_function = {}
+        self._binders_by_type = {}
+
+    def add_route(self, route):
+        """
+        Arguments:
+            route {route} -- a route, once its rule is set
+        """
+        self.routes.append(route)
+        self._routes_by_id.setdefault(route.id, []).append(route)
+        self._routes_by_resource_class.setdefault(getattr(route, "resource_class", None), []).append(route)
+        for method in route.options.get("methods", []):
+            self._routes_by_method.setdefault(method.upper(), []).append(route)
+
+    def add_binder(self, view_function, binder):
+        """
+        Arguments:
+            view_function {function} -- the original view function, not wrapped by its decorators
+            binder {base_binder} -- a binder filling an argument of the view function
+        """
+        self._binders_by_view_function.setdefault(view_function, []).append(binder)
+        # the binders by type are computed lazily, from the binders registered so far
+        self._binders_by_type.pop(view_function, None)
+
+    def copy_binders(self, view_function, route_registry):
+        """
+        Registers the binders of a view function registered in another registry, that are not registered yet.
+
+        Arguments:
+            view_function {function} -- the original view function, not wrapped by its decorators
+            route_registry {RouteRegistry} -- the other registry
+        """
+        if route_registry is self:
+            return
+
+        binders = self.get_binders(view_function)
+        for binder in route_registry.get_binders(view_function):
+            if not any(b is binder for b in binders):
+                self.add_binder(view_function, binder)
+
+    def update(self, route_registry):
+        """
+        Registers the routes and the binders of another registry.
+
+        Arguments:
+            route_registry {RouteRegistry} -- the other registry
+        """
+        for route in route_registry.routes:
+            self.add_route(route)
+        for view_function in route_registry._binders_by_view_function:
+            self.copy_binders(view_function, route_registry)
+
+    def get_routes(self, route_id=None, resource_class=None, method=None):
+        """
+        Keyword Arguments:
+            route_id {str} -- the id of the view function of the routes (default: {None}, any)
+            resource_class {type} -- the resource class of the routes (default: {None}, any)
+            method {str} -- an http method of the routes (default: {None}, any)
+
+        Returns:
+            {list} -- the matching routes, in the order they were registered.
+        """
+        candidates = [self.routes]
+        if route_id is not None:
+            candidates.append(self._routes_by_id.get(route_id, []))
+        if resource_class is not None:
+            candidates.append(self._routes_by_resource_class.get(resource_class, []))
+        if method is not None:
+            candidates.append(self._routes_by_method.get(method.upper(), []))
+
+        smallest = min(candidates, key=len)
+        others = [set(map(id, c)) for c in candidates if c is not smallest]
+        return [r for r in smallest if all(id(r) in o for o in others)]
+
+    def get_binders(self, view_function, *binder_types):
+        """
+        Arguments:
+            view_function {function} -- the original view function, not wrapped by its decorators
+            binder_types {type} -- the types of the binders (default: any)
+
+        Returns:
+            {list} -- the binders of the view function that are instances of one of the types.
+        """
+        binders = self._binders_by_view_function.get(view_function, [])
+        if not binder_types:
+            return binders
+
+        binders_by_type = self._binders_by_type.setdefault(view_function, {})
+        if binder_types not in binders_by_type:
+            binders_by_type[binder_types] = [b for b in binders if isinstance(b, binder_types)]
+
+        return binders_by_type[binder_types]
+
+    def has_binders(self, view_function):
+        return view_function in self._binders_by_view_function
+
+_default_registry = RouteRegistry()
+
+def get_route_registry():
+    """
+    Returns:
+        RouteRegistry -- the registry shared by the whole process.
+    """
+    return _default_registry
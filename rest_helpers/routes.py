@@ -1,17 +1,17 @@
 import os
+import copy
 import logging
 import traceback
 import functools
 import inspect
+from urllib.parse import quote
 from jinja2 import Template
-from rest_helpers import responses, swagger, rest_helper_context, binding, await_if_needed
+from rest_helpers import responses, swagger, rest_helper_context, binding, request_validation, dependencies, await_if_needed, route_registry as route_registries
 from rest_helpers.common import decorators
 from rest_helpers.framework_adapter import BaseFrameworkAdapter
 
 LOGGER = logging.getLogger(__name__)
 
-_swagger_routes = []
-
 #TODO: move the url parameter logic to the binding section
 
 class route(object):
@@ -19,7 +19,7 @@ class route(object):
     This decorator is to be used to create a route, catching all exceptions in order to return a well formatted 500 response.
     """
 
-    def __init__(self, framework_adapter, rule, options=None, doc=True, versionner=None, exception_handler=None):
+    def __init__(self, framework_adapter, rule, options=None, doc=True, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
         assert isinstance(framework_adapter, BaseFrameworkAdapter)
         self.framework_adapter = framework_adapter
         self.options = options if options else { "methods":["GET"]}
@@ -29,19 +29,40 @@ class route(object):
         self.rule = rule
         self.id = None
         self.versionner = versionner
+        self.version = None # the version of a route registered per version
+        self.request_validator = None
+        self.max_body_size = max_body_size
+        self.max_decompressed_body_size = max_decompressed_body_size
         self.exception_handler = exception_handler or functools.partial(responses.base_exception_handler, self.framework_adapter)
 
-    async def _on_request(self, *args, **kwargs):
+    async def _on_request(self, *args, rest_helper_versionner=None, **kwargs):
+        rh_context = None
         try:
             rh_context = rest_helper_context.RestHelperContext()
-            if self.versionner is not None:
-                rh_context.versionner = self.versionner()
-                rh_context.versionner.set_request_args(request_args=args, request_kwargs=kwargs)
+            if self.versionner is not None and self.versionner.static_routes:
+                # The versionner of a route registered per version is created when it is registered, None
+                # for the versions without hooks.
+                rh_context.versionner = rest_helper_versionner
+            elif self.versionner is not None:
+                versionner = self.versionner()
+                versionner.set_request_args(request_args=args, request_kwargs=kwargs)
+                # The requests of a version without hooks (eg: the latest) skip the versionner altogether.
+                if versionner.has_hooks():
+                    rh_context.versionner = versionner
 
             self.framework_adapter.attach_rest_helper_request_context(rh_context)
 
+            if self.max_body_size is not None or self.max_decompressed_body_size is not None:
+                rh_context.max_body_size = self.max_body_size
+                rh_context.max_decompressed_body_size = self.max_decompressed_body_size
+                # a body whose Content-Length exceeds the limits is rejected before anything else
+                self.framework_adapter.get_current_request_body_decoding()
+
             self._before_fn_call(args, kwargs)
 
+            if self.request_validator is not None and not self.framework_adapter.is_in_test():
+                await self.request_validator(self.framework_adapter)
+
             result = await await_if_needed(self._binding_functions(*args, **kwargs))
             return result if rh_context.versionner is None else rh_context.versionner.response(result)
         except Exception as ex:
@@ -50,13 +71,40 @@ class route(object):
                 str(ex),
                 traceback.format_exc(),
                 self.framework_adapter.get_current_request_full_path(),
-                await self.framework_adapter.get_current_request_body()))
+                _get_body_for_log(rh_context)))
 
             return self.exception_handler(ex)
+        finally:
+            if rh_context is not None and (rh_context.dependencies or rh_context.dependency_teardowns):
+                await dependencies.teardown_request_dependencies(rh_context)
 
     def _before_fn_call(self, f_arg, f_kwargs):
         pass
 
+    def _add_static_version_rules(self):
+        """
+        Registers a concrete route per supported version (eg: /v1/tests, /v2/tests): an unsupported
+        version is not routed at all, and the hooks of the version are resolved once.
+        """
+        endpoint = self.options.get("endpoint", self.real_view_function.__name__)
+        for version in self.versionner.supported_versions:
+            versionner = self.versionner()
+            versionner.requested_version = version
+
+            version_route = copy.copy(self)
+            version_route.version = version
+            version_route.options = dict(self.options, endpoint="{0}_{1}".format(endpoint, version))
+            self.versionner.static_version_route(version_route, version)
+
+            self.framework_adapter.add_url_rule(version_route, self._get_version_handler(versionner if versionner.has_hooks() else None))
+            self.framework_adapter.get_route_registry().add_route(version_route)
+
+    def _get_version_handler(self, versionner):
+        async def on_version_request(*args, **kwargs):
+            return await self._on_request(*args, rest_helper_versionner=versionner, **kwargs)
+
+        return on_version_request
+
     def __call__(self, f):
         self.view_function = f
         self.real_view_function = f
@@ -65,14 +113,23 @@ class route(object):
             self.real_view_function = self.real_view_function.__wrapped__
         self.id = decorators.get_decorated_id(self.real_view_function)
 
-        if self.versionner is not None:
-            self.versionner.version_route(self)
+        if self.versionner is not None and self.versionner.static_routes:
+            self._add_static_version_rules()
+        else:
+            if self.versionner is not None:
+                self.versionner.version_route(self)
 
-        self.framework_adapter.add_url_rule(self, self._on_request)
-        if self.doc:
-            _swagger_routes.append(self)
+            self.framework_adapter.add_url_rule(self, self._on_request)
+            self.framework_adapter.get_route_registry().add_route(self)
 
         self._binding_functions = binding.bind_hints(self.framework_adapter)(self.view_function)
+
+        # the binders built without an app (eg: through the framework proxies, annotations included) are
+        # registered in the registry of the process: the registry of the route gets them too.
+        self.framework_adapter.get_route_registry().copy_binders(self.real_view_function, route_registries.get_route_registry())
+        if self.framework_adapter.validate_requests:
+            self.request_validator = request_validation.compile_request_validator(self)
+
         return self._on_request
 
 class base_resource_route(route):
@@ -81,91 +138,109 @@ class base_resource_route(route):
     binding, as well as catching all exceptions in order to return a well formatted 500 response.
     """
 
-    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None):
-        super(base_resource_route, self).__init__(framework_adapter, rule=None, options=options, doc=doc, versionner=versionner, exception_handler=exception_handler)
+    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(base_resource_route, self).__init__(framework_adapter, rule=None, options=options, doc=doc, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.resource_class = resource_class
 
+    # The trailing type segments of the resource type that are not part of the resource id (eg: the
+    # resources listed by a get all route), and the trailing url segments that are not resource names.
+    _resource_id_excluded_types = 0
+    _resource_id_excluded_url_segments = 0
+
+    def __call__(self, f):
+        return_value = super(base_resource_route, self).__call__(f)
+
+        # The resource id is formatted from the route parameters by a template computed once.
+        # eg: /clusters/hosts -> /clusters/{cluster_name}/hosts/{host_name}
+        self._binds_resource_id = self.resource_class is not None and "resource_id" in self.real_view_function.__code__.co_varnames
+        if self._binds_resource_id:
+            path_params = _get_resource_path_params(self.resource_class)
+            path_params = path_params[:len(path_params) - self._resource_id_excluded_types]
+            self._resource_id_type_segments = [t for t, _ in path_params]
+            self._resource_id_template = "".join("/{0}/{{{1}}}".format(t, p) for t, p in path_params)
+
+        return return_value
+
     def _before_fn_call(self, f_arg, f_kwargs):
-        if "resource_id" not in self.real_view_function.__code__.co_varnames:
+        if not self._binds_resource_id:
             return
 
-        # We are using the resource type incombination with the url segments to address cases where there is a base path/prefix.
+        try:
+            # the route parameters are url decoded: they are quoted back so that the resource id stays the
+            # one of the url (eg: /tests/my%20test)
+            f_kwargs["resource_id"] = self._resource_id_template.format_map(
+                _QuotedPathParams(self.framework_adapter.get_current_request_path_params(f_arg, f_kwargs)))
+        except KeyError:
+            f_kwargs["resource_id"] = self._get_resource_id_from_url()
+
+    def _get_resource_id_from_url(self):
+        # The route parameters are not named after the resource type (eg: a custom rule): the resource id is
+        # read from the url. We are using the resource type incombination with the url segments to address
+        # cases where there is a base path/prefix.
         url_segments = self.framework_adapter.get_current_request_url().strip(" /").split("/")
-        type_segments = self.resource_class.resource_type.strip(" /").split('/')
-        type_segments_length = len(type_segments)
-        f_kwargs["resource_id"] = "".join("/{0}/{1}".format(t,url_segments[-type_segments_length*2+i*2+1]) for i,t in enumerate(type_segments))
+        url_segments = url_segments[:len(url_segments) - self._resource_id_excluded_url_segments]
+        type_segments_length = len(self._resource_id_type_segments)
+        return "".join("/{0}/{1}".format(t,url_segments[-type_segments_length*2+i*2+1]) for i,t in enumerate(self._resource_id_type_segments))
 
 class get_resource_route(base_resource_route):
-    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None):
-        super(get_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler)
-        self.rule = "".join("/{0}/<{1}_name>".format(x, x[:-3]+'y' if x[-3:] == 'ies' else (x[:-1] if x[-1] == 's' else x)) for x in resource_class.resource_type.strip(" /").split("/"))
+    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(get_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
+        self.rule = "".join("/{0}/<{1}>".format(t, p) for t, p in _get_resource_path_params(resource_class))
         self.options["methods"] = ["GET"]
 
 class get_all_resources_route(get_resource_route):
-    def __init__(self, framework_adapter, resource_class, doc=True, page_size=None, options=None, versionner=None, exception_handler=None):
-        super(get_all_resources_route, self).__init__(framework_adapter, resource_class, doc, options, versionner=versionner, exception_handler=exception_handler)
+    def __init__(self, framework_adapter, resource_class, doc=True, page_size=None, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(get_all_resources_route, self).__init__(framework_adapter, resource_class, doc, options, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.rule = self.rule[:self.rule.rindex("/")+1]
         self.page_size = page_size
 
+    _resource_id_excluded_types = 1
+    _resource_id_excluded_url_segments = 1
+
     def _before_fn_call(self, f_arg, f_kwargs):
         self.framework_adapter.get_rest_helper_request_context().page_size = self.page_size
+        super(get_all_resources_route, self)._before_fn_call(f_arg, f_kwargs)
 
-        if "resource_id" not in self.real_view_function.__code__.co_varnames:
-            return
+class _QuotedPathParams(object):
+    def __init__(self, path_params):
+        self.path_params = path_params
 
-        # We are using the resource type incombination with the url segments to address cases where there is a base path/prefix.
-        url_segments = self.framework_adapter.get_current_request_url().strip(" /").split("/")[:-1]
-        type_segments = self.resource_class.resource_type.strip(" /").split('/')[:-1]
-        type_segments_length = len(type_segments)
-        f_kwargs["resource_id"] = "".join("/{0}/{1}".format(t,url_segments[-type_segments_length*2+i*2+1]) for i,t in enumerate(type_segments))
+    def __getitem__(self, name):
+        return quote(str(self.path_params[name]), safe=":")
 
 class delete_resource_route(base_resource_route):
-    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None):
-        super(delete_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler)
-        self.rule = "".join("/{0}/<{1}_name>".format(x, x[:-3]+'y' if x[-3:] == 'ies' else (x[:-1] if x[-1] == 's' else x)) for x in resource_class.resource_type.strip(" /").split("/"))
+    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(delete_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
+        self.rule = "".join("/{0}/<{1}>".format(t, p) for t, p in _get_resource_path_params(resource_class))
         self.options["methods"] = ["DELETE"]
 
 class put_resource_route(get_resource_route):
-    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None):
-        super(put_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler)
+    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(put_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.options["methods"] = ["PUT"]
 
 class patch_resource_route(get_resource_route):
-    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None):
-        super(patch_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler)
+    def __init__(self, framework_adapter, resource_class, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(patch_resource_route, self).__init__(framework_adapter, resource_class, doc, options=options, versionner=versionner, exception_handler=exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.options["methods"] = ["PATCH"]
 
 class operation_resource_route(get_resource_route):
-    def __init__(self, framework_adapter, resource_class, operation_name, doc=True, options=None, versionner=None, exception_handler=None):
-        super(operation_resource_route, self).__init__(framework_adapter, resource_class, doc, options, versionner, exception_handler)
+    def __init__(self, framework_adapter, resource_class, operation_name, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(operation_resource_route, self).__init__(framework_adapter, resource_class, doc, options, versionner, exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.options["methods"] = ["POST"]
         self.operation_name = operation_name
         self.rule = "{0}/{1}".format(self.rule, self.operation_name)
 
-    def _before_fn_call(self, f_arg, f_kwargs):
-        if "resource_id" not in self.real_view_function.__code__.co_varnames:
-            return
-
-        # We are using the resource type incombination with the url segments to address cases where there is a base path/prefix.
-        url_segments = self.framework_adapter.get_current_request_url().strip(" /").split("/")[:-1]
-        type_segments = self.resource_class.resource_type.strip(" /").split('/')
-        type_segments_length = len(type_segments)
-        f_kwargs["resource_id"] = "".join("/{0}/{1}".format(t,url_segments[-type_segments_length*2+i*2+1]) for i,t in enumerate(type_segments))
+    _resource_id_excluded_url_segments = 1
 
 class group_operation_resource_route(operation_resource_route):
-    def __init__(self, framework_adapter, resource_class, operation_name=None, doc=True, options=None, versionner=None, exception_handler=None):
-        super(group_operation_resource_route, self).__init__(framework_adapter, resource_class, operation_name, doc, options, versionner, exception_handler)
+    def __init__(self, framework_adapter, resource_class, operation_name=None, doc=True, options=None, versionner=None, exception_handler=None, max_body_size=None, max_decompressed_body_size=None):
+        super(group_operation_resource_route, self).__init__(framework_adapter, resource_class, operation_name, doc, options, versionner, exception_handler, max_body_size=max_body_size, max_decompressed_body_size=max_decompressed_body_size)
         self.rule = "{0}/{1}".format("/".join(self.rule.split("/")[:-2]), operation_name)
 
-    def _before_fn_call(self, f_arg, f_kwargs):
-        if "resource_id" not in self.real_view_function.__code__.co_varnames:
-            return
+    _resource_id_excluded_types = 1
+    _resource_id_excluded_url_segments = 2
 
-        # We are using the resource type incombination with the url segments to address cases where there is a base path/prefix.
-        url_segments = self.framework_adapter.get_current_request_url().strip(" /").split("/")[:-2]
-        type_segments = self.resource_class.resource_type.strip(" /").split('/')[:-1]
-        type_segments_length = len(type_segments)
-        f_kwargs["resource_id"] = "".join("/{0}/{1}".format(t,url_segments[-type_segments_length*2+i*2+1]) for i,t in enumerate(type_segments))
 #region non decorator helpers
 
 def add_get_resource_route(func, *args, **kwargs):
@@ -207,7 +282,7 @@ def add_default_swagger_routes(framework_adapter, source, basepath=None, **kwarg
     basePath = basepath or service_description.get("basePath","/")
     basePath = basePath + ("/" if basePath[-1]!="/" else "")
     def get_swagger_json():
-        return framework_adapter.make_json_response(swagger.get_swagger_service_description(source))
+        return framework_adapter.make_json_response(swagger.get_swagger_service_description(source, framework_adapter.get_route_registry()))
 
     swagger_json_route = base_resource_route(framework_adapter, None, doc=False, options={ "methods": ["GET"] })
     swagger_json_route.rule = basePath + "swagger.json"
@@ -224,3 +299,22 @@ def add_default_swagger_routes(framework_adapter, source, basepath=None, **kwarg
     swagger_route(get_swagger_ui)
 
 #endregion
+
+#region private
+
+def _get_resource_path_params(resource_class):
+    """
+    Gets the route parameters of the resource names, named after the de-pluralized resource types.
+    eg: /clusters/libraries -> [("clusters", "cluster_name"), ("libraries", "library_name")]
+    """
+    return [(x, "{0}_name".format(x[:-3]+'y' if x[-3:] == 'ies' else (x[:-1] if x[-1] == 's' else x)))
+            for x in resource_class.resource_type.strip(" /").split("/")]
+
+def _get_body_for_log(rh_context):
+    # The body is logged only if it was read: it is not read again for the log.
+    if rh_context is None or rh_context.body_bytes is None:
+        return "<not read>"
+
+    return rh_context.body_bytes.decode("utf-8", "replace")
+
+#endregion
@@ -1,6 +1,10 @@
 import yaml
 import re
-from rest_helpers import routes,jsonapi_objects, binding, validators, type_deserializers, routes
+import typing
+import datetime
+
+from decimal import Decimal
+from rest_helpers import routes,jsonapi_objects, binding, validators, type_deserializers, routes, route_registry as route_registries
 
 SWAGGER_AUGMENT_DEFAULT_KEY = "augment_default"
 SWAGGER_EXTRA_DEFINITION_KEY = "extra_definition"
@@ -10,7 +14,7 @@ SWAGGER_JSONAPI_RESPONSE_DEFINITION_KEY = "jsonapi_response"
 
 _swagger_object_classes = [jsonapi_objects.ErrorResponse, jsonapi_objects.SuccessResponse]
 
-def get_swagger_service_description(source):
+def get_swagger_service_description(source, route_registry=None):
     """
     This function gets the full swagger spec for a given service.
     
@@ -19,6 +23,9 @@ def get_swagger_service_description(source):
                                     level description of the service or a func/class whose
                                     docstring contains the service high level description as a
                                     yaml blob under a 'Swagger doc:' line.
+
+    Keyword Arguments:
+        route_registry {RouteRegistry} -- the registry of the routes to describe (default: {the registry of the process})
     
     Returns:
         dict -- the swagger description of the service.
@@ -38,7 +45,7 @@ def get_swagger_service_description(source):
         "basePath": "",
         "tags":[],
         "schemes": ["http"],
-        "paths":get_swagger_paths(),
+        "paths":get_swagger_paths(route_registry),
         "definitions":get_swagger_definitions()
     }
 
@@ -105,15 +112,21 @@ def get_swagger_definitions():
     return return_value
 
 
-def get_swagger_paths():
+def get_swagger_paths(route_registry=None):
     return_value = {}
-    for route in routes._swagger_routes:
+    route_registry = route_registry or route_registries.get_route_registry()
+    for route in (r for r in route_registry.routes if r.doc):
         existing_doc = _get_swagger_part(route.view_function, SWAGGER_DOCUMENTATION_KEY)
         key = "/"+route.rule.replace("<","{").replace(">","}").strip(" /")
         if key not in return_value:
             return_value[key] = {}
 
-        _update(return_value[key], _get_default_swagger_path(route))
+        default_swagger_path = _get_default_swagger_path(route, route_registry)
+        if default_swagger_path is not None and route.version is not None:
+            # the operations of the routes registered per version are listed for each version
+            for operation in default_swagger_path.values():
+                operation["operationId"] = "{0}_{1}".format(operation["operationId"], route.version)
+        _update(return_value[key], default_swagger_path)
         _update(return_value[key][next(iter(return_value[key].keys()))], existing_doc)
 
         augment_dic = _get_swagger_part(route.view_function, SWAGGER_AUGMENT_DEFAULT_KEY)
@@ -138,27 +151,27 @@ def _get_swagger_part(function_or_class, key="doc"):
     return None
 
 #region default paths
-def _get_default_swagger_path(route):
+def _get_default_swagger_path(route, route_registry):
     return_value = None
 
     if type(route) == routes.get_resource_route:
-        return_value = _get_default_swagger_path_for_get_route(route)
+        return_value = _get_default_swagger_path_for_get_route(route, route_registry)
     elif type(route) == routes.get_all_resources_route:
-        return_value = _get_default_swagger_path_for_get_all_route(route)
+        return_value = _get_default_swagger_path_for_get_all_route(route, route_registry)
     elif type(route) == routes.put_resource_route:
-        return_value = _get_default_swagger_path_for_put_route(route)
+        return_value = _get_default_swagger_path_for_put_route(route, route_registry)
     elif type(route) == routes.operation_resource_route:
-        return_value = _get_default_swagger_path_for_op_route(route)
+        return_value = _get_default_swagger_path_for_op_route(route, route_registry)
     elif type(route) == routes.group_operation_resource_route:
-        return_value = _get_default_swagger_path_for_group_op_route(route)
+        return_value = _get_default_swagger_path_for_group_op_route(route, route_registry)
     elif type(route) == routes.patch_resource_route:
-        return_value = _get_default_swagger_path_for_patch_resource_route(route)
+        return_value = _get_default_swagger_path_for_patch_resource_route(route, route_registry)
     elif type(route) == routes.delete_resource_route:
-        return_value = _get_default_swagger_path_for_delete_resource_route(route)
+        return_value = _get_default_swagger_path_for_delete_resource_route(route, route_registry)
     return return_value
 
 
-def _get_default_swagger_path_for_get_route(route):
+def _get_default_swagger_path_for_get_route(route, route_registry):
     return_value = {
         "get":{
             "tags":[route.resource_class.resource_type],
@@ -166,7 +179,7 @@ def _get_default_swagger_path_for_get_route(route):
             "description":"",
             "operationId": "get{type}".format(type="_".join((unpluralize(x) for x in route.resource_class.resource_type.split("/")))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route),
+            "parameters": _get_parameters(route, route_registry),
             "responses":{
                 "200":
                 {
@@ -191,7 +204,7 @@ def _get_default_swagger_path_for_get_route(route):
     return return_value
 
 
-def _get_default_swagger_path_for_get_all_route(route):
+def _get_default_swagger_path_for_get_all_route(route, route_registry):
     return_value = {
         "get":{
             "tags":[route.resource_class.resource_type],
@@ -199,7 +212,7 @@ def _get_default_swagger_path_for_get_all_route(route):
             "description":"",
             "operationId": "get_all{type}".format(type="_".join(x for x in route.resource_class.resource_type.split("/"))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route),
+            "parameters": _get_parameters(route, route_registry),
             "responses":{
                 "200":
                 {
@@ -215,8 +228,8 @@ def _get_default_swagger_path_for_get_all_route(route):
 
     return return_value
 
-def _get_default_swagger_path_for_put_route(route):
-    parameters = [p for p in  _get_parameters(route) if p.get("in") != "body"]
+def _get_default_swagger_path_for_put_route(route, route_registry):
+    parameters = [p for p in  _get_parameters(route, route_registry) if p.get("in") != "body"]
     parameters.append({
                 "in": "body",
                 "name": "body",
@@ -257,7 +270,7 @@ def _get_default_swagger_path_for_put_route(route):
 
     return return_value
 
-def _get_default_swagger_path_for_patch_resource_route(route):
+def _get_default_swagger_path_for_patch_resource_route(route, route_registry):
     return_value = {
         "patch":{
             "tags":[route.resource_class.resource_type],
@@ -265,7 +278,7 @@ def _get_default_swagger_path_for_patch_resource_route(route):
             "description":"",
             "operationId": "patch{type}".format(type="_".join((unpluralize(x) for x in route.resource_class.resource_type.split("/")))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route),
+            "parameters": _get_parameters(route, route_registry),
             "responses":{
                 "201":
                 {
@@ -288,7 +301,7 @@ def _get_default_swagger_path_for_patch_resource_route(route):
     }
     return return_value
 
-def _get_default_swagger_path_for_op_route(route):
+def _get_default_swagger_path_for_op_route(route, route_registry):
     return_value = {
         "post":{
             "tags":[route.resource_class.resource_type],
@@ -296,7 +309,7 @@ def _get_default_swagger_path_for_op_route(route):
             "description":"",
             "operationId": "{operation_name}{type}".format(operation_name=route.operation_name, type="_".join((unpluralize(x) for x in route.resource_class.resource_type.split("/")))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route, route.operation_name),
+            "parameters": _get_parameters(route, route_registry, route.operation_name),
             "responses":{
                 "200":
                 {
@@ -320,7 +333,7 @@ def _get_default_swagger_path_for_op_route(route):
 
     return return_value
 
-def _get_default_swagger_path_for_group_op_route(route):
+def _get_default_swagger_path_for_group_op_route(route, route_registry):
     return_value = {
         "post":{
             "tags":[route.resource_class.resource_type],
@@ -328,7 +341,7 @@ def _get_default_swagger_path_for_group_op_route(route):
             "description":"",
             "operationId": "{operation_name}_all{type}".format(operation_name=route.operation_name, type="_".join(route.resource_class.resource_type.split("/"))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route, route.operation_name),
+            "parameters": _get_parameters(route, route_registry, route.operation_name),
             "responses":{
                 "200":
                 {
@@ -352,7 +365,7 @@ def _get_default_swagger_path_for_group_op_route(route):
 
     return return_value
 
-def _get_default_swagger_path_for_delete_resource_route(route):
+def _get_default_swagger_path_for_delete_resource_route(route, route_registry):
     return_value = {
         "delete":{
             "tags":[route.resource_class.resource_type],
@@ -360,7 +373,7 @@ def _get_default_swagger_path_for_delete_resource_route(route):
             "description":"",
             "operationId": "delete{type}".format(type="_".join((unpluralize(x) for x in route.resource_class.resource_type.split("/")))),
             "produces": ["application/json"],
-            "parameters": _get_parameters(route),
+            "parameters": _get_parameters(route, route_registry),
             "responses":{
                 "200":
                 {
@@ -386,7 +399,7 @@ def _get_default_swagger_path_for_delete_resource_route(route):
 #endregion
 
 
-def _get_parameters(route, operation_name=None):
+def _get_parameters(route, route_registry, operation_name=None):
     parameter_names = re.finditer("<(\w+)>", route.rule)
 
     action = "to get." if operation_name is None else "to apply {operation_name} on".format(operation_name=operation_name)
@@ -402,9 +415,9 @@ def _get_parameters(route, operation_name=None):
     version_parameter = next((p for p in parameters if p["name"]=="rest_helper_version"), None)
     if version_parameter is not None:
         version_parameter["description"] = "Version of the api to use."
-        version_parameter["enum"] = sorted(list(route.versionner().supported_versions.keys()), reverse=True)
+        version_parameter["enum"] = sorted(list(route.versionner.supported_versions.keys()), reverse=True)
 
-    if route.id in binding._input_decorators:
+    if route_registry.has_binders(route.real_view_function):
         swagger_parameter_dict = _get_swagger_part(route.real_view_function, SWAGGER_PARAMETER_KEY) or {}
 
         def merge(x,y):
@@ -413,17 +426,17 @@ def _get_parameters(route, operation_name=None):
             x.update(y)
             return x
 
-        query_decorators = (p for p in binding._input_decorators[route.id] if isinstance(p, binding.from_query_string))
+        query_decorators = route_registry.get_binders(route.real_view_function, binding.from_query_string)
         query_parameters = [
         merge({
             "name":p.query_field,
             "in":"query",
             "required": not p.has_default,
-            "type": _get_parameter_type(p.type),
+            **_get_query_parameter_schema(p.type)
         }, swagger_parameter_dict.get(p.query_field,{})) for p in query_decorators]
         parameters += [x for x in query_parameters if x is not None]
 
-        header_decorators = (p for p in binding._input_decorators[route.id] if isinstance(p, binding.from_header))
+        header_decorators = route_registry.get_binders(route.real_view_function, binding.from_header)
         header_parameters = [
         merge({
             "name":p.header_field,
@@ -434,14 +447,14 @@ def _get_parameters(route, operation_name=None):
 
         parameters += [x for x in header_parameters if x is not None]
 
-        body_parameters = [p for p in binding._input_decorators[route.id] if isinstance(p, binding.from_json_body) or isinstance(p, binding.field_from_json_body)]
+        body_parameters = route_registry.get_binders(route.real_view_function, binding.from_json_body, binding.field_from_json_body)
         if any(body_parameters) and  ("body" not in swagger_parameter_dict or swagger_parameter_dict["body"] is not None):
             body_parameters = [
             merge({
                 "name":"body",
                 "in":"body",
                 "required": any(not p.has_default for p in body_parameters),
-                "schema": {"type": "object"}
+                "schema": _get_body_schema(body_parameters)
                 },
                 swagger_parameter_dict.get("body", {}))
             ]
@@ -484,7 +497,84 @@ def _get_parameters(route, operation_name=None):
     return parameters
 
 
+def _get_query_parameter_schema(p_type):
+    p_type = type_deserializers.get_optional_hint(p_type) or p_type
+    container_hint = type_deserializers.get_container_hint(p_type)
+    if container_hint is None:
+        return {"type": _get_parameter_type(p_type)}
+
+    return {
+        "type": "array",
+        "items": {"type": _get_parameter_type(container_hint[1])},
+        "collectionFormat": "multi",
+        "uniqueItems": container_hint[0] in (set, frozenset)
+    }
+
+def _get_body_schema(body_binders):
+    schema = {"type": "object"}
+    for p in body_binders:
+        if isinstance(p, binding.from_json_body) and type_deserializers.is_model_hint(p.type):
+            schema = _get_json_schema(p.type)
+
+    for p in body_binders:
+        if not isinstance(p, binding.field_from_json_body) or p.type is None:
+            continue
+
+        # the field is described in the objects leading to it, eg: a/b -> {a: {b: field}}
+        parent = schema
+        keys = p.json_field.split("/")
+        for key in keys[:-1]:
+            parent = parent.setdefault("properties", {}).setdefault(key, {"type": "object"})
+        parent.setdefault("properties", {})[keys[-1]] = _get_json_schema(p.type)
+        if not p.has_default:
+            parent.setdefault("required", []).append(keys[-1])
+
+    return schema
+
+def _get_json_schema(p_type, visiting=()):
+    optional_hint = type_deserializers.get_optional_hint(p_type)
+    if optional_hint is not None:
+        return dict(_get_json_schema(optional_hint, visiting), **{"x-nullable": True})
+
+    if type_deserializers.is_model_hint(p_type):
+        if p_type in visiting:
+            return {"type": "object"}
+
+        fields = type_deserializers.get_model_fields(p_type)
+        schema = {
+            "type": "object",
+            "properties": {name: _get_json_schema(hint, visiting + (p_type,)) for name, hint, _ in fields}
+        }
+        required = [name for name, _, is_required in fields if is_required]
+        if required:
+            schema["required"] = required
+        return schema
+
+    container_hint = type_deserializers.get_container_hint(p_type)
+    if container_hint is not None:
+        schema = {"type": "array", "items": _get_json_schema(container_hint[1], visiting)}
+        if container_hint[0] in (set, frozenset):
+            schema["uniqueItems"] = True
+        return schema
+
+    if getattr(p_type, "__origin__", None) in (dict, typing.Dict) and getattr(p_type, "__args__", None):
+        return {"type": "object", "additionalProperties": _get_json_schema(p_type.__args__[1], visiting)}
+
+    if p_type == bool:
+        return {"type": "boolean"}
+    elif p_type == int:
+        return {"type": "integer"}
+    elif p_type in (float, Decimal):
+        return {"type": "number"}
+    elif p_type == str:
+        return {"type": "string"}
+    elif p_type == datetime.datetime:
+        return {"type": "string", "format": "date-time"}
+    else:
+        return {}
+
 def _get_parameter_type(p_type):
+    p_type = type_deserializers.get_optional_hint(p_type) or p_type
     if p_type == bool:
         return "boolean"
     elif p_type == int:
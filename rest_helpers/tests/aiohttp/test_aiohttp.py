@@ -79,4 +79,22 @@ async def test_asyncio_app(counter, aiohttp_client, loop):
     assert response.status == 200
     assert "success" in response_text
 
-#endregion
\ No newline at end of file
+#endregion
+def test_aiohttp_route_registry(loop):
+    from rest_helpers import swagger
+    from rest_helpers.aiohttp import get_app_route_registry
+    from rest_helpers.tests.test_common import TestClass
+
+    app, other_app = web.Application(loop=loop), web.Application(loop=loop)
+
+    # the binder is built without the app: its parameter is still described
+    @routes.get_resource_route(app, TestClass)
+    @binding.from_query_string(field="query")
+    def get_registry_test(test_name, query, page: (int, binding.from_query_string()), h: (int, binding.from_header)=None):
+        pass
+
+    registry = get_app_route_registry(app)
+    assert len(registry.routes) == 1
+    assert get_app_route_registry(other_app).routes == []
+    parameters = swagger.get_swagger_paths(registry)["/tests/{test_name}"]["get"]["parameters"]
+    assert [p["name"] for p in parameters] == ["test_name", "query", "page", "h"]
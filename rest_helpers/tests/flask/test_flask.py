@@ -75,4 +75,46 @@ def test_flask_app(counter):
     assert response.status_code == 200
     assert "success" in response.data.decode()
 
-#endregion
\ No newline at end of file
+#endregion
+
+def test_flask_json_response():
+    import datetime
+    from rest_helpers import json_codec
+    from rest_helpers.flask import FlaskFrameworkAdapter
+
+    app = flask.Flask(__name__)
+    adapter = FlaskFrameworkAdapter()
+    obj = {"b": 1, "a": datetime.datetime(2020, 1, 2)}
+
+    with app.test_request_context():
+        # without a configured codec, flask's jsonify is used: keys sorted, http dates
+        assert adapter.make_json_response(obj).get_json() == flask.jsonify(obj).get_json()
+
+        adapter.json_codec = json_codec.get_json_codec("json")
+        response = adapter.make_json_response(obj, 201)
+        assert response.status_code == 201
+        assert response.mimetype == "application/json"
+        assert response.get_json() == {"b": 1, "a": "2020-01-02T00:00:00"}
+
+def test_flask_route_registry():
+    from rest_helpers import swagger
+    from rest_helpers.flask import get_app_route_registry
+    from rest_helpers.tests.test_common import TestClass
+
+    blueprint = Blueprint('test_registry_bp', 'test_registry_bp')
+
+    # the binder is built without the blueprint: its parameter is still described
+    @routes.get_resource_route(blueprint, TestClass)
+    @binding.from_query_string(field="query")
+    def get_registry_test(test_name, query, page: (int, binding.from_query_string()), h: (int, binding.from_header)=None):
+        pass
+
+    app = flask.Flask(__name__)
+    assert get_app_route_registry(app).routes == []
+    app.register_blueprint(blueprint)
+
+    registry = get_app_route_registry(app)
+    assert registry.routes == get_app_route_registry(blueprint).routes
+    assert len(registry.routes) == 1
+    parameters = swagger.get_swagger_paths(registry)["/tests/{test_name}"]["get"]["parameters"]
+    assert [p["name"] for p in parameters] == ["test_name", "query", "page", "h"]
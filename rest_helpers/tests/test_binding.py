@@ -1,10 +1,17 @@
 import sys
+import gzip
+import zlib
+import time
+import typing
 import pytest
+import threading
 import asyncio
+import functools
 import httpretty
 
-from mock import patch, Mock, MagicMock
-from rest_helpers import binding, validators, framework_adapter, rest_exceptions
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch, Mock, MagicMock, ANY
+from rest_helpers import binding, validators, framework_adapter, rest_exceptions, rest_helper_context, oauth
 from rest_helpers.tests import test_common
 
 @pytest.fixture
@@ -13,6 +20,11 @@ def test_adapter(request):
     adapter.is_in_test = lambda:False
     adapter.get_rest_helper_request_context = lambda:None
     adapter.make_json_response = lambda  obj,status=200, headers=None: (obj, status, headers)
+
+    # the tests set the body as text
+    async def get_current_request_body_bytes():
+        return (await adapter.get_current_request_body()).encode()
+    adapter.get_current_request_body_bytes = get_current_request_body_bytes
     return adapter
 
 @pytest.mark.asyncio
@@ -259,6 +271,18 @@ async def test_base_binder_default_deserializer(test_adapter, make_coro):
         await inner_func()
         get_default_deserializer._mock_call_args[0][0] == bool
 
+@pytest.mark.base_binder
+def test_base_binder_resolved_at_decoration(test_adapter):
+    binding_decorator = binding.base_binder(test_adapter, field="abc")
+
+    @binding_decorator
+    def inner_func(abc:int): #pragma: no cover
+        return "success"
+
+    from rest_helpers import type_deserializers
+    assert binding_decorator.deserializer == type_deserializers.int_deserializer
+    assert binding_decorator.validator is None
+
 @pytest.mark.asyncio
 @pytest.mark.base_binder
 async def test_base_binder_stacking(test_adapter, counter):
@@ -282,6 +306,122 @@ async def test_base_binder_stacking(test_adapter, counter):
 
     assert binding_decorator_abc.real_view_function.__name__ == "inner_func"
     assert binding_decorator_cde.real_view_function.__name__ == "inner_func"
+
+@pytest.mark.asyncio
+@pytest.mark.base_binder
+async def test_base_binder_stacking_single_binding_plan(test_adapter, counter):
+    binding_decorator_abc = binding.base_binder(test_adapter, field="abc")
+    binding_decorator_abc.get_value = asyncio.coroutine(lambda:"valueABC")
+
+    binding_decorator_cde = binding.base_binder(test_adapter, field="cde")
+    binding_decorator_cde.get_value = asyncio.coroutine(lambda:"3")
+
+    @binding.bind_hints(test_adapter)
+    @binding_decorator_abc
+    def inner_func(abc, cde:(int, binding_decorator_cde), efg="valueEFG"):
+        counter["inner_func"] += 1
+        return abc, cde, efg
+
+    plan = binding._get_binding_plan(inner_func)
+    assert plan.binders == [binding_decorator_cde, binding_decorator_abc]
+    assert plan.view_function.__code__.co_name == "inner_func"
+
+    assert await inner_func() == ("valueABC", 3, "valueEFG")
+    assert counter["inner_func"] == 1
+    assert test_adapter.set_request_args.call_count == 1
+    assert test_adapter.set_request_kwargs.call_count == 1
+
+@pytest.mark.asyncio
+@pytest.mark.base_binder
+async def test_base_binder_io_bound_binders_are_concurrent(test_adapter, counter):
+    abc_started = asyncio.Event()
+    cde_started = asyncio.Event()
+
+    async def get_abc():
+        abc_started.set()
+        await cde_started.wait()
+        return "valueABC"
+
+    async def get_cde():
+        cde_started.set()
+        await abc_started.wait()
+        return "valueCDE"
+
+    binding_decorator_abc = binding.base_binder(test_adapter, field="abc")
+    binding_decorator_abc.is_io_bound = True
+    binding_decorator_abc.get_value = get_abc
+
+    binding_decorator_cde = binding.base_binder(test_adapter, field="cde")
+    binding_decorator_cde.is_io_bound = True
+    binding_decorator_cde.get_value = get_cde
+
+    @binding_decorator_abc
+    @binding_decorator_cde
+    def inner_func(abc, cde):
+        return abc, cde
+
+    # Each value waits for the other one to be started: awaiting them in sequence would never end.
+    assert await asyncio.wait_for(inner_func(), 1) == ("valueABC", "valueCDE")
+
+@pytest.mark.asyncio
+@pytest.mark.base_binder
+async def test_base_binder_io_bound_binders_fail_fast(test_adapter, counter):
+    async def get_abc():
+        raise rest_exceptions.UnauthorizedException("not authorized")
+
+    async def get_cde():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            counter["cancelled"] += 1
+            raise
+
+    binding_decorator_abc = binding.base_binder(test_adapter, field="abc")
+    binding_decorator_abc.is_io_bound = True
+    binding_decorator_abc.get_value = get_abc
+
+    binding_decorator_cde = binding.base_binder(test_adapter, field="cde")
+    binding_decorator_cde.is_io_bound = True
+    binding_decorator_cde.get_value = get_cde
+
+    @binding_decorator_abc
+    @binding_decorator_cde
+    def inner_func(abc, cde): #pragma: no cover
+        counter["inner_func"] += 1
+
+    with pytest.raises(rest_exceptions.UnauthorizedException):
+        await asyncio.wait_for(inner_func(), 1)
+
+    await asyncio.sleep(0)
+    assert counter["cancelled"] == 1
+    assert counter["inner_func"] == 0
+
+@pytest.mark.asyncio
+@pytest.mark.base_binder
+async def test_base_binder_stacking_with_other_decorator(test_adapter, counter):
+    binding_decorator_abc = binding.base_binder(test_adapter, field="abc")
+    binding_decorator_abc.get_value = asyncio.coroutine(lambda:"valueABC")
+
+    binding_decorator_cde = binding.base_binder(test_adapter, field="cde")
+    binding_decorator_cde.get_value = asyncio.coroutine(lambda:"valueCDE")
+
+    def other_decorator(f):
+        @functools.wraps(f)
+        async def inner(*args, **kwargs):
+            counter["other_decorator"] += 1
+            return await f(*args, **kwargs)
+        return inner
+
+    @binding_decorator_abc
+    @other_decorator
+    @binding_decorator_cde
+    def inner_func(abc, cde):
+        return abc, cde
+
+    # The plain decorator is not part of any plan: it must still be called.
+    assert binding._get_binding_plan(inner_func).binders == [binding_decorator_abc]
+    assert await inner_func() == ("valueABC", "valueCDE")
+    assert counter["other_decorator"] == 1
 #endregion
 
 #region from_json_body
@@ -299,6 +439,29 @@ async def test_from_json_body_with_default_values(counter, test_adapter):
     assert response == "success"
 
 
+@pytest.mark.asyncio
+async def test_from_json_body_with_model(test_adapter):
+    dataclasses = pytest.importorskip("dataclasses")
+
+    @dataclasses.dataclass
+    class Book(object):
+        title: str
+        tags: typing.List[str]
+        pages: int = 0
+
+    @binding.from_json_body(test_adapter)
+    def inner_func(data: Book):
+        return data
+
+    test_adapter.get_current_request_body = asyncio.coroutine(lambda:'{"title":"a", "tags":["b"]}')
+    assert await inner_func() == Book("a", ["b"])
+
+    test_adapter.get_current_request_body = asyncio.coroutine(lambda:'{"tags":["b", 1], "pages":"2"}')
+    with pytest.raises(rest_exceptions.InvalidDataException) as ex:
+        await inner_func()
+    assert str(ex.value).endswith("3 invalid value(s): title: this field is required; tags[1]: expected a string, got 1; pages: expected an integer, got '2'")
+
+
 @pytest.mark.asyncio
 async def test_from_json_body_with_validator_missing_data(counter, test_adapter):
     test_adapter.get_current_request_body = asyncio.coroutine(lambda:'')
@@ -339,7 +502,7 @@ async def test_from_json_body_with_versionner(test_adapter, version, expected):
         class value3:
             pass
 
-    rh_context = MagicMock()
+    rh_context = rest_helper_context.RestHelperContext()
     test_adapter.get_rest_helper_request_context = lambda :rh_context
     rh_context.versionner = TestVersionner()
 
@@ -352,6 +515,104 @@ async def test_from_json_body_with_versionner(test_adapter, version, expected):
     response = await inner_func()
     assert response == expected
 
+@pytest.mark.asyncio
+async def test_json_body_parsed_once_per_request(counter, test_adapter):
+    async def get_current_request_body():
+        counter["get_current_request_body"] += 1
+        return '{"field1":"value1", "field2":{"field3":"value3"}}'
+
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_current_request_body = get_current_request_body
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+
+    @binding.from_json_body(test_adapter)
+    @binding.field_from_json_body(test_adapter, field="field1")
+    @binding.field_from_json_body(test_adapter, field="field2/field3")
+    def inner_func(data, field1, field3):
+        return data, field1, field3
+
+    response = await inner_func()
+    assert response == ({"field1":"value1", "field2":{"field3":"value3"}}, "value1", "value3")
+    assert counter["get_current_request_body"] == 1
+
+    # A new request comes with a new context, so the body is read again.
+    rh_context = rest_helper_context.RestHelperContext()
+    await inner_func()
+    assert counter["get_current_request_body"] == 2
+
+
+@pytest.mark.asyncio
+async def test_json_body_parse_survives_cancelled_binder():
+    event = asyncio.Event()
+    class SlowAdapter(framework_adapter.BaseFrameworkAdapter):
+        def __init__(self):
+            self.context = rest_helper_context.RestHelperContext()
+
+        def get_rest_helper_request_context(self):
+            return self.context
+
+        def get_current_request_headers_dict(self):
+            return {}
+
+        async def read_current_request_body_bytes(self):
+            await event.wait()
+            return b'{"a":1}'
+
+    adapter = SlowAdapter()
+    cancelled = asyncio.ensure_future(binding._get_dict_from_json_body(adapter))
+    waiting = asyncio.ensure_future(binding._get_dict_from_json_body(adapter))
+    await asyncio.sleep(0)
+
+    # eg: a binder cancelled because an other binder of the view failed
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    event.set()
+    assert await waiting == {"a":1}
+    assert cancelled.cancelled()
+
+@pytest.mark.asyncio
+async def test_json_body_bytes_read_once(counter):
+    class BytesAdapter(framework_adapter.BaseFrameworkAdapter):
+        def __init__(self):
+            self.context = rest_helper_context.RestHelperContext()
+
+        def get_rest_helper_request_context(self):
+            return self.context
+
+        async def get_current_request_body(self): #pragma: no cover
+            raise Exception("the body should not be read as text")
+
+        def get_current_request_headers_dict(self):
+            return {}
+
+        async def read_current_request_body_bytes(self):
+            counter["read"] += 1
+            return '{"field1":"é"}'.encode()
+
+    adapter = BytesAdapter()
+
+    @binding.from_json_body(adapter)
+    @binding.field_from_json_body(adapter, field="field1")
+    def inner_func(data, field1):
+        return field1
+
+    assert await inner_func() == "é"
+    assert await adapter.get_current_request_body_bytes() == adapter.context.body_bytes
+    assert [c async for c in adapter.get_current_request_body_chunks()] == [adapter.context.body_bytes]
+    assert counter["read"] == 1
+
+    # only the versions with a body hook get the body as text
+    from rest_helpers.versioning import UrlRootVersionner
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            def body(self, body):
+                assert isinstance(body, str)
+                return body.replace("é", "e")
+
+    adapter.context = rest_helper_context.RestHelperContext()
+    adapter.context.versionner = TestVersionner()
+    assert await inner_func() == "e"
+    assert counter["read"] == 2
 
 #endregion
 
@@ -399,6 +660,302 @@ async def test_field_from_json_body_invalid_body(counter, test_adapter, data, ex
     assert counter["inner_func"] == 0
     assert expected in str(excep)
 
+def _body_chunks(counter, data, chunk_size):
+    async def get_current_request_body_chunks():
+        for i in range(0, len(data), chunk_size):
+            counter["chunks"] += 1
+            yield data[i:i + chunk_size].encode()
+    return get_current_request_body_chunks
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+async def test_field_from_json_body_stream(counter, test_adapter, chunk_size):
+    data = '{"data": {"id": "a\\"b", "attributes": {"x": [1, {"y": "}"}]}}, "meta": {"k": true}, "items": [' + ",".join(["1"] * 1000) + ']}'
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    test_adapter.get_current_request_body_chunks = _body_chunks(counter, data, chunk_size)
+
+    @binding.field_from_json_body(test_adapter, field="data/id", stream=True)
+    @binding.field_from_json_body(test_adapter, field="x", json_field="data/attributes/x", stream=True)
+    @binding.field_from_json_body(test_adapter, field="meta/k", stream=True)
+    @binding.field_from_json_body(test_adapter, field="missing", stream=True)
+    def inner_func(id, x, k, missing="default"):
+        return id, x, k, missing
+
+    assert await inner_func() == ('a"b', [1, {"y": "}"}], True, "default")
+    # the body is read once, in chunks, and never as a whole
+    assert counter["chunks"] == -(-len(data) // chunk_size)
+    assert not test_adapter.get_current_request_body.called
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+async def test_field_from_json_body_stream_stops_reading(counter, test_adapter):
+    data = '{"a": 1, "b": [' + ",".join(["1"] * 1000) + ']}'
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    test_adapter.get_current_request_body_chunks = _body_chunks(counter, data, 10)
+
+    @binding.field_from_json_body(test_adapter, field="a", stream=True)
+    def inner_func(a):
+        return a
+
+    assert await inner_func() == 1
+    assert counter["chunks"] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+@pytest.mark.parametrize("data", ['{"field_b":"b', '{"field_b":1 "field_a":2}', '{"field_b":, "field_a":2}'])
+async def test_field_from_json_body_stream_invalid_body(counter, test_adapter, data):
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    test_adapter.get_current_request_body_chunks = _body_chunks(counter, data, 3)
+
+    @binding.field_from_json_body(test_adapter, "field_a", stream=True)
+    def inner_func(field_a): #pragma: no cover
+        return field_a
+
+    with pytest.raises(rest_exceptions.InvalidDataException) as ex:
+        await inner_func()
+    assert "request data is not valid JSON" in str(ex.value)
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+async def test_field_from_json_body_stream_fallback(counter, test_adapter):
+    data = '{"field1":"value1", "field2":"value2"}'
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    test_adapter.get_current_request_body = asyncio.coroutine(lambda:data)
+    test_adapter.get_current_request_body_chunks = _body_chunks(counter, data, 3)
+
+    # an other binder needs the whole body
+    @binding.from_json_body(test_adapter)
+    @binding.field_from_json_body(test_adapter, field="field1", stream=True)
+    def inner_func(data, field1):
+        return field1
+
+    assert await inner_func() == "value1"
+    assert counter["chunks"] == 0
+
+    # the requested version modifies the body
+    from rest_helpers.versioning import UrlRootVersionner
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            def body_dict(self, body):
+                body["field1"] = "versionned"
+                return body
+        class v2:
+            pass
+
+    @binding.field_from_json_body(test_adapter, field="field1", stream=True)
+    def inner_func_2(field1):
+        return field1
+
+    rh_context = rest_helper_context.RestHelperContext()
+    rh_context.versionner = TestVersionner()
+    rh_context.versionner.requested_version = "v1"
+    assert await inner_func_2() == "versionned"
+    assert counter["chunks"] == 0
+
+    rh_context = rest_helper_context.RestHelperContext()
+    rh_context.versionner = TestVersionner()
+    rh_context.versionner.requested_version = "v2"
+    assert await inner_func_2() == "value1"
+    assert counter["chunks"] > 0
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+async def test_field_from_json_body_stream_parsed_body(counter, test_adapter):
+    data = '{"field1":"value1", "field2":"value2"}'
+    rh_context = rest_helper_context.RestHelperContext()
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    test_adapter.get_current_request_body = asyncio.coroutine(lambda:data)
+    test_adapter.get_current_request_body_chunks = _body_chunks(counter, data, 3)
+
+    @binding.field_from_json_body(test_adapter, field="field1", stream=True)
+    def inner_func(field1):
+        return field1
+
+    # eg: the request validation parsed the body
+    await binding._get_dict_from_json_body(test_adapter)
+    assert await inner_func() == "value1"
+    assert counter["chunks"] == 0
+
+@pytest.mark.asyncio
+@pytest.mark.field_from_json_body
+async def test_field_from_json_body_stream_cancelled(counter, test_adapter):
+    data = '{"field1":"value1", "field2":"value2"}'
+    rh_context = rest_helper_context.RestHelperContext()
+    rh_context.streamed_json_paths = frozenset(["field1"])
+    test_adapter.get_rest_helper_request_context = lambda :rh_context
+    read = asyncio.Event()
+    async def get_current_request_body_chunks():
+        await read.wait()
+        yield data.encode()
+    test_adapter.get_current_request_body_chunks = get_current_request_body_chunks
+
+    # a binder cancelled does not cancel the parsing shared with the others
+    cancelled = asyncio.ensure_future(binding._get_field_from_json_body(test_adapter, "field1", stream=True))
+    other = asyncio.ensure_future(binding._get_field_from_json_body(test_adapter, "field1", stream=True))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    read.set()
+    assert await other == "value1"
+    assert cancelled.cancelled()
+
+#endregion
+
+#region from_body_stream
+def _compress(data, encoding):
+    if encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.compress(data)
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS if encoding == "deflate" else -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+class StreamAdapter(framework_adapter.BaseFrameworkAdapter):
+    decompress_request_bodies = True
+
+    def __init__(self, counter, headers, body, size):
+        self.counter = counter
+        self.context = rest_helper_context.RestHelperContext()
+        self.headers = headers
+        self.body = body
+        self.size = size
+
+    def get_rest_helper_request_context(self):
+        return self.context
+
+    def get_current_request_headers_dict(self):
+        return self.headers
+
+    async def read_current_request_body_bytes(self):
+        self.counter["read"] += 1
+        return self.body
+
+    async def read_current_request_body_chunks(self, chunk_size=65536):
+        for i in range(0, len(self.body), self.size):
+            self.counter["chunks"] += 1
+            yield self.body[i:i + self.size]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["identity", "gzip", "deflate", "raw deflate"])
+async def test_from_body_stream(counter, encoding):
+    data = bytes(range(256)) * 1000
+    headers = {} if encoding == "identity" else {"Content-Encoding": encoding.split(" ")[-1]}
+    adapter = StreamAdapter(counter, headers, _compress(data, encoding), 1000)
+
+    @binding.from_body_stream(adapter, max_size=len(data), chunk_size=4096)
+    async def inner_func(body):
+        return [chunk async for chunk in body]
+
+    chunks = await inner_func()
+    assert b"".join(chunks) == data
+    assert max(len(c) for c in chunks) <= (1000 if encoding == "identity" else 4096)
+    assert counter["read"] == 0
+
+    # the body is given as received
+    @binding.from_body_stream(adapter, decompress=False)
+    async def inner_func_2(body):
+        return [chunk async for chunk in body]
+
+    adapter.context = rest_helper_context.RestHelperContext()
+    assert b"".join(await inner_func_2()) == adapter.body
+
+@pytest.mark.asyncio
+async def test_from_body_stream_max_size(counter):
+    data = b"0" * 100000
+    headers = {"Content-Encoding": "gzip"}
+    adapter = StreamAdapter(counter, headers, _compress(data, "gzip"), 100)
+
+    @binding.from_body_stream(adapter, max_size=50000)
+    async def inner_func(body):
+        async for chunk in body:
+            counter["received"] += len(chunk)
+
+    # the size is checked while the body is decompressed
+    with pytest.raises(rest_exceptions.PayloadTooLargeException):
+        await inner_func()
+    assert counter["received"] <= 50000
+
+    # the content length is checked before the function is called
+    headers.clear()
+    headers["Content-Length"] = "50001"
+    adapter.context = rest_helper_context.RestHelperContext()
+    with pytest.raises(rest_exceptions.PayloadTooLargeException) as ex:
+        await inner_func()
+    assert str(ex.value) == "The body of the request exceeds the maximum size of 50000 bytes."
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers, body, expected", [
+    ({"Content-Encoding": "br"}, b"", "The content encoding br of the request body is not supported."),
+    ({"Content-Encoding": "gzip"}, b"not gzip", "The body of the request is not valid gzip data"),
+    ({"Content-Encoding": "gzip"}, gzip.compress(b"abc")[:-5], "The body of the request is not valid gzip data: it is truncated."),
+])
+async def test_from_body_stream_invalid(counter, headers, body, expected):
+    adapter = StreamAdapter(counter, headers, body, 100)
+
+    @binding.from_body_stream(adapter)
+    async def inner_func(body):
+        return [chunk async for chunk in body]
+
+    with pytest.raises(rest_exceptions.InvalidDataException) as ex:
+        await inner_func()
+    assert str(ex.value).startswith(expected)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_body_not_decompressed_by_default(counter, encoding):
+    body = _compress(b'{"field1":"value1"}', "gzip")
+    adapter = StreamAdapter(counter, {"Content-Encoding": encoding}, body, 100)
+    adapter.decompress_request_bodies = False
+    adapter.context.max_decompressed_body_size = len(body)
+
+    # the body is given as received, whatever its encoding, and the limits apply to it
+    @binding.from_body_stream(adapter)
+    async def inner_func(body):
+        return b"".join([chunk async for chunk in body])
+
+    assert await inner_func() == body
+
+    adapter.context = rest_helper_context.RestHelperContext()
+    adapter.context.max_decompressed_body_size = len(body) - 1
+    with pytest.raises(rest_exceptions.PayloadTooLargeException):
+        await inner_func()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("decompresses_request_body", [False, True])
+async def test_json_body_decompression_and_limits(counter, decompresses_request_body):
+    data = b'{"field1":"' + b"a" * 10000 + b'"}'
+    adapter = StreamAdapter(counter, {"Content-Encoding": "gzip"}, _compress(data, "gzip"), 100)
+    adapter.decompresses_request_body = decompresses_request_body
+    if decompresses_request_body:
+        adapter.body = data
+
+    @binding.from_json_body(adapter)
+    def inner_func(data):
+        return data
+
+    assert await inner_func() == {"field1": "a" * 10000}
+    assert counter["read"] == (1 if decompresses_request_body else 0)
+
+    # the decompressed body is limited while it is read
+    adapter.context = rest_helper_context.RestHelperContext()
+    adapter.context.max_decompressed_body_size = 5000
+    with pytest.raises(rest_exceptions.PayloadTooLargeException):
+        await inner_func()
+    assert adapter.context.body_bytes is None
+
+    # the body as received is limited by its content length, before it is read
+    counter.clear()
+    adapter.headers["Content-Length"] = str(len(adapter.body))
+    adapter.context = rest_helper_context.RestHelperContext()
+    adapter.context.max_body_size = len(adapter.body) - 1
+    with pytest.raises(rest_exceptions.PayloadTooLargeException):
+        await inner_func()
+    assert counter["chunks"] == counter["read"] == 0
+
 #endregion
 
 #region field_from_query_string
@@ -451,6 +1008,25 @@ async def test_field_from_query_string_with_missing_field(counter, test_adapter)
     assert counter["inner_func"]==0
     assert "The field fieldX is not present in the query string." in str(excep)
 
+@pytest.mark.asyncio
+@pytest.mark.field_from_query_string
+async def test_field_from_query_string_with_typed_list(test_adapter):
+    @binding.bind_hints(test_adapter)
+    def inner_func(
+        ids: (typing.List[int], binding.from_query_string(test_adapter, as_list=True)),
+        tags: (typing.Set[str], binding.from_query_string(test_adapter)),
+        page: (typing.Optional[int], binding.from_query_string(test_adapter))=None):
+        return ids, tags, page
+
+    test_adapter.get_current_request_query_string_args = lambda:{"ids":["1", "2", "3"], "tags":["a"]}
+    assert await inner_func() == ([1, 2, 3], {"a"}, None)
+
+    test_adapter.get_current_request_query_string_args = lambda:{"ids":["1", "x", "3", "y"], "tags":["a", "b"]}
+    with pytest.raises(rest_exceptions.InvalidDataException) as ex:
+        await inner_func()
+    assert "The value of the field ids is not valid: 2 invalid element(s): [1] 'x'" in str(ex.value)
+    assert "[3] 'y'" in str(ex.value)
+
 @pytest.mark.asyncio
 async def test_from_query_string_with_versionner(test_adapter):
     test_adapter.get_current_request_query_string_args = lambda:{"field1":["value1"], "field2":["value2"]}
@@ -465,18 +1041,27 @@ async def test_from_query_string_with_versionner(test_adapter):
         class v2:
             pass
 
-    rh_context = MagicMock()
+    rh_context = rest_helper_context.RestHelperContext()
     test_adapter.get_rest_helper_request_context = lambda :rh_context
     rh_context.versionner = TestVersionner()
 
     @binding.from_query_string(test_adapter, field="a")
-    def inner_func(a):
+    @binding.from_query_string(test_adapter, field="field1")
+    def inner_func(a, field1):
         return a
 
     rh_context.versionner.requested_version = "v1"
+    query_string_args = MagicMock(return_value={"field1":["value1"], "field2":["value2"]})
+    test_adapter.get_current_request_query_string_args = query_string_args
     response = await inner_func()
     assert response == "b"
 
+    # the query string is parsed and versionned once per request
+    assert query_string_args.call_count == 1
+    assert rh_context.query_string_args == {"field1": ("value1",), "field2": ("value2",), "a": ("b",)}
+    with pytest.raises(TypeError):
+        rh_context.query_string_args["a"] = "c"
+
 #endregion
 
 #region field_from_header
@@ -516,6 +1101,20 @@ async def test_field_from_header_with_missing_field(counter, test_adapter):
     assert counter["inner_func"]==0
     assert "The field fieldX is not present in the requests headers." in str(excep)
 
+def test_headers_names():
+    from rest_helpers.common.headers import Headers
+
+    # a header sent with "_" does not shadow the header with "-" (eg: set by a proxy)
+    headers = Headers({"X_Forwarded_User": "client", "X-Forwarded-User": "proxy", "header_field": "a"})
+    assert headers["X-Forwarded-User"] == "proxy"
+    assert headers["x_forwarded_user"] == "proxy"
+    assert len(headers) == 3
+
+    # the names looked up with "_" match the headers with "-", or named as is
+    assert headers["HEADER_FIELD"] == "a"
+    assert Headers({"Header-Field": "b"})["header_field"] == "b"
+    assert "header-field" not in headers
+
 @pytest.mark.asyncio
 async def test_from_header_with_versionner(test_adapter):
     test_adapter.get_current_request_headers_dict = lambda:{"field1":["value1"], "field2":["value2"]}
@@ -530,17 +1129,33 @@ async def test_from_header_with_versionner(test_adapter):
         class v2:
             pass
 
-    rh_context = MagicMock()
+    rh_context = rest_helper_context.RestHelperContext()
     test_adapter.get_rest_helper_request_context = lambda :rh_context
     rh_context.versionner = TestVersionner()
 
     @binding.from_header(test_adapter, field="a")
-    def inner_func(a):
-        return a
+    @binding.from_header(test_adapter, field="field1", header_field="FIELD1")
+    def inner_func(a, field1):
+        return a, field1
 
     rh_context.versionner.requested_version = "v1"
+    headers_dict = MagicMock(return_value={"field1":"value1", "field2":"value2"})
+    test_adapter.get_current_request_headers_dict = headers_dict
     response = await inner_func()
-    assert response == "b"
+    assert response == ("b", "value1")
+
+    # the headers are copied and versionned once per request
+    assert headers_dict.call_count == 1
+    assert rh_context.headers.get("A") == "b"
+
+    # the versions without headers hook are not called
+    rh_context = rest_helper_context.RestHelperContext()
+    rh_context.versionner = MagicMock(wraps=TestVersionner())
+    rh_context.versionner.requested_version = "v2"
+    rh_context.versionner.has_hook = lambda name: False
+    with pytest.raises(binding.MissingFieldException):
+        await inner_func()
+    assert not rh_context.versionner.headers.called
 #endregion
 
 
@@ -558,7 +1173,7 @@ async def test_from_header_with_versionner(test_adapter):
 async def test_oauth_with_invalid_token(counter, test_adapter, get_unverified_header, get_unverified_claims, allowed_domains, expected_exception, decode_side_effect):
     test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"ABC"}
 
-    @binding.from_Oauth(test_adapter, field="field1", allowed_domains=allowed_domains, validate_options={"a":1, "b":2}, client_id="TheClientId")
+    @binding.from_Oauth(test_adapter, field="field1", allowed_domains=allowed_domains, validate_options={"a":1, "b":2}, client_id="TheClientId", key_store=oauth.JwksKeyStore())
     def inner_func(field1):
         counter["inner_func"] += 1
         assert field1 == {"A":1, "B":{"C":2}}
@@ -601,8 +1216,8 @@ async def test_oauth_with_invalid_token(counter, test_adapter, get_unverified_he
 async def test_oauth_cache(counter, test_adapter):
     test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"ABC"}
 
-    decorator = binding.from_Oauth(test_adapter, field="field1", allowed_domains=["A.com","B.C.org"], validate_options={"a":1, "b":2}, client_id="TheClientId")
-    decorator._public_keys = {"abc1": "abc"}
+    decorator = binding.from_Oauth(test_adapter, field="field1", allowed_domains=["A.com","B.C.org"], validate_options={"a":1, "b":2}, client_id="TheClientId", key_store=oauth.JwksKeyStore())
+    decorator.key_store.set_keys("http://A.com/my/endpoint", {"abc1": "abc"})
 
     @decorator
     def inner_func(field1):
@@ -612,13 +1227,174 @@ async def test_oauth_cache(counter, test_adapter):
 
     with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
         m_get_unverified_header.return_value = {"kid":"abc_1"}
-        with patch("jose.jwt.decode") as m_decode:
-            m_decode.return_value = {"A":1, "B":{"C":2}}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/my/endpoint"}
+            with patch("jose.jwt.decode") as m_decode:
+                m_decode.return_value = {"A":1, "B":{"C":2}}
+
+                response = await inner_func()
+
+                assert response ==  "success"
+                assert counter["inner_func"] == 1
+                assert m_decode.call_args[1]["key"] == "abc"
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_token_cache(counter, test_adapter):
+    test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"Bearer ABC"}
+
+    def deserializer(decoded):
+        counter["deserializer"] += 1
+        return decoded["sub"]
+
+    decorator = binding.from_Oauth(test_adapter, field="field1", deserializer=deserializer, key_store=oauth.JwksKeyStore())
+    decorator.key_store.set_keys("http://A.com/my/endpoint", {"abc1": "abc"})
+
+    @decorator
+    def inner_func(field1):
+        return field1
+
+    with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
+        m_get_unverified_header.return_value = {"kid":"abc_1"}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/my/endpoint"}
+            with patch("jose.jwt.decode") as m_decode:
+                m_decode.return_value = {"sub":"me", "exp": time.time() + 3600}
+
+                assert await inner_func() == "me"
+                assert await inner_func() == "me"
+
+                assert m_decode.call_count == 1
+                assert counter["deserializer"] == 1
+                assert decorator.token_cache.hits == 1
+                assert decorator.token_cache.misses == 1
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_token_cache_copies(test_adapter):
+    test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"Bearer ABC"}
+
+    decorator = binding.from_Oauth(test_adapter, field="field1", deserializer=lambda decoded:{"groups": list(decoded["groups"])}, key_store=oauth.JwksKeyStore())
+    decorator.key_store.set_keys("http://A.com/my/endpoint", {"abc1": "abc"})
+
+    # the view modifies its argument
+    @decorator
+    def inner_func(field1):
+        field1["groups"].append("admin")
+        return field1
+
+    with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
+        m_get_unverified_header.return_value = {"kid":"abc_1"}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/my/endpoint"}
+            with patch("jose.jwt.decode") as m_decode:
+                m_decode.return_value = {"sub":"me", "groups": ["users"], "exp": time.time() + 3600}
+
+                assert await inner_func() == {"groups": ["users", "admin"]}
+                assert await inner_func() == {"groups": ["users", "admin"]}
+                assert await inner_func() == {"groups": ["users", "admin"]}
+                assert decorator.token_cache.hits == 2
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_shared_token_cache(counter, test_adapter):
+    test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"Bearer ABC"}
+    token_cache = oauth.TokenCache()
+    key_store = oauth.JwksKeyStore()
+    key_store.set_keys("http://A.com/my/endpoint", {"abc1": "abc"})
+
+    @binding.from_Oauth(test_adapter, field="field1", audience="a", token_cache=token_cache, key_store=key_store)
+    def inner_func_a(field1):
+        return field1["sub"]
+
+    @binding.from_Oauth(test_adapter, field="field1", audience="b", token_cache=token_cache, key_store=key_store)
+    def inner_func_b(field1):
+        return field1["sub"]
+
+    with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
+        m_get_unverified_header.return_value = {"kid":"abc_1"}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/my/endpoint"}
+            with patch("jose.jwt.decode") as m_decode:
+                m_decode.return_value = {"sub":"me", "exp": time.time() + 3600}
+                assert await inner_func_a() == "me"
+                assert await inner_func_a() == "me"
+                assert m_decode.call_count == 1
+
+                # the token verified against the audience a is verified again against the audience b
+                m_decode.side_effect = Exception("invalid audience")
+                with pytest.raises(rest_exceptions.ForbiddenException):
+                    await inner_func_b()
+                assert m_decode.call_args[1]["audience"] == "b"
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_static_keys(test_adapter):
+    async def keys_fetcher(issuer):
+        return {}
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher)
+    key_store.set_keys("http://B.com", {"abc1": "abc"})
+
+    with_static_keys = binding.from_Oauth(test_adapter, key_store=key_store, static_keys={"http://A.com": {"keys": [{"kid": "st-1"}]}})
+    without_static_keys = binding.from_Oauth(test_adapter, key_store=key_store)
+
+    # the static keys are only used by the binding they are given to
+    assert await with_static_keys.key_store.get_key("http://A.com", "st1") == {"kid": "st-1"}
+    assert await with_static_keys.key_store.get_key("http://B.com", "abc1") == "abc"
+    assert await without_static_keys.key_store.get_key("http://A.com", "st1") is None
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_unreachable_issuer(test_adapter):
+    async def keys_fetcher(issuer):
+        raise Exception("not found")
+
+    test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"Bearer ABC"}
+    decorator = binding.from_Oauth(test_adapter, field="field1", key_store=oauth.JwksKeyStore(keys_fetcher=keys_fetcher))
+
+    @decorator
+    def inner_func(field1):
+        return field1
+
+    # the keys of the issuer can not be fetched: the token is not authorized
+    with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
+        m_get_unverified_header.return_value = {"kid":"abc_1"}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/bogus"}
+            with pytest.raises(rest_exceptions.UnauthorizedException):
+                await inner_func()
+
+@pytest.mark.asyncio
+@pytest.mark.oauth
+async def test_oauth_executor(counter, test_adapter):
+    test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"Bearer ABC"}
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    decorator = binding.from_Oauth(test_adapter, field="field1", key_store=oauth.JwksKeyStore(), executor=executor)
+    decorator.key_store.set_keys("http://A.com/my/endpoint", {"abc1": "abc"})
+
+    @decorator
+    def inner_func(field1):
+        return field1
+
+    def decode(*args, **kwargs):
+        counter[threading.current_thread().name] += 1
+        return {"sub":"me", "exp": time.time() + 3600}
+
+    with patch("jose.jws.get_unverified_header") as m_get_unverified_header:
+        m_get_unverified_header.return_value = {"kid":"abc_1"}
+        with patch("jose.jwt.get_unverified_claims") as m_get_unverified_claims:
+            m_get_unverified_claims.return_value = {"iss": "http://A.com/my/endpoint"}
+            with patch("jose.jwt.decode") as m_decode:
+                m_decode.side_effect = decode
 
-            response = await inner_func()
+                assert await inner_func() == {"sub":"me", "exp": ANY}
+                assert await inner_func() == {"sub":"me", "exp": ANY}
 
-            assert response ==  "success"
-            assert counter["inner_func"] == 1
+    # The signature was verified once, away from the event loop thread.
+    assert m_decode.call_count == 1
+    assert counter[threading.current_thread().name] == 0
+    executor.shutdown()
 
 @pytest.mark.asyncio
 @pytest.mark.Oauth
@@ -626,7 +1402,6 @@ async def test_Oauth_hardcoded_valid_tokens(counter, test_adapter):
     test_adapter.get_current_request_headers_dict = lambda:{"Authorization":"ABC"}
 
     decorator = binding.from_Oauth(test_adapter, field="field1", valid_tokens={"ABC":{"A":1, "B":{"C":2}}})
-    decorator._public_keys = {"abc1": "abc"}
 
     @decorator
     def inner_func(field1):
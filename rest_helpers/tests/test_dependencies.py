@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+
+from mock import MagicMock
+from rest_helpers import binding, dependencies, framework_adapter, rest_helper_context, routes
+
+class TestAdapter(framework_adapter.BaseFrameworkAdapter):
+    def __init__(self):
+        self.add_url_rule = MagicMock()
+        self.context = None
+
+    def attach_rest_helper_request_context(self, context):
+        self.context = context
+
+    def get_rest_helper_request_context(self):
+        return self.context
+
+    def get_current_request_full_path(self):
+        return "/test"
+
+def _counting_provider(counter, name, scope, is_async=False):
+    async def create_async():
+        counter[name] += 1
+        return "{0}{1}".format(name, counter[name])
+
+    def create():
+        counter[name] += 1
+        return "{0}{1}".format(name, counter[name])
+
+    return dependencies.Provider(create_async if is_async else create, scope, teardown=lambda value: counter["teardowns"].append(value))
+
+@pytest.fixture
+def counter():
+    return {"app": 0, "request": 0, "transient": 0, "teardowns": []}
+
+@pytest.mark.asyncio
+async def test_scopes(counter):
+    adapter = TestAdapter()
+    app = _counting_provider(counter, "app", dependencies.APP_SCOPE, is_async=True)
+    request = _counting_provider(counter, "request", dependencies.REQUEST_SCOPE)
+    transient = _counting_provider(counter, "transient", dependencies.TRANSIENT_SCOPE)
+
+    @routes.route(adapter, "/test", doc=False, exception_handler=lambda ex: ex)
+    def view(
+            app_1: binding.from_dependency(adapter, app),
+            app_2: binding.from_dependency(adapter, app),
+            request_1: binding.from_dependency(adapter, request),
+            request_2: binding.from_dependency(adapter, request),
+            transient_1: binding.from_dependency(adapter, transient),
+            transient_2: binding.from_dependency(adapter, transient)):
+        assert counter["teardowns"] == []
+        return sorted([app_1, app_2, request_1, request_2, transient_1, transient_2])
+
+    assert await view() == ["app1", "app1", "request1", "request1", "transient1", "transient2"]
+    assert sorted(counter["teardowns"]) == ["request1", "transient1", "transient2"]
+
+    counter["teardowns"].clear()
+    assert await view() == ["app1", "app1", "request2", "request2", "transient3", "transient4"]
+    assert sorted(counter["teardowns"]) == ["request2", "transient3", "transient4"]
+
+    await app.close()
+    assert counter["teardowns"][-1] == "app1"
+    counter["teardowns"].clear()
+    assert await view() == ["app2", "app2", "request3", "request3", "transient5", "transient6"]
+
+@pytest.mark.asyncio
+async def test_generator_providers_and_teardown_errors(counter):
+    adapter = TestAdapter()
+    steps = []
+
+    @dependencies.provider()
+    async def session():
+        steps.append("open session")
+        yield "session"
+        steps.append("close session")
+
+    @dependencies.provider(scope=dependencies.TRANSIENT_SCOPE)
+    def client():
+        steps.append("open client")
+        yield "client"
+        raise Exception("the client can not be closed")
+
+    @routes.route(adapter, "/test", doc=False, exception_handler=lambda ex: str(ex))
+    def view(s: binding.from_dependency(adapter, session), c: binding.from_dependency(adapter, client)):
+        steps.append("view")
+        raise Exception("view error")
+
+    # the dependencies are torn down in reverse order, even if the view or a teardown fails
+    assert await view() == "view error"
+    assert steps[-1] == "close session"
+    assert steps.index("view") < steps.index("close session")
+
+@pytest.mark.asyncio
+async def test_async_providers_are_concurrent():
+    adapter = TestAdapter()
+    event = asyncio.Event()
+
+    async def wait():
+        await asyncio.wait_for(event.wait(), 1)
+        return "waited"
+
+    async def notify():
+        event.set()
+        return "notified"
+
+    @routes.route(adapter, "/test", doc=False, exception_handler=lambda ex: ex)
+    def view(
+            a: binding.from_dependency(adapter, dependencies.Provider(wait)),
+            b: binding.from_dependency(adapter, dependencies.Provider(notify))):
+        return a, b
+
+    assert await view() == ("waited", "notified")
+
+@pytest.mark.asyncio
+async def test_app_dependency_failure_is_retried():
+    calls = []
+
+    async def create():
+        calls.append(1)
+        if len(calls) == 1:
+            raise Exception("unavailable")
+        return "pool"
+
+    provider = dependencies.Provider(create, dependencies.APP_SCOPE)
+    with pytest.raises(Exception):
+        await provider.resolve(None)
+
+    assert await asyncio.gather(provider.resolve(None), provider.resolve(rest_helper_context.RestHelperContext())) == ["pool", "pool"]
+    assert len(calls) == 2
+
+def test_unknown_scope():
+    with pytest.raises(ValueError):
+        dependencies.Provider(lambda: None, "session")
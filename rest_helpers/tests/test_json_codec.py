@@ -0,0 +1,81 @@
+import json
+import pytest
+import datetime
+
+from decimal import Decimal
+from mock import patch
+from rest_helpers import json_codec, framework_adapter
+
+def _installed_codecs():
+    codecs = [json_codec.StdlibJsonCodec()]
+    try:
+        codecs.append(json_codec.OrjsonCodec())
+    except ImportError: #pragma: no cover
+        pass
+    return codecs
+
+@pytest.mark.parametrize("codec", _installed_codecs(), ids=lambda c:c.name)
+def test_codec(codec):
+    obj = {
+        "decimal": Decimal("1.5"),
+        "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5),
+        "date": datetime.date(2020, 1, 2),
+        "list": [1, "é", None, True],
+        1: "int key"
+    }
+
+    encoded = codec.dumps(obj)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded.decode("utf-8")) == {
+        "decimal": 1.5,
+        "datetime": "2020-01-02T03:04:05",
+        "date": "2020-01-02",
+        "list": [1, "é", None, True],
+        "1": "int key"
+    }
+
+    assert codec.loads(encoded) == codec.loads(encoded.decode("utf-8")) == json.loads(encoded.decode("utf-8"))
+    with pytest.raises(ValueError):
+        codec.loads('{"a":')
+    with pytest.raises(TypeError):
+        codec.dumps({"a": object()})
+
+@pytest.mark.parametrize("codec", _installed_codecs(), ids=lambda c:c.name)
+def test_codec_default_hooks(codec):
+    codec.default_hooks.insert(0, (Decimal, str))
+    codec.default_hooks.append((set, sorted))
+
+    assert json.loads(codec.dumps({"a": Decimal("1.10"), "b": {2, 1}}).decode()) == {"a": "1.10", "b": [1, 2]}
+
+def test_default_codec():
+    class FailingCodec(json_codec.JsonCodec): #pragma: no cover
+        def __init__(self):
+            raise ImportError()
+
+    factories = json_codec._codec_factories.copy()
+    try:
+        json_codec.register_json_codec("failing", FailingCodec, preferred=True)
+        json_codec.register_json_codec("json", json_codec.StdlibJsonCodec, preferred=True)
+        assert isinstance(json_codec.get_json_codec(), json_codec.StdlibJsonCodec)
+        assert json_codec.get_json_codec() is json_codec.get_json_codec()
+
+        json_codec.register_json_codec("json", json_codec.StdlibJsonCodec)
+        json_codec.register_json_codec("failing", FailingCodec, preferred=True)
+        assert isinstance(json_codec.get_json_codec(), (json_codec.StdlibJsonCodec, json_codec.OrjsonCodec))
+
+        codec = json_codec.StdlibJsonCodec()
+        json_codec.set_default_json_codec(codec)
+        assert json_codec.get_json_codec() is codec
+        assert json_codec.get_configured_json_codec() is codec
+    finally:
+        json_codec._codec_factories = factories
+        json_codec._default_codec = None
+        json_codec._configured_codec = None
+
+def test_adapter_json_codec():
+    adapter = framework_adapter.BaseFrameworkAdapter()
+    assert adapter.get_json_codec() is json_codec.get_json_codec()
+
+    codec = json_codec.StdlibJsonCodec()
+    adapter.json_codec = codec
+    assert adapter.get_json_codec() is codec
@@ -0,0 +1,252 @@
+import pytest
+import asyncio
+import httpretty
+
+from mock import patch
+from rest_helpers import oauth
+
+@pytest.fixture
+def keys_fetcher(counter):
+    async def fetch(issuer):
+        counter[issuer] += 1
+        await asyncio.sleep(0)
+        return {"abc1": {"kid": "abc-1"}, "abc2": {"kid": "abc-2"}}
+
+    return fetch
+
+@pytest.mark.asyncio
+async def test_key_store_get_key(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher)
+
+    assert await key_store.get_key("http://A.com", "abc1") == {"kid": "abc-1"}
+    assert await key_store.get_key("http://A.com", "abc2") == {"kid": "abc-2"}
+    assert await key_store.get_key("http://B.com", "abc2") == {"kid": "abc-2"}
+
+    assert counter["http://A.com"] == 1
+    assert counter["http://B.com"] == 1
+
+@pytest.mark.asyncio
+async def test_key_store_single_flight(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher)
+
+    keys = await asyncio.gather(*(key_store.get_key("http://A.com", "abc1") for _ in range(10)))
+
+    assert all(k == {"kid": "abc-1"} for k in keys)
+    assert counter["http://A.com"] == 1
+
+@pytest.mark.asyncio
+async def test_key_store_cancelled_lookup(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher)
+
+    # eg: the client of the first request disconnected while the keys were fetched
+    cancelled = asyncio.ensure_future(key_store.get_key("http://A.com", "abc1"))
+    waiting = asyncio.ensure_future(key_store.get_key("http://A.com", "abc1"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == {"kid": "abc-1"}
+    assert cancelled.cancelled()
+    assert counter["http://A.com"] == 1
+
+@pytest.mark.asyncio
+async def test_key_store_ttl(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(ttl=100, refresh_ahead=10, keys_fetcher=keys_fetcher)
+
+    with patch("rest_helpers.oauth.monotonic", return_value=1000):
+        await key_store.get_key("http://A.com", "abc1")
+
+    # refresh ahead: the cached key is returned and new keys are fetched in the background
+    with patch("rest_helpers.oauth.monotonic", return_value=1095):
+        assert await key_store.get_key("http://A.com", "abc1") == {"kid": "abc-1"}
+        await asyncio.sleep(0.01)
+    assert counter["http://A.com"] == 2
+
+    # expired: the keys are fetched before returning
+    with patch("rest_helpers.oauth.monotonic", return_value=1500):
+        assert await key_store.get_key("http://A.com", "abc1") == {"kid": "abc-1"}
+    assert counter["http://A.com"] == 3
+
+@pytest.mark.asyncio
+async def test_key_store_unknown_key(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(min_refresh_interval=30, unknown_key_ttl=300, keys_fetcher=keys_fetcher)
+
+    with patch("rest_helpers.oauth.monotonic", return_value=1000):
+        assert await key_store.get_key("http://A.com", "abc1") is not None
+        # the keys were just fetched: they are not fetched again
+        assert await key_store.get_key("http://A.com", "bogus") is None
+    assert counter["http://A.com"] == 1
+
+    with patch("rest_helpers.oauth.monotonic", return_value=1100):
+        # the key id is remembered as unknown
+        assert await key_store.get_key("http://A.com", "bogus") is None
+        assert counter["http://A.com"] == 1
+
+        # an other key id might have been rotated in, the keys are fetched again but only once
+        assert await key_store.get_key("http://A.com", "bogus2") is None
+        assert await key_store.get_key("http://A.com", "bogus2") is None
+        assert counter["http://A.com"] == 2
+
+@pytest.mark.asyncio
+async def test_key_store_max_unknown_keys(keys_fetcher):
+    key_store = oauth.JwksKeyStore(max_unknown_keys=2, keys_fetcher=keys_fetcher)
+    for key_id in ["x", "y", "z"]:
+        await key_store.get_key("http://A.com", key_id)
+
+    assert list(key_store._unknown_keys.keys()) == [("http://A.com", "y"), ("http://A.com", "z")]
+
+@pytest.mark.asyncio
+async def test_key_store_static_keys(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher, static_keys={"http://A.com": {"keys": [{"kid": "st-1"}]}})
+
+    assert await key_store.get_key("http://A.com", "st1") == {"kid": "st-1"}
+    assert await key_store.get_key("http://A.com", "abc1") is None
+    assert counter["http://A.com"] == 0
+
+@pytest.mark.asyncio
+async def test_key_store_prefetch(counter, keys_fetcher):
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher, rotation_interval=0.01)
+    try:
+        key_store.add_prefetch_issuers(["http://A.com", "http://B.com"])
+        assert counter["http://A.com"] == 0
+
+        # the keys are fetched when the app starts
+        await key_store.start_rotation()
+        assert counter["http://A.com"] == 1
+        assert counter["http://B.com"] == 1
+
+        assert await key_store.get_key("http://A.com", "abc1") == {"kid": "abc-1"}
+        assert counter["http://A.com"] == 1
+
+        # the keys are rotated in the background
+        await asyncio.sleep(0.05)
+        assert counter["http://A.com"] > 1
+    finally:
+        key_store.stop_rotation()
+
+@pytest.mark.asyncio
+async def test_key_store_prefetch_failure(counter):
+    async def failing_fetcher(issuer):
+        counter[issuer] += 1
+        raise Exception("unreachable")
+
+    key_store = oauth.JwksKeyStore(keys_fetcher=failing_fetcher)
+    await key_store.prefetch(["http://A.com"])
+
+    assert counter["http://A.com"] == 1
+
+@pytest.mark.asyncio
+async def test_key_store_failed_fetch(counter):
+    async def failing_fetcher(issuer):
+        counter[issuer] += 1
+        raise Exception("not found")
+
+    key_store = oauth.JwksKeyStore(keys_fetcher=failing_fetcher, failure_ttl=30)
+
+    # the failure is remembered: the issuer is not fetched on each lookup
+    with patch("rest_helpers.oauth.monotonic", return_value=1000):
+        keys = await asyncio.gather(*(key_store.get_key("http://A.com/bogus", "abc1") for _ in range(5)))
+        keys += [await key_store.get_key("http://A.com/bogus", "abc1") for _ in range(5)]
+    assert keys == [None] * 10
+    assert counter["http://A.com/bogus"] == 1
+
+    with patch("rest_helpers.oauth.monotonic", return_value=1031):
+        assert await key_store.get_key("http://A.com/bogus", "abc1") is None
+    assert counter["http://A.com/bogus"] == 2
+
+@pytest.mark.asyncio
+async def test_key_store_max_issuers(keys_fetcher, counter):
+    async def failing_fetcher(issuer):
+        raise Exception("not found")
+
+    key_store = oauth.JwksKeyStore(max_issuers=2, keys_fetcher=keys_fetcher)
+    for issuer in ["http://A.com", "http://B.com", "http://C.com"]:
+        await key_store.get_key(issuer, "abc1")
+    assert list(key_store._issuers.keys()) == ["http://B.com", "http://C.com"]
+
+    key_store.keys_fetcher = failing_fetcher
+    for issuer in ["http://D.com", "http://E.com", "http://F.com"]:
+        await key_store.get_key(issuer, "abc1")
+    assert list(key_store._failures.keys()) == ["http://E.com", "http://F.com"]
+
+@pytest.mark.asyncio
+async def test_key_store_snapshot(tmpdir, counter, keys_fetcher):
+    snapshot_path = str(tmpdir.join("jwks.json"))
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher, snapshot_path=snapshot_path)
+    await key_store.get_key("http://A.com", "abc1")
+    assert counter["http://A.com"] == 1
+
+    # a new process starts with the saved keys
+    key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher, snapshot_path=snapshot_path)
+    assert await key_store.get_key("http://A.com", "abc2") == {"kid": "abc-2"}
+    assert counter["http://A.com"] == 1
+
+    # the age of the saved keys is preserved
+    with patch("rest_helpers.oauth.time", return_value=oauth.time() + 7200):
+        key_store = oauth.JwksKeyStore(keys_fetcher=keys_fetcher, snapshot_path=snapshot_path)
+    assert await key_store.get_key("http://A.com", "abc2") == {"kid": "abc-2"}
+    assert counter["http://A.com"] == 2
+
+def test_key_store_corrupt_snapshot(tmpdir):
+    snapshot = tmpdir.join("jwks.json")
+    snapshot.write("{not json")
+
+    key_store = oauth.JwksKeyStore(snapshot_path=str(snapshot))
+    assert key_store._issuers == {}
+
+@pytest.mark.asyncio
+async def test_fetch_issuer_keys():
+    httpretty.enable()
+    try:
+        httpretty.register_uri(
+            httpretty.GET,
+            "http://A.com/my/endpoint/.well-known/openid-configuration",
+            body='{"jwks_uri": "http://B.com/a/b/c"}'
+        )
+        httpretty.register_uri(
+            httpretty.GET,
+            "http://B.com/a/b/c",
+            body='{"keys": [ {"kid":"abc-1"}, {"kid":"abc-2"} ]}'
+        )
+        keys = await oauth.fetch_issuer_keys("http://A.com/my/endpoint")
+    finally:
+        httpretty.disable()
+
+    assert keys == {"abc1": {"kid":"abc-1"}, "abc2": {"kid":"abc-2"}}
+
+def test_token_cache():
+    token_cache = oauth.TokenCache(max_size=2, leeway=10)
+
+    with patch("rest_helpers.oauth.time", return_value=1000):
+        assert token_cache.get("A") is None
+        token_cache.set("A", {"sub": "a"}, 2000)
+        token_cache.set("B", {"sub": "b"}, 2000)
+        # no expiration, no caching
+        token_cache.set("C", {"sub": "c"}, None)
+
+        assert token_cache.get("A") == {"sub": "a"}
+        assert token_cache.get("C", "missing") == "missing"
+
+        # B is the least recently used
+        token_cache.set("D", {"sub": "d"}, 2000)
+        assert len(token_cache) == 2
+        assert token_cache.get("B") is None
+        assert token_cache.get("D") == {"sub": "d"}
+
+    with patch("rest_helpers.oauth.time", return_value=1995):
+        assert token_cache.get("A") is None
+
+    assert token_cache.hits == 2
+    assert token_cache.misses == 4
+
+def test_token_cache_scope():
+    token_cache = oauth.TokenCache()
+    scope_a = oauth.get_verification_scope("audience a", ["a.com"])
+    scope_b = oauth.get_verification_scope("audience b", ["a.com"])
+
+    with patch("rest_helpers.oauth.time", return_value=1000):
+        token_cache.set("A", {"sub": "a"}, 2000, scope_a)
+        assert token_cache.get("A", scope=scope_a) == {"sub": "a"}
+        assert token_cache.get("A", scope=scope_b) is None
+        assert token_cache.get("A") is None
+
+    assert scope_a == oauth.get_verification_scope("audience a", ["a.com"])
@@ -0,0 +1,133 @@
+import typing
+import pytest
+
+from mock import MagicMock
+from rest_helpers import routes, binding, framework_adapter, rest_helper_context, request_validation, route_registry
+
+dataclasses = pytest.importorskip("dataclasses")
+
+@dataclasses.dataclass
+class Book(object):
+    title: str
+    tags: typing.List[str]
+    pages: typing.Optional[int] = None
+
+class TestAdapter(framework_adapter.BaseFrameworkAdapter):
+    validate_requests = True
+
+    def __init__(self, query_string_args=None, headers=None, body=""):
+        self.route_registry = route_registry.RouteRegistry()
+        self.add_url_rule = MagicMock()
+        self.context = rest_helper_context.RestHelperContext()
+        self.query_string_args = query_string_args or {}
+        self.headers = headers or {}
+        self.body = body
+
+    def attach_rest_helper_request_context(self, context):
+        self.context = context
+
+    def get_rest_helper_request_context(self):
+        return self.context
+
+    def get_current_request_query_string_args(self):
+        return self.query_string_args
+
+    def get_current_request_headers_dict(self):
+        return self.headers
+
+    async def get_current_request_body(self):
+        return self.body
+
+    def get_current_request_full_path(self):
+        return "/books"
+
+def _make_view(adapter, calls):
+    @routes.route(adapter, "/books", options={"methods":["POST"]}, doc=False, exception_handler=lambda ex: ex)
+    def create_book(
+            page: (int, binding.from_query_string(adapter)),
+            token: (str, binding.from_header(adapter, header_field="X-Token")),
+            book: (Book, binding.from_json_body(adapter)),
+            ids: (typing.List[int], binding.from_query_string(adapter, as_list=True))=None):
+        calls.append(book)
+        return "created"
+
+    return create_book
+
+@pytest.mark.asyncio
+async def test_valid_request():
+    calls = []
+    adapter = TestAdapter({"page":["2"], "ids":["1", "2"]}, {"x-token":"abc"}, '{"title":"a", "tags":["b"]}')
+    create_book = _make_view(adapter, calls)
+
+    assert await create_book() == "created"
+    assert calls == [Book("a", ["b"])]
+
+@pytest.mark.asyncio
+async def test_invalid_request():
+    calls = []
+    adapter = TestAdapter({"page":["x"], "ids":["1", "a"]}, {}, '{"tags":["b", 1], "pages":null, "extra":1}')
+    create_book = _make_view(adapter, calls)
+
+    # every problem is reported at once, before any binder runs
+    adapter.get_current_request_query_string_args = MagicMock(wraps=adapter.get_current_request_query_string_args)
+    ex = await create_book()
+    assert str(ex) == ("The request is not valid: 5 problem(s): "
+                       "query parameter page: expected an integer, got 'x'; "
+                       "query parameter ids: expected an integer, got 'a'; "
+                       "header X-Token: this header is required; "
+                       "body.title: this field is required; "
+                       "body.tags[1]: expected a string, got 1")
+    assert calls == []
+    assert adapter.get_current_request_query_string_args.call_count == 1
+
+    adapter.body = "{"
+    adapter.query_string_args = {"page":["1"]}
+    adapter.headers = {"X-Token":"abc"}
+    assert str(await create_book()).startswith("The request is not valid: 1 problem(s): body: request data is not valid JSON")
+
+def test_validation_is_opt_in():
+    adapter = TestAdapter()
+    adapter.validate_requests = False
+    _make_view(adapter, [])
+    assert adapter.add_url_rule.call_args[0][0].request_validator is None
+
+def test_compiled_json_check():
+    schemas = {"node": {"type": "object", "required": ["name"], "properties": {"child": {"$ref": "#/definitions/node"}}}}
+    check = request_validation._compile_json_check({
+        "type": "object",
+        "properties": {
+            "status": {"type": "string", "enum": ["on", "off"]},
+            "at": {"type": "string", "format": "date-time"},
+            "counts": {"type": "object", "additionalProperties": {"type": "integer"}},
+            "child": {"$ref": "#/definitions/node"},
+        }
+    }, {}, lambda: schemas)
+
+    problems = []
+    check({"status": "up", "at": "yesterday", "counts": {"a": 1, "b": 1.5}, "child": {"name": "a", "child": {}}}, "body", problems)
+    assert problems == [
+        "body.status: expected one of on, off, got 'up'",
+        "body.at: expected a datetime, got 'yesterday'",
+        "body.counts.b: expected an integer, got 1.5",
+        "body.child.child.name: this field is required"
+    ]
+
+def test_compiled_json_check_unknown_definition():
+    # a missing definition fails when the route is registered, not silently on each request
+    with pytest.raises(ValueError) as ex:
+        request_validation._compile_json_check({"type": "array", "items": {"$ref": "#/definitions/node"}}, {}, dict)
+    assert str(ex.value) == "The swagger definition #/definitions/node does not exist: define it before the routes using it"
+
+def test_compiled_string_check():
+    # the query string and header values accepted are the ones the binders deserialize
+    problems = []
+    check_int = request_validation._compile_string_check({"type": "integer"})
+    check_bool = request_validation._compile_string_check({"type": "boolean"})
+    for value in (" 5", "-2", "1_000"):
+        check_int(value, "page", problems)
+    for value in ("", "1", "yes", "False"):
+        check_bool(value, "flag", problems)
+    assert problems == []
+
+    check_int("1.5", "page", problems)
+    assert problems == ["page: expected an integer, got '1.5'"]
@@ -20,6 +20,11 @@ def test_adapter(request):
     adapter.get_rest_helper_request_context = lambda: rh_context
     return adapter
 
+def _set_query_string_args(test_adapter, query_string_args):
+    # a new request: the query string args are parsed again
+    test_adapter.get_current_request_query_string_args = lambda:query_string_args
+    test_adapter.get_rest_helper_request_context().query_string_args = None
+
 def test_bad_request(test_adapter):
     ex = Exception("test exception")
     resp = responses.bad_request(test_adapter, ex)
@@ -76,49 +81,49 @@ def test_accepted(test_adapter):
     assert resp[1]== 202
 
 def test_ok_with_json_path(test_adapter):
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/name"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/name"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == "test_name"
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/list"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/list"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == ["1",2,"3"]
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/list/1"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/list/1"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == 2
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/dic/entry_1"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/dic/entry_1"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == "value 1"
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/dic/list/*/x"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/dic/list/*/x"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == [1,2,3]
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/list/3"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/list/3"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[1]== 400
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/list/a"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/list/a"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[1]== 400
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/a"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/a"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[1]== 400
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/dic/list/*:>b~=(2|3)/b"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/dic/list/*:>b~=(2|3)/b"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[0]["data"] == ["2","3"]
     assert resp[1]== 200
 
-    test_adapter.get_current_request_query_string_args = lambda:{"json_path":["/data/attributes/list/*:sfds"]}
+    _set_query_string_args(test_adapter, {"json_path":["/data/attributes/list/*:sfds"]})
     resp = responses.ok(test_adapter, _TestClass())
     assert resp[1]== 400
 
@@ -148,37 +153,37 @@ def _verify_ok_page_3(resp):
 def test_ok_with_explicit_page_size(test_adapter):
     resp_list = [_TestClass(1), _TestClass(2), _TestClass(3), _TestClass(4), _TestClass(5)]
 
-    test_adapter.get_current_request_query_string_args = lambda:{}
+    _set_query_string_args(test_adapter, {})
     test_adapter.get_current_request_query_string = lambda:b""
     resp = responses.ok(test_adapter, resp_list, page_size=2)
     _verify_ok_page_1(resp)
 
-    test_adapter.get_current_request_query_string_args = lambda:{"page":["2"], "x":["3"]}
+    _set_query_string_args(test_adapter, {"page":["2"], "x":["3"]})
     test_adapter.get_current_request_query_string = lambda:b"page=2&x=3"
     resp = responses.ok(test_adapter, resp_list, page_size=2)
     _verify_ok_page_2(resp)
 
-    test_adapter.get_current_request_query_string_args = lambda:{"page":["3"]}
+    _set_query_string_args(test_adapter, {"page":["3"]})
     test_adapter.get_current_request_query_string = lambda:b"page=3"
     resp = responses.ok(test_adapter, resp_list, page_size=2)
     _verify_ok_page_3(resp)
 
 def test_ok_with_context_page_size(test_adapter):
     resp_list = [_TestClass(1), _TestClass(2), _TestClass(3), _TestClass(4), _TestClass(5)]
-    test_adapter.get_current_request_query_string_args = lambda:{}
+    _set_query_string_args(test_adapter, {})
     test_adapter.get_current_request_query_string = lambda:b""
     test_adapter.get_rest_helper_request_context().page_size = 2
     resp = responses.ok(test_adapter, resp_list)
     _verify_ok_page_1(resp)
 
-    test_adapter.get_current_request_query_string_args = lambda:{"page":["2"], "x":["3"]}
+    _set_query_string_args(test_adapter, {"page":["2"], "x":["3"]})
     test_adapter.get_current_request_query_string = lambda:b"page=2&x=3"
     test_adapter.get_rest_helper_request_context().page_size = lambda : 2
     resp = responses.ok(test_adapter, resp_list)
     _verify_ok_page_2(resp)
 
 
-    test_adapter.get_current_request_query_string_args = lambda:{"page":["3"]}
+    _set_query_string_args(test_adapter, {"page":["3"]})
     test_adapter.get_current_request_query_string = lambda:b"page=3"
     test_adapter.get_rest_helper_request_context().page_size = lambda : 4-2
     resp = responses.ok(test_adapter, resp_list)
@@ -186,18 +191,33 @@ def test_ok_with_context_page_size(test_adapter):
 
 def test_ok_with_query_string_page_size(test_adapter):
     resp_list = [_TestClass(1), _TestClass(2), _TestClass(3), _TestClass(4), _TestClass(5)]
-    test_adapter.get_current_request_query_string_args = lambda:{"page_size":"2"}
+    _set_query_string_args(test_adapter, {"page_size":"2"})
     test_adapter.get_current_request_query_string = lambda:b"page_size=2"
     test_adapter.get_rest_helper_request_context().page_size = None
     resp = responses.ok(test_adapter, resp_list)
     _verify_ok_page_1(resp)
 
-    test_adapter.get_current_request_query_string_args = lambda:{"page_size":"2", "page":["2"], "x":["3"]}
+    _set_query_string_args(test_adapter, {"page_size":"2", "page":["2"], "x":["3"]})
     test_adapter.get_current_request_query_string = lambda:b"page_size=2&page=2&x=3"
     test_adapter.get_rest_helper_request_context().page_size = None
     resp = responses.ok(test_adapter, resp_list)
     _verify_ok_page_2(resp)
 
+def test_ok_with_versionned_query_string(test_adapter):
+    from rest_helpers.versioning import UrlRootVersionner
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            def query_string_args(self, query_string_args):
+                query_string_args["page"] = query_string_args.pop("p")
+                return query_string_args
+
+    resp_list = [_TestClass(1), _TestClass(2), _TestClass(3), _TestClass(4), _TestClass(5)]
+    test_adapter.get_rest_helper_request_context().versionner = TestVersionner()
+    _set_query_string_args(test_adapter, {"p":["2"], "x":["3"]})
+    test_adapter.get_current_request_query_string = lambda:b"page=2&x=3"
+    resp = responses.ok(test_adapter, resp_list, page_size=2)
+    _verify_ok_page_2(resp)
+
 class _TestClass(Resource):
     def __init__(self, id = 1):
         super(_TestClass, self).__init__("test_name", "test_type")
@@ -0,0 +1,74 @@
+from mock import MagicMock
+from rest_helpers import routes, binding, framework_adapter, route_registry, swagger
+from rest_helpers.tests.test_common import TestClass, SubTestClass
+
+class TestAdapter(framework_adapter.BaseFrameworkAdapter):
+    def __init__(self):
+        self.route_registry = route_registry.RouteRegistry()
+        self.add_url_rule = MagicMock()
+
+def _make_view(adapter):
+    # the views share their name and their id, but not their binders
+    @routes.get_resource_route(adapter, TestClass)
+    def view(test_name, q: binding.from_query_string(adapter), h: binding.from_header(adapter, header_field="X-H")=None):
+        pass
+
+    return adapter.get_route_registry().routes[-1]
+
+def test_indexed_lookups():
+    adapter = TestAdapter()
+    registry = adapter.get_route_registry()
+    first, second = _make_view(adapter), _make_view(adapter)
+
+    @routes.delete_resource_route(adapter, SubTestClass, doc=False)
+    def delete_subtest(subtest_name):
+        pass
+    delete_route = registry.routes[-1]
+
+    assert first.id == second.id
+    assert registry.get_routes(route_id=first.id) == [first, second]
+    assert registry.get_routes(resource_class=TestClass, method="get") == [first, second]
+    assert registry.get_routes(method="DELETE") == [delete_route]
+    assert registry.get_routes(resource_class=SubTestClass, method="GET") == []
+
+    assert [b.field for b in registry.get_binders(first.real_view_function)] == ["q", "h"]
+    assert [b.field for b in registry.get_binders(second.real_view_function, binding.from_header)] == ["h"]
+    assert registry.get_binders(delete_route.real_view_function) == []
+
+    # the routes not documented are registered but not described
+    assert list(swagger.get_swagger_paths(registry).keys()) == ["/tests/{test_name}"]
+
+def test_isolated_registries():
+    adapter, other_adapter = TestAdapter(), TestAdapter()
+    route = _make_view(adapter)
+
+    assert other_adapter.get_route_registry().routes == []
+    assert route not in route_registry.get_route_registry().routes
+    assert [p["name"] for p in swagger._get_parameters(route, adapter.get_route_registry())] == ["test_name", "q", "X-H"]
+
+def test_binders_of_the_process_registry():
+    adapter, process_adapter = TestAdapter(), framework_adapter.BaseFrameworkAdapter()
+    process_adapter.add_url_rule = MagicMock()
+
+    # eg: a binder built through a framework proxy, without an app
+    @routes.get_resource_route(adapter, TestClass)
+    @binding.from_query_string(process_adapter, field="q")
+    def view(test_name, q):
+        pass
+
+    route = adapter.get_route_registry().routes[-1]
+    assert [b.field for b in adapter.get_route_registry().get_binders(route.real_view_function)] == ["q"]
+    assert [p["name"] for p in swagger._get_parameters(route, adapter.get_route_registry())] == ["test_name", "q"]
+
+def test_add_binder_invalidation():
+    registry = route_registry.RouteRegistry()
+    first, second = _make_view(TestAdapter()), _make_view(TestAdapter())
+    first_query = registry.get_binders(first.real_view_function, binding.from_query_string)
+
+    # only the binders by type of the view function are recomputed
+    registry.add_binder(first.real_view_function, binding.from_query_string(first.framework_adapter, field="q"))
+    registry.add_binder(second.real_view_function, binding.from_header(second.framework_adapter, field="h"))
+    second_headers = registry.get_binders(second.real_view_function, binding.from_header)
+    assert len(registry.get_binders(first.real_view_function, binding.from_query_string)) == len(first_query) + 1
+    registry.add_binder(first.real_view_function, binding.from_header(first.framework_adapter, field="h"))
+    assert registry.get_binders(second.real_view_function, binding.from_header) is second_headers
@@ -1,12 +1,13 @@
 import pytest
 import functools
 from mock import patch, Mock, MagicMock
-from rest_helpers import routes, framework_adapter, binding, responses, jsonapi_objects
+from rest_helpers import routes, framework_adapter, binding, responses, jsonapi_objects, rest_exceptions, route_registry
 from rest_helpers.jsonapi_objects import Resource
 from rest_helpers.tests.test_common import TestRequestContext as RequestContext, TestClass, SubTestClass
 
 class TestAdapter(framework_adapter.BaseFrameworkAdapter):
     def __init__(self):
+        self.route_registry = route_registry.RouteRegistry()
         self.add_url_rule = MagicMock()
         self.get_current_request_full_path = MagicMock()
         self.attach_rest_helper_request_context = MagicMock()
@@ -64,7 +65,7 @@ async def test_route():
     assert len(adapter.add_url_rule._mock_call_args_list) == 1
     assert adapter.add_url_rule._mock_call_args[0][0] == route
     assert adapter.add_url_rule._mock_call_args[0][1].__code__.co_name == "_on_request"
-    assert routes._swagger_routes[0] == route
+    assert adapter.get_route_registry().routes == [route]
 
     assert await test_function(None) == 5
     d["return_value"] = 4
@@ -76,6 +77,13 @@ async def test_route():
     response = await test_function(None)
     assert response == "ABC"
 
+    # the body is not read again to be logged
+    adapter.get_current_request_body = MagicMock()
+    with patch("rest_helpers.routes.LOGGER") as logger:
+        await test_function(None)
+    assert "request body: <not read>" in logger.error.call_args[0][0]
+    assert not adapter.get_current_request_body.called
+
 
 @pytest.mark.asyncio
 async def test_route_with_versionner():
@@ -103,6 +111,169 @@ async def test_route_with_versionner():
     assert await test_function(rest_helper_version="v1") == 2
     assert await test_function() == {"a":1, "b":{"c":2}} == {"a":1, "b":{"c":2}}
 
+def test_versionner_compilation():
+    from rest_helpers.versioning import UrlRootVersionner
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            name = "2019-01-01"
+            def headers(self, headers):
+                return {"v1": True}
+        class v2:
+            name = "2020-01-01"
+
+    # the versions are compiled once per class, the instances only store the requested version
+    assert list(TestVersionner.supported_versions.keys()) == ["2019-01-01", "2020-01-01"]
+    assert TestVersionner().get_hooks() is TestVersionner().get_hooks()
+    with pytest.raises(TypeError):
+        TestVersionner.supported_versions["v3"] = None
+
+    versionner = TestVersionner()
+    assert not versionner.has_hook("headers")
+    assert versionner.headers({}) == {}
+    versionner.set_request_args((), {"rest_helper_version":"2019-01-01"})
+    assert versionner.has_hook("headers") and not versionner.has_body_hooks()
+    assert versionner.headers({}) == {"v1": True}
+    assert versionner.body("body") == "body"
+
+    versionner.requested_version = "v3"
+    with pytest.raises(rest_exceptions.InvalidDataException):
+        versionner.response(None)
+
+
+def test_versionner_step_migrations():
+    from rest_helpers.versioning import UrlRootVersionner, pure
+    calls = []
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            migrates_to = "v2"
+            @pure
+            def body_dict(self, body):
+                calls.append("v1")
+                return {"full_name": body["name"]}
+            def response_body_dict(self, response):
+                return {"name": response["full_name"]}
+        class v2:
+            migrates_to = "v3"
+            @pure
+            def body_dict(self, body):
+                calls.append("v2")
+                return dict(body, id=1)
+            def response_body_dict(self, response):
+                return {"full_name": response["name"]}
+        class v3:
+            pass
+
+    versionner = TestVersionner()
+    versionner.requested_version = "v1"
+    assert versionner.body_dict({"name": "a"}) == {"full_name": "a", "id": 1}
+    assert versionner.response_body_dict({"name": "a", "id": 1}) == {"name": "a"}
+
+    # the results of the pure steps are cached, and shared by the versions migrating through them
+    result = versionner.body_dict({"name": "a"})
+    result["id"] = 2
+    assert versionner.body_dict({"name": "a"}) == {"full_name": "a", "id": 1}
+    versionner.requested_version = "v2"
+    assert versionner.body_dict({"full_name": "a"}) == {"full_name": "a", "id": 1}
+    assert calls == ["v1", "v2"]
+
+    # the latest version does not go through the versionner
+    versionner.requested_version = "v3"
+    assert not versionner.has_hooks()
+
+    with pytest.raises(ValueError):
+        class CyclicVersionner(UrlRootVersionner):
+            class v1:
+                migrates_to = "v2"
+            class v2:
+                migrates_to = "v1"
+
+def test_versionner_pure_step_arguments():
+    from rest_helpers import versioning
+    from rest_helpers.versioning import UrlRootVersionner, pure
+    calls = []
+    class TestVersionner(UrlRootVersionner):
+        class v1:
+            @pure
+            def body_dict(self, body):
+                calls.append(body)
+                return {"keys": list(body)}
+        class v2:
+            pass
+
+    versionner = TestVersionner()
+    versionner.requested_version = "v1"
+
+    # the step gets the argument unchanged, not a json copy of it
+    body = {1: "a", "x": (1, 2)}
+    assert versionner.body_dict(body) == {"keys": [1, "x"]}
+    assert calls == [body] and type(calls[0]["x"]) is tuple
+
+    # the arguments equal as json only are cached apart
+    assert versionner.body_dict({"1": "a", "x": [1, 2]}) == {"keys": ["1", "x"]}
+    assert versionner.body_dict({1: "a", "x": (1, 2)})["keys"][0] == 1
+    assert len(calls) == 2
+
+    # the arguments that can not be cached are still given to the step
+    assert versionner.body_dict({"at": body.__class__}) == {"keys": ["at"]}
+    assert len(calls) == 3
+
+    # nor are the large arguments
+    large_body = {"text": "a" * versioning.PURE_STEP_MAX_ARGUMENT_SIZE}
+    assert versionner.body_dict(large_body) == {"keys": ["text"]}
+    assert versionner.body_dict(large_body) == {"keys": ["text"]}
+    assert len(calls) == 5
+
+@pytest.mark.asyncio
+async def test_route_with_static_versionner():
+    from rest_helpers import swagger
+    from rest_helpers.versioning import UrlRootVersionner
+    class TestVersionner(UrlRootVersionner):
+        static_routes = True
+        class v1:
+            def response(self, response):
+                return "v1 " + response
+        class v2:
+            pass
+
+    adapter = TestAdapter()
+    @routes.get_resource_route(adapter, TestClass, versionner=TestVersionner)
+    def get_test(resource_id, test_name):
+        return resource_id
+
+    # a route is registered per version, the version is not a parameter of the route
+    rules = [(c[1][0].rule, c[1][0].options["endpoint"]) for c in adapter.add_url_rule.mock_calls]
+    assert rules == [("/v1/tests/<test_name>", "get_test_v1"), ("/v2/tests/<test_name>", "get_test_v2")]
+    paths = swagger.get_swagger_paths(adapter.get_route_registry())
+    assert sorted(paths.keys()) == ["/v1/tests/{test_name}", "/v2/tests/{test_name}"]
+    assert paths["/v1/tests/{test_name}"]["get"]["operationId"] == "get_test_v1"
+
+    v1_handler, v2_handler = (c[1][1] for c in adapter.add_url_rule.mock_calls)
+    assert await v1_handler(test_name="a") == "v1 /tests/a"
+    assert await v2_handler(test_name="a") == "/tests/a"
+
+@pytest.mark.asyncio
+async def test_route_body_size_limits():
+    adapter = TestAdapter()
+    adapter.get_rest_helper_request_context = lambda: adapter.attach_rest_helper_request_context.call_args[0][0]
+    adapter.get_current_request_headers_dict = lambda: {"Content-Length": "1001"}
+    adapter.read_current_request_body_bytes = MagicMock()
+
+    @routes.route(adapter, "/test", options={"methods":["POST"]}, doc=False, max_body_size=1000, exception_handler=lambda ex: ex)
+    def test_function():
+        return "called"
+
+    # the body is not read when its content length exceeds the limit
+    response = await test_function()
+    assert isinstance(response, rest_exceptions.PayloadTooLargeException)
+    assert not adapter.read_current_request_body_bytes.called
+
+    adapter.get_current_request_headers_dict = lambda: {"Content-Length": "1000"}
+    assert await test_function() == "called"
+
+    with patch("rest_helpers.responses.error") as error:
+        responses.base_exception_handler(adapter, response)
+    assert error.call_args[0][1:3] == (413, "Payload too large")
+
 
 @pytest.mark.asyncio
 async def test_base_resource_route_resource_id_binding():
@@ -215,3 +386,25 @@ def test_add_swagger_route():
 
 
 #TODO : test get all resources route with paging
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route, route_kwargs, path_params, res_id",[
+    (routes.get_resource_route, { "resource_class":SubTestClass }, {"test_name":"t", "subtest_name":"s"}, "/tests/t/subtests/s"),
+    (routes.get_all_resources_route, { "resource_class":SubTestClass }, {"test_name":"t"}, "/tests/t"),
+    (routes.operation_resource_route, { "resource_class":SubTestClass, "operation_name":"test_op"}, {"test_name":"t", "subtest_name":"s"}, "/tests/t/subtests/s"),
+    (routes.group_operation_resource_route, { "resource_class":SubTestClass, "operation_name":"test_op"}, {"test_name":"t"}, "/tests/t"),
+    (routes.get_resource_route, { "resource_class":SubTestClass }, {"test_name":"my test", "subtest_name":"a+b@c"}, "/tests/my%20test/subtests/a%2Bb%40c"),
+])
+async def test_resource_routes_resource_id_from_path_params(route, route_kwargs, path_params, res_id):
+    adapter = TestAdapter()
+    d={}
+    r = route(adapter, **route_kwargs)
+    @r
+    def test_function(resource_id, **kwargs):
+        d["resource_id"] = resource_id
+        return "Ok"
+
+    # the resource id is formatted from the route parameters, the url is not parsed
+    adapter.get_current_request_url = MagicMock(side_effect=Exception("the url should not be parsed"))
+    assert await test_function(**path_params) == "Ok"
+    assert d["resource_id"] == res_id
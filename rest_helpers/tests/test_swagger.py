@@ -1,5 +1,7 @@
 import pytest
-from rest_helpers import swagger, routes, framework_adapter, binding, versioning
+import typing
+import datetime
+from rest_helpers import swagger, routes, framework_adapter, binding, versioning, route_registry
 from rest_helpers.tests import test_common
 
 
@@ -74,9 +76,15 @@ def test_update_list_delete_by_index():
 def test_get_parameter_type(type, expected):
     assert swagger._get_parameter_type(type) == expected
 
+def test_get_query_parameter_schema():
+    assert swagger._get_query_parameter_schema(int) == {"type": "integer"}
+    assert swagger._get_query_parameter_schema(typing.Optional[bool]) == {"type": "boolean"}
+    assert swagger._get_query_parameter_schema(typing.List[int]) == {"type": "array", "items": {"type": "integer"}, "collectionFormat": "multi", "uniqueItems": False}
+    assert swagger._get_query_parameter_schema(typing.Set[str]) == {"type": "array", "items": {"type": "string"}, "collectionFormat": "multi", "uniqueItems": True}
+
 def test_get_parameters_simple_route():
     route = routes.route(framework_adapter.BaseFrameworkAdapter(), "/test_<param1>/hello_<param2>", options=None, doc=True, versionner=None, exception_handler=None)
-    parameters = swagger._get_parameters(route)
+    parameters = swagger._get_parameters(route, route_registry.RouteRegistry())
 
     assert parameters == [
         {
@@ -96,62 +104,95 @@ def test_get_parameters_simple_route():
     ]
 
 def test_get_parameters_resource_route():
-    original_binding_input_decorators = binding._input_decorators
     fw_adapter = framework_adapter.BaseFrameworkAdapter()
-    try:
-        route = routes.get_resource_route(fw_adapter, test_common.TestClass, options=None, doc=True, versionner=versioning.UrlRootVersionner, exception_handler=None)
-        route.rule = "<rest_helper_version>/" + route.rule
-        binding_list = [
-                binding.from_json_body(fw_adapter, field="data", validator=None, deserializer=None),
-                binding.field_from_json_body(fw_adapter, field="json_field", json_field="a/b/c", validator=None, deserializer=None),
-                binding.from_header(fw_adapter, field="header_field", header_field="in_header", validator=None, deserializer=None),
-                binding.from_query_string(fw_adapter, field="query_field", query_field="in_query", validator=None, deserializer=None, as_list=False),
-            ]
-        for i,b in enumerate(binding_list):
-            b.has_default = i % 2 == 0
-            b.default = "X"+str(i) if i % 2 == 0 else None
-
-        binding._input_decorators = {
-            route.id: binding_list
-        }
-        parameters = swagger._get_parameters(route)
-
-        assert parameters == [
-                {
-                    'description': 'Version of the api to use.',
-                    'enum': [],
-                    'in': 'path',
-                    'name': 'rest_helper_version',
-                    'required': True,
-                    'type': 'string'
-                },
-                {
-                    'description': 'Name of the /tests to get.',
-                    'in': 'path',
-                    'name': 'test_name',
-                    'required': True,
-                    'type': 'string'
-                },
-                {
-                    'in': 'query',
-                    'name': 'in_query',
-                    'required': True,
-                    'type': 'string'
-                },
-                {
-                    'in': 'header',
-                    'name': 'in_header',
-                    'required': False,
-                    'type': 'string'
-                },
-                {
-                    'in': 'body',
-                    'name': 'body',
-                    'required': True,
-                    'schema': {
-                        'type': 'object'
-                    }
+    fw_adapter.route_registry = route_registry.RouteRegistry()
+    route = routes.get_resource_route(fw_adapter, test_common.TestClass, options=None, doc=True, versionner=versioning.UrlRootVersionner, exception_handler=None)
+    route.rule = "<rest_helper_version>/" + route.rule
+    binding_list = [
+            binding.from_json_body(fw_adapter, field="data", validator=None, deserializer=None),
+            binding.field_from_json_body(fw_adapter, field="json_field", json_field="a/b/c", validator=None, deserializer=None),
+            binding.from_header(fw_adapter, field="header_field", header_field="in_header", validator=None, deserializer=None),
+            binding.from_query_string(fw_adapter, field="query_field", query_field="in_query", validator=None, deserializer=None, as_list=False),
+        ]
+    for i,b in enumerate(binding_list):
+        b.has_default = i % 2 == 0
+        b.default = "X"+str(i) if i % 2 == 0 else None
+
+    for b in binding_list:
+        fw_adapter.route_registry.add_binder(route.real_view_function, b)
+    parameters = swagger._get_parameters(route, fw_adapter.route_registry)
+
+    assert parameters == [
+            {
+                'description': 'Version of the api to use.',
+                'enum': [],
+                'in': 'path',
+                'name': 'rest_helper_version',
+                'required': True,
+                'type': 'string'
+            },
+            {
+                'description': 'Name of the /tests to get.',
+                'in': 'path',
+                'name': 'test_name',
+                'required': True,
+                'type': 'string'
+            },
+            {
+                'in': 'query',
+                'name': 'in_query',
+                'required': True,
+                'type': 'string'
+            },
+            {
+                'in': 'header',
+                'name': 'in_header',
+                'required': False,
+                'type': 'string'
+            },
+            {
+                'in': 'body',
+                'name': 'body',
+                'required': True,
+                'schema': {
+                    'type': 'object'
                 }
-            ]
-    finally:
-        binding._input_decorators = original_binding_input_decorators
+            }
+        ]
+
+def test_get_parameters_body_model():
+    dataclasses = pytest.importorskip("dataclasses")
+
+    @dataclasses.dataclass
+    class Book(object):
+        title: str
+        tags: typing.Set[str]
+        price: typing.Optional[float] = None
+        extra: typing.Dict[str, int] = None
+
+    fw_adapter = framework_adapter.BaseFrameworkAdapter()
+    fw_adapter.route_registry = route_registry.RouteRegistry()
+    route = routes.get_resource_route(fw_adapter, test_common.TestClass, options=None, doc=True, versionner=versioning.UrlRootVersionner, exception_handler=None)
+    body_binder = binding.from_json_body(fw_adapter, field="data")
+    body_binder.type = Book
+    field_binder = binding.field_from_json_body(fw_adapter, field="published", json_field="meta/published")
+    field_binder.type = datetime.datetime
+    body_binder.has_default = field_binder.has_default = False
+    fw_adapter.route_registry.add_binder(route.real_view_function, body_binder)
+    fw_adapter.route_registry.add_binder(route.real_view_function, field_binder)
+
+    assert swagger._get_parameters(route, fw_adapter.route_registry)[-1]["schema"] == {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}, "uniqueItems": True},
+            "price": {"type": "number", "x-nullable": True},
+            "extra": {"type": "object", "additionalProperties": {"type": "integer"}},
+            "meta": {
+                "type": "object",
+                "properties": {"published": {"type": "string", "format": "date-time"}},
+                "required": ["published"]
+            }
+        },
+        "required": ["title", "tags"]
+    }
@@ -1,5 +1,42 @@
+import typing
+import datetime
+import pytest
+
+from decimal import Decimal
 from rest_helpers import type_deserializers
+from rest_helpers.rest_exceptions import InvalidDataException
+
+dataclasses = pytest.importorskip("dataclasses")
+try:
+    from typing import TypedDict
+except ImportError:
+    from typing_extensions import TypedDict
+
+class Item(TypedDict):
+    name: str
+    price: Decimal
+    tags: typing.List[str]
+
+@dataclasses.dataclass
+class Order(object):
+    id: int
+    items: typing.List[Item]
+    created: typing.Optional[datetime.datetime] = None
+    parent: typing.Optional["Order"] = None
+
+    def __post_init__(self):
+        if self.id < 0:
+            raise ValueError("the id must be positive")
 
+@dataclasses.dataclass
+class Node(object):
+    name: str
+    children: typing.List["Edge"]
+
+@dataclasses.dataclass
+class Edge(object):
+    target: Node
+    label: "EdgeLabel"
 
 class TestTypeDeserializers(object):
     def test_bool_deserializer(self):
@@ -12,4 +49,181 @@ class TestTypeDeserializers(object):
         assert not type_deserializers.bool_deserializer(None)
 
     def test_int_deserializer(self):
-        assert type_deserializers.int_deserializer("3") == 3
\ No newline at end of file
+        assert type_deserializers.int_deserializer("3") == 3
+
+    def test_get_default_deserializer(self):
+        from schematics import types
+
+        assert type_deserializers.get_default_deserializer(bool) == type_deserializers.bool_deserializer
+        assert type_deserializers.get_default_deserializer(int) == type_deserializers.int_deserializer
+        assert type_deserializers.get_default_deserializer(list) is None
+
+        string_type = types.StringType()
+        assert type_deserializers.get_default_deserializer(string_type) == string_type.to_native
+
+    def test_get_default_deserializer_cache_invalidation(self):
+        class MyInt(int):
+            pass
+
+        def my_int_deserializer(x):  # pragma: no cover (nothing to test here)
+            return MyInt(x)
+
+        assert type_deserializers.get_default_deserializer(MyInt) == type_deserializers.int_deserializer
+
+        type_deserializers.type_to_deserializer_tuple_list.append((MyInt, my_int_deserializer))
+        try:
+            assert type_deserializers.get_default_deserializer(MyInt) == my_int_deserializer
+            assert type_deserializers.get_default_deserializer(int) == type_deserializers.int_deserializer
+        finally:
+            type_deserializers.type_to_deserializer_tuple_list.remove((MyInt, my_int_deserializer))
+
+        assert type_deserializers.get_default_deserializer(MyInt) == type_deserializers.int_deserializer
+
+    @pytest.mark.parametrize("type_hint, values, expected", [
+        (typing.List[int], ["1", "2", "1"], [1, 2, 1]),
+        (typing.List[int], "3", [3]),
+        (typing.Set[str], ["a", "b", "a"], {"a", "b"}),
+        (typing.FrozenSet[bool], ["true", ""], frozenset([True])),
+        (typing.Tuple[int, ...], ["1", "2"], (1, 2)),
+        (typing.Sequence[float], ["1.5"], [1.5]),
+        (typing.Optional[int], None, None),
+        (typing.Optional[int], "4", 4),
+        (typing.Optional[typing.List[int]], ["4"], [4]),
+    ])
+    def test_get_default_deserializer_typing(self, type_hint, values, expected):
+        assert type_deserializers.get_default_deserializer(type_hint)(values) == expected
+
+    def test_get_default_deserializer_typing_invalid_elements(self):
+        from schematics import types
+
+        deserializer = type_deserializers.get_default_deserializer(typing.List[int])
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer(["1", "a", "2", "b"])
+        assert str(ex.value) == "2 invalid element(s): [1] 'a': invalid literal for int() with base 10: 'a'; [3] 'b': invalid literal for int() with base 10: 'b'"
+
+        # the elements are validated as well
+        deserializer = type_deserializers.get_default_deserializer(typing.List[types.IntType(min_value=2)])
+        assert deserializer(["2", "3"]) == [2, 3]
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer(["1", "3", "0"])
+        assert str(ex.value).startswith("2 invalid element(s): [0] '1'")
+
+    def test_get_container_hint(self):
+        assert type_deserializers.get_container_hint(typing.List[int]) == (list, int)
+        assert type_deserializers.get_container_hint(typing.Tuple[int, str]) is None
+        assert type_deserializers.get_container_hint(typing.Dict[str, int]) is None
+        assert type_deserializers.get_container_hint(list) is None
+        assert type_deserializers.get_optional_hint(typing.Optional[int]) == int
+        assert type_deserializers.get_optional_hint(typing.Union[int, str]) is None
+
+
+    @pytest.mark.parametrize("value", [
+        "2020-01-02",
+        "2020-01-02T03:04",
+        "2020-01-02T03:04:05",
+        "2020-01-02 03:04:05.123",
+        "2020-01-02T03:04:05.1234567",
+        "2020-01-02T03:04:05Z",
+        "2020-01-02T03:04:05+05:30",
+        "2020-01-02T03:04:05-0200",
+        "2020-01-02T03:04:05.5+01",
+        "Jan 2 2020 3:04am",
+        "20200102T030405",
+    ])
+    def test_datetime_deserializer(self, value):
+        from dateutil import parser
+
+        parsed = type_deserializers.datetime_deserializer(value)
+        expected = parser.parse(value)
+        assert parsed == expected
+        assert parsed.utcoffset() == expected.utcoffset()
+
+    def test_datetime_deserializer_invalid(self):
+        with pytest.raises(ValueError):
+            type_deserializers.datetime_deserializer("2020-02-30")
+        with pytest.raises(ValueError):
+            type_deserializers.datetime_deserializer("not a date")
+
+    def test_datetime_deserializer_memo(self):
+        from mock import patch
+        from dateutil import parser
+
+        type_deserializers._parse_iso_8601.cache_clear()
+        first = type_deserializers.datetime_deserializer("2021-01-02T03:04:05Z")
+        assert type_deserializers.datetime_deserializer("2021-01-02T03:04:05Z") is first
+        assert type_deserializers._parse_iso_8601.cache_info().misses == 1
+
+        values = ["2021-01-03", "2021-01-04", "2021-01-03", "2021-01-04"]
+        assert type_deserializers.get_default_deserializer(typing.List[datetime.datetime])(values) == [
+            datetime.datetime(2021, 1, 3), datetime.datetime(2021, 1, 4), datetime.datetime(2021, 1, 3), datetime.datetime(2021, 1, 4)]
+        assert type_deserializers._parse_iso_8601.cache_info().misses == 3
+
+        # the partial values depend on the current date: they are parsed each time
+        with patch("rest_helpers.type_deserializers.parser.parse", wraps=parser.parse) as parse:
+            type_deserializers.datetime_deserializer("10:00")
+            type_deserializers.datetime_deserializer("10:00")
+            assert parse.call_count == 2
+
+    def test_model_deserializer(self):
+        assert type_deserializers.is_model_hint(Order)
+        assert type_deserializers.is_model_hint(Item)
+        assert not type_deserializers.is_model_hint(dict)
+        assert not type_deserializers.is_model_hint(typing.List[Order])
+
+        deserializer = type_deserializers.get_default_deserializer(Order)
+        order = deserializer({
+            "id": 1,
+            "items": [{"name": "book", "price": 10.5, "tags": ["a"]}],
+            "created": "2020-01-02T03:04:05",
+            "parent": {"id": 2, "items": []},
+            "unknown": "ignored"
+        })
+
+        assert order == Order(1, [{"name": "book", "price": Decimal("10.5"), "tags": ["a"]}],
+                              datetime.datetime(2020, 1, 2, 3, 4, 5), Order(2, []))
+
+    def test_model_deserializer_invalid(self):
+        deserializer = type_deserializers.get_default_deserializer(Order)
+
+        # json values are checked, not coerced, and every invalid value is reported
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer({
+                "id": "1",
+                "items": [{"name": "book", "price": 1, "tags": "a"}, {"price": "x", "tags": []}],
+                "parent": {"id": True, "items": {}}
+            })
+        assert str(ex.value) == ("6 invalid value(s): id: expected an integer, got '1'; "
+                                 "items[0].tags: expected an array, got 'a'; "
+                                 "items[1].name: this field is required; "
+                                 "items[1].price: expected a number, got 'x'; "
+                                 "parent.id: expected an integer, got True; "
+                                 "parent.items: expected an array, got {}")
+
+        # like the swagger schema of a Decimal, a number
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer({"id": 1, "items": [{"name": "book", "price": "1.10", "tags": []}]})
+        assert str(ex.value) == "1 invalid value(s): items[0].price: expected a number, got '1.10'"
+
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer({"id": -1, "items": []})
+        assert str(ex.value) == "1 invalid value(s): the id must be positive"
+
+        with pytest.raises(InvalidDataException) as ex:
+            deserializer([])
+        assert str(ex.value) == "1 invalid value(s): expected an object, got []"
+
+    def test_model_deserializer_unresolved_hint(self, monkeypatch):
+        # Edge.label cannot be resolved yet: nothing half-built must stay cached
+        with pytest.raises(NameError):
+            type_deserializers.get_default_deserializer(Node)
+        assert Node not in type_deserializers._model_converters
+        assert Edge not in type_deserializers._model_converters
+
+        monkeypatch.setitem(globals(), "EdgeLabel", str)
+        try:
+            deserializer = type_deserializers.get_default_deserializer(Node)
+            node = deserializer({"name": "a", "children": [{"target": {"name": "b", "children": []}, "label": "x"}]})
+            assert node == Node("a", [Edge(Node("b", []), "x")])
+        finally:
+            type_deserializers._model_converters.pop(Node, None)
+            type_deserializers._model_converters.pop(Edge, None)
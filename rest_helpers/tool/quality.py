@@ -27,7 +27,7 @@ class BaseRequestAdapter():
         return {
             "method":self.framework_adapter.get_current_request_method(),
             "url":url,
-            "data": await self.framework_adapter.get_current_request_body(),
+            "data": await self.framework_adapter.get_current_request_body_bytes(),
             "headers":self.framework_adapter.get_current_request_headers()
         }
 
@@ -1,4 +1,7 @@
+import re
+import typing
 import functools
+import collections.abc
 from decimal import Decimal
 import datetime
 from dateutil import parser
@@ -6,6 +9,15 @@ from dateutil import parser
 from schematics.models import Model
 from schematics import types
 
+try:
+    import dataclasses
+except ImportError: # pragma: no cover (python < 3.7)
+    dataclasses = None
+
+from rest_helpers import validators
+from rest_helpers.common.type_dispatch import TypeDispatchList
+from rest_helpers.rest_exceptions import InvalidDataException
+
 def bool_deserializer(x):
     """
     This is to be used to deserialize boolean : we consider that if
@@ -35,11 +47,52 @@ def decimal_deserializer(x):
     """
     return Decimal(x)
 
-def datetime_deserializer(x): # pragma: no cover (nothing to test here)
+_ISO_8601_REGEX = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,6})\d*)?)?)?"
+    r"(Z|[+-]\d{2}(?::?\d{2})?)?$")
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso_8601(x):
+    match = _ISO_8601_REGEX.match(x)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+    tzinfo = None
+    if tz == "Z":
+        tzinfo = datetime.timezone.utc
+    elif tz is not None:
+        offset = datetime.timedelta(hours=int(tz[1:3]), minutes=int(tz[-2:]) if len(tz) > 3 else 0)
+        tzinfo = datetime.timezone(-offset if tz[0] == "-" else offset)
+
+    return datetime.datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        int(fraction.ljust(6, "0")) if fraction else 0,
+        tzinfo)
+
+def _parse_datetime(x):
+    # strict iso 8601 is parsed directly and memoized. dateutil handles the other formats, not memoized:
+    # it fills the missing parts of the partial ones (eg: "10:00") from the current date.
+    value = _parse_iso_8601(x)
+    return value if value is not None else parser.parse(x)
+
+def datetime_deserializer(x):
+    """
+    This is to be used to deserialize datetimes. The most recent iso 8601 values are memoized.
     """
-    This is to be used to deserialize datetimes.
+    return _parse_datetime(x)
+
+def datetime_list_deserializer(values):
     """
-    return parser.parse(x)
+    This is to be used to deserialize lists of datetimes: each distinct value is parsed once.
+    """
+    parsed = {}
+    return [parsed[x] if x in parsed else parsed.setdefault(x, _parse_datetime(x)) for x in values]
+
+# the container deserializers use the vectorized variant of their element deserializer, if any
+datetime_deserializer.vectorized = datetime_list_deserializer
 
 def string_deserializer(x): # pragma: no cover (nothing to test here)
     """
@@ -48,7 +101,7 @@ def string_deserializer(x): # pragma: no cover (nothing to test here)
     return str(x)
 
 # the order is important here because we will use isinstance, so we use a list
-type_to_deserializer_tuple_list = list({
+type_to_deserializer_tuple_list = TypeDispatchList({
     bool: bool_deserializer, # bool must be first because a bool is an int
     int: int_deserializer,
     float: float_deserializer,
@@ -59,9 +112,305 @@ type_to_deserializer_tuple_list = list({
     types.BaseType: (lambda type_hint: type_hint.to_native,)
 }.items())
 
+# container type hints (typing.List[int], typing.Set[str]...) are deserialized
+# by converting each element, keyed by the origin of the hint
+container_hint_origins = {
+    list: list,
+    set: set,
+    frozenset: frozenset,
+    tuple: tuple,
+    typing.List: list,
+    typing.Set: set,
+    typing.FrozenSet: frozenset,
+    typing.Tuple: tuple,
+    typing.Sequence: list,
+    typing.Iterable: list,
+    collections.abc.Sequence: list,
+    collections.abc.Iterable: list,
+    collections.abc.Set: set,
+}
+
+def get_container_hint(type_hint):
+    """
+    Gets the container and the element type of a container type hint.
+    eg: typing.List[int] -> (list, int)
+
+    Arguments:
+        type_hint {object} -- the type hint
+
+    Returns:
+        tuple -- (container type, element type hint), or None if the type hint is not a homogeneous container
+    """
+    origin = getattr(type_hint, "__origin__", None)
+    args = getattr(type_hint, "__args__", None)
+    if origin not in container_hint_origins or not args:
+        return None
+
+    container = container_hint_origins[origin]
+    if container is tuple:
+        # only variable length tuples are homogeneous: typing.Tuple[int, ...]
+        return (tuple, args[0]) if len(args) == 2 and args[1] is Ellipsis else None
+
+    return container, args[0]
+
+def get_optional_hint(type_hint):
+    """
+    Gets the type wrapped by an optional type hint.
+    eg: typing.Optional[int] -> int
+
+    Arguments:
+        type_hint {object} -- the type hint
+
+    Returns:
+        object -- the wrapped type hint, or None if the type hint is not optional.
+    """
+    if getattr(type_hint, "__origin__", None) is not typing.Union:
+        return None
+
+    args = [a for a in type_hint.__args__ if a is not type(None)]
+    if len(args) == len(type_hint.__args__):
+        return None
+
+    return args[0] if len(args) == 1 else typing.Union[tuple(args)]
+
+def _compile_container_deserializer(container, element_hint):
+    convert = get_default_deserializer(element_hint) or (lambda x: x)
+    convert_all = getattr(convert, "vectorized", None) or functools.partial(map, convert)
+    validate = validators.get_type_validators(element_hint)
+
+    def deserialize(values):
+        # a single query string value is bound as a string
+        values = [values] if isinstance(values, (str, bytes, dict)) or not isinstance(values, collections.abc.Iterable) else values
+        if validate is None:
+            try:
+                return container(convert_all(values))
+            except (ValueError, TypeError, ArithmeticError):
+                pass
+
+        # the elements are converted one by one to report all the invalid ones at once
+        converted = []
+        errors = []
+        for index, value in enumerate(values):
+            try:
+                element = convert(value)
+            except (ValueError, TypeError, ArithmeticError) as ex:
+                errors.append("[{0}] {1!r}: {2}".format(index, value, ex))
+                continue
+
+            is_valid, reason = validate(element, True) if validate is not None else (True, "")
+            if not is_valid:
+                errors.append("[{0}] {1!r}: {2}".format(index, value, reason))
+            converted.append(element)
+
+        if errors:
+            raise InvalidDataException("{0} invalid element(s): {1}".format(len(errors), "; ".join(errors)))
+
+        return container(converted)
+
+    return deserialize
+
+def _compile_optional_deserializer(type_hint):
+    deserializer = get_default_deserializer(type_hint)
+    if deserializer is None:
+        return None
+
+    return lambda x: None if x is None else deserializer(x)
+
+#region models
+
+def is_model_hint(type_hint):
+    """
+    Returns:
+        bool -- whether the type hint is a body model: a dataclass or a TypedDict.
+    """
+    if not isinstance(type_hint, type):
+        return False
+
+    is_dataclass = dataclasses is not None and dataclasses.is_dataclass(type_hint)
+    is_typed_dict = issubclass(type_hint, dict) and hasattr(type_hint, "__total__") and hasattr(type_hint, "__annotations__")
+    return is_dataclass or is_typed_dict
+
+def get_model_fields(model):
+    """
+    Gets the fields of a body model.
+
+    Arguments:
+        model {type} -- a dataclass or a TypedDict
+
+    Returns:
+        list -- (name, type hint, required) tuples
+    """
+    type_hints = typing.get_type_hints(model)
+    if dataclasses is not None and dataclasses.is_dataclass(model):
+        return [(f.name, type_hints[f.name], f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING)
+                for f in dataclasses.fields(model) if f.init]
+
+    required_keys = getattr(model, "__required_keys__", type_hints.keys() if model.__total__ else ())
+    return [(name, hint, name in required_keys) for name, hint in type_hints.items()]
+
+_MISSING = object()
+_model_converters = {}
+
+def _add_error(errors, path, message):
+    errors.append("{0}: {1}".format(path, message) if path else message)
+
+def _compile_scalar_converter(json_types, description, convert=None):
+    def convert_scalar(value, path, errors):
+        if not isinstance(value, json_types) or (isinstance(value, bool) and bool not in json_types):
+            _add_error(errors, path, "expected {0}, got {1!r}".format(description, value))
+            return None
+
+        try:
+            return value if convert is None else convert(value)
+        except (ValueError, TypeError, ArithmeticError):
+            _add_error(errors, path, "expected {0}, got {1!r}".format(description, value))
+            return None
+
+    return convert_scalar
+
+# json values are checked, not coerced: a string is not accepted for an int or a Decimal field, as in their swagger schema.
+_json_scalar_converters = {
+    str: _compile_scalar_converter((str,), "a string"),
+    bool: _compile_scalar_converter((bool,), "a boolean"),
+    int: _compile_scalar_converter((int,), "an integer"),
+    float: _compile_scalar_converter((int, float), "a number", float),
+    Decimal: _compile_scalar_converter((int, float), "a number", lambda x: Decimal(str(x))),
+    datetime.datetime: _compile_scalar_converter((str,), "a datetime", datetime_deserializer),
+}
+
+def _compile_json_converter(type_hint):
+    if type_hint is typing.Any or type_hint is object:
+        return lambda value, path, errors: value
+
+    optional_hint = get_optional_hint(type_hint)
+    if optional_hint is not None:
+        convert_optional = _compile_json_converter(optional_hint)
+        return lambda value, path, errors: None if value is None else convert_optional(value, path, errors)
+
+    if is_model_hint(type_hint):
+        return _compile_model_converter(type_hint)
+
+    if type_hint in _json_scalar_converters:
+        return _json_scalar_converters[type_hint]
+
+    container_hint = get_container_hint(type_hint)
+    if container_hint is not None:
+        return _compile_json_list_converter(*container_hint)
+
+    if getattr(type_hint, "__origin__", None) in (dict, typing.Dict) and getattr(type_hint, "__args__", None):
+        return _compile_json_dict_converter(type_hint.__args__[1])
+
+    # other types (schematics types...) use their usual deserializer and validator
+    deserializer = get_default_deserializer(type_hint) or (lambda x: x)
+    validate = validators.get_type_validators(type_hint)
+    def convert_other(value, path, errors):
+        try:
+            value = deserializer(value)
+        except (ValueError, TypeError, ArithmeticError, InvalidDataException) as ex:
+            _add_error(errors, path, str(ex))
+            return None
+
+        is_valid, reason = validate(value, True) if validate is not None else (True, "")
+        if not is_valid:
+            _add_error(errors, path, reason)
+        return value
+
+    return convert_other
+
+def _compile_json_list_converter(container, element_hint):
+    convert_element = _compile_json_converter(element_hint)
+    def convert_list(value, path, errors):
+        if not isinstance(value, list):
+            _add_error(errors, path, "expected an array, got {0!r}".format(value))
+            return None
+
+        return container([convert_element(v, "{0}[{1}]".format(path, i), errors) for i, v in enumerate(value)])
+
+    return convert_list
+
+def _compile_json_dict_converter(value_hint):
+    convert_value = _compile_json_converter(value_hint)
+    def convert_dict(value, path, errors):
+        if not isinstance(value, dict):
+            _add_error(errors, path, "expected an object, got {0!r}".format(value))
+            return None
+
+        return {k:convert_value(v, "{0}.{1}".format(path, k) if path else k, errors) for k,v in value.items()}
+
+    return convert_dict
+
+def _compile_model_converter(model):
+    convert_model = _model_converters.get(model)
+    if convert_model is not None:
+        return convert_model
+
+    # the fields are compiled after the converter is registered, for recursive models.
+    fields = []
+    is_dataclass = dataclasses is not None and dataclasses.is_dataclass(model)
+
+    def convert_model(value, path, errors):
+        if not isinstance(value, dict):
+            _add_error(errors, path, "expected an object, got {0!r}".format(value))
+            return None
+
+        error_count = len(errors)
+        converted = {}
+        for name, convert_field, required in fields:
+            field_value = value.get(name, _MISSING)
+            field_path = "{0}.{1}".format(path, name) if path else name
+            if field_value is _MISSING:
+                if required:
+                    _add_error(errors, field_path, "this field is required")
+            else:
+                converted[name] = convert_field(field_value, field_path, errors)
+
+        if not is_dataclass or len(errors) != error_count:
+            return converted
+
+        try:
+            return model(**converted)
+        except (ValueError, TypeError) as ex:
+            _add_error(errors, path, str(ex))
+            return None
+
+    # on failure, this converter and the ones compiled with it may hold half-built fields: uncache them.
+    cached_models = set(_model_converters)
+    _model_converters[model] = convert_model
+    try:
+        fields.extend((name, _compile_json_converter(hint), required) for name, hint, required in get_model_fields(model))
+    except Exception:
+        for key in set(_model_converters) - cached_models:
+            del _model_converters[key]
+        raise
+
+    return convert_model
+
+def _compile_model_deserializer(model):
+    convert_model = _compile_model_converter(model)
+    def deserialize(value):
+        errors = []
+        value = convert_model(value, "", errors)
+        if errors:
+            raise InvalidDataException("{0} invalid value(s): {1}".format(len(errors), "; ".join(errors)))
+        return value
+
+    return deserialize
+
+#endregion
+
 def get_default_deserializer(type_hint):
-    potential_deserializer_tuple = next((x for x in type_to_deserializer_tuple_list
-                                            if isinstance(type_hint, type) and issubclass(type_hint, x[0]) or isinstance(type_hint, x[0])), None)
+    container_hint = get_container_hint(type_hint)
+    if container_hint is not None:
+        return _compile_container_deserializer(*container_hint)
+
+    optional_hint = get_optional_hint(type_hint)
+    if optional_hint is not None:
+        return _compile_optional_deserializer(optional_hint)
+
+    if is_model_hint(type_hint):
+        return _compile_model_deserializer(type_hint)
+
+    potential_deserializer_tuple = type_to_deserializer_tuple_list.lookup(type_hint)
     if potential_deserializer_tuple is not None:
         return potential_deserializer_tuple[1][0](type_hint) if isinstance(potential_deserializer_tuple[1], tuple) else potential_deserializer_tuple[1]
     else:
@@ -4,6 +4,8 @@ from schematics.models import Model
 from schematics import types
 from schematics.exceptions import ValidationError
 
+from rest_helpers.common.type_dispatch import TypeDispatchList
+
 
 def _schematic_model_validator(model, post=False):
     if not post:
@@ -28,14 +30,13 @@ def _schematic_type_validator(schematic_type, value, post=False):
             return False, str(ex.messages)
 
 # the order is important here because we will use isinstance, so we use a list
-type_to_validator_tuple_list = list({
+type_to_validator_tuple_list = TypeDispatchList({
     Model: (_schematic_model_validator,),
     types.BaseType: (lambda type_hint: functools.partial(_schematic_type_validator, type_hint),)
 }.items())
 
 def get_type_validators(type_hint):
-    potential_type_to_validator_tuple = next((x for x in type_to_validator_tuple_list
-                                            if isinstance(type_hint, type) and issubclass(type_hint, x[0]) or isinstance(type_hint, x[0])), None)
+    potential_type_to_validator_tuple = type_to_validator_tuple_list.lookup(type_hint)
     if potential_type_to_validator_tuple:
         return potential_type_to_validator_tuple[1][0](type_hint) if isinstance(potential_type_to_validator_tuple[1], tuple) else potential_type_to_validator_tuple[1]
     else:
@@ -1,30 +1,235 @@
+import copy
+import types
 import inspect
+import functools
 from rest_helpers.rest_exceptions import InvalidDataException
 
+# The hooks an inner version class can define: the request hooks migrate a request of the version to the
+# next one, the response hooks migrate a response of the next version to the version.
+REQUEST_HOOK_NAMES = ("body", "body_dict", "headers", "query_string_args")
+RESPONSE_HOOK_NAMES = ("response", "response_body_dict")
+HOOK_NAMES = REQUEST_HOOK_NAMES + RESPONSE_HOOK_NAMES
+
+# The number of results cached for each pure step.
+PURE_STEP_CACHE_SIZE = 256
+
+# The size of the largest argument cached by a pure step, counted in values and string characters: freezing,
+# hashing and copying a larger argument costs more than the step, and the cache memory would not be bounded.
+PURE_STEP_MAX_ARGUMENT_SIZE = 4096
+
+def pure(hook):
+    """
+    Marks a hook as pure: its result only depends on its argument, which it does not modify.
+    The results of a pure hook are cached, for the arguments made of dicts, lists, tuples, strings, numbers and None.
+
+    eg:
+    class v1:
+        migrates_to = "v2"
+
+        @versioning.pure
+        def body_dict(self, body):
+            return {"name": body["title"]}
+    """
+    hook.rest_helper_pure = True
+    return hook
+
+#region private
+
+def _no_op(value):
+    return value
+
+# The hooks of the versions that do not define any hook (eg: the latest version).
+_NO_HOOKS = types.MappingProxyType({h: _no_op for h in HOOK_NAMES})
+
+def _compile_versions(versionner_class):
+    # The inner classes are looked up on the class: the dunder attributes (eg: __class__) are not versions.
+    attributes = (getattr(versionner_class, a) for a in dir(versionner_class) if not a.startswith("__"))
+    inner_classes = (c for c in attributes if inspect.isclass(c))
+    supported_versions = {c.name if hasattr(c, "name") else c.__name__:c() for c in inner_classes}
+
+    # The hooks of each step are cached once, shared by the pipelines of all the versions migrating through it.
+    step_hooks = {version: {h: _cache_pure_step(getattr(v, h)) for h in HOOK_NAMES if hasattr(v, h)} for version, v in supported_versions.items()}
+
+    versionner_class.supported_versions = types.MappingProxyType(supported_versions)
+    versionner_class._hooks_by_version = types.MappingProxyType({
+        version: _fuse_steps([step_hooks[v] for v in _get_steps(versionner_class, supported_versions, version)])
+        for version in supported_versions
+    })
+    versionner_class._latest_version = list(supported_versions.keys())[-1] if supported_versions else None
+
+def _get_steps(versionner_class, supported_versions, version):
+    """
+    Follows the migrates_to chain of a version.
+
+    Returns:
+        {list} -- the versions whose hooks migrate a request of the version to the latest one, in order.
+    """
+    steps = []
+    while True:
+        if version in steps:
+            raise ValueError("{0}: the migrations of the version {1} are cyclic.".format(versionner_class.__name__, version))
+        steps.append(version)
+
+        next_version = getattr(supported_versions[version], "migrates_to", None)
+        if next_version is None:
+            return steps
+        if next_version not in supported_versions:
+            raise ValueError("{0}: the version {1} migrates to the unknown version {2}.".format(versionner_class.__name__, version, next_version))
+        version = next_version
+
+def _fuse_steps(steps):
+    # The hooks a version does not define are no-ops instead of using an inheritance mechanism: this is
+    # so the definition of inner versionner is clear and looks very readable.
+    hooks = {h: [s[h] for s in steps if h in s] for h in HOOK_NAMES}
+    if not any(hooks.values()):
+        return _NO_HOOKS
+
+    # a response goes through the steps backward: from the latest version to the requested one.
+    for h in RESPONSE_HOOK_NAMES:
+        hooks[h].reverse()
+
+    return types.MappingProxyType({h: _fuse(hook_steps) for h, hook_steps in hooks.items()})
+
+def _fuse(hook_steps):
+    if len(hook_steps) == 0:
+        return _no_op
+    if len(hook_steps) == 1:
+        return hook_steps[0]
+
+    def pipeline(value):
+        for step in hook_steps:
+            value = step(value)
+        return value
+
+    return pipeline
+
+# The values cached by the pure steps: json like values, whose types are kept in their cache key.
+_FROZEN_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+def _freeze(value, budget=None):
+    """
+    Raises:
+        TypeError -- if the value is not made of dicts, lists, tuples and scalars of _FROZEN_SCALAR_TYPES
+        ValueError -- if the value is larger than PURE_STEP_MAX_ARGUMENT_SIZE
+
+    Returns:
+        tuple -- a hashable key equal for the values of the same types and contents only (eg: not for 1 and "1").
+    """
+    if budget is None:
+        budget = [PURE_STEP_MAX_ARGUMENT_SIZE]
+    budget[0] -= len(value) + 1 if type(value) in (str, dict, list, tuple) else 1
+    if budget[0] < 0:
+        raise ValueError("the values larger than {0} are not cached".format(PURE_STEP_MAX_ARGUMENT_SIZE))
+
+    if type(value) is dict:
+        return (dict, tuple((_freeze(k, budget), _freeze(v, budget)) for k, v in value.items()))
+    if type(value) in (list, tuple):
+        return (type(value), tuple(_freeze(v, budget) for v in value))
+    if type(value) in _FROZEN_SCALAR_TYPES:
+        return (type(value), value)
+    raise TypeError("{0} values are not cached".format(type(value).__name__))
+
+class _StepArgument(object):
+    """
+    The argument of a cached step, hashed and compared by its frozen key: the step gets the original value.
+    """
+    __slots__ = ("key", "value")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+def _cache_pure_step(step):
+    if not getattr(step, "rest_helper_pure", False):
+        return step
+
+    # A copy of the result is cached, and a copy of the cached result returned, so that neither
+    # the input of the step nor the next steps can modify the cached result.
+    @functools.lru_cache(maxsize=PURE_STEP_CACHE_SIZE)
+    def cached_step(argument):
+        return copy.deepcopy(step(argument.value))
+
+    def cache(value):
+        try:
+            key = _freeze(value)
+        except (TypeError, ValueError):
+            # eg: the response or the headers objects of the framework, or a large body
+            return step(value)
+        return copy.deepcopy(cached_step(_StepArgument(key, value)))
+
+    return cache
+
+#endregion
+
 class BaseVersionner:
+    """
+    The base class of the versionners: each inner class defines a version, named after its name
+    attribute or its class name, and the hooks modifying the requests and responses of this version.
+
+    An inner class can also migrate its version to the next one only, naming it in its migrates_to
+    attribute: its request hooks transform a request of its version into a request of the next version,
+    and its response hooks transform a response of the next version into a response of its version.
+
+    The versions are compiled once per versionner class into an immutable table mapping each version
+    to its hooks, the steps of a version being fused into a single pipeline per hook, and the hooks a
+    version does not define being no-ops: an instance only stores the requested version.
+    """
+    supported_versions = types.MappingProxyType({})
+
+    # If True, the routes are registered once per supported version, each bound to the hooks of its
+    # version, instead of reading the version from the request: see static_version_route.
+    static_routes = False
+
+    _hooks_by_version = types.MappingProxyType({})
+    _latest_version = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _compile_versions(cls)
+
     def __init__(self):
-        attributes = (getattr(self, a) for a in dir(self))
-        innner_classes = (c for c in attributes if inspect.isclass(c) and c != self.__class__)
-        self.supported_versions = {c.name if hasattr(c, "name") else c.__name__:c() for c in innner_classes}
         self.requested_version = None
 
     @staticmethod
     def version_route(route):
         raise NotImplementedError
 
+    @staticmethod
+    def static_version_route(route, version):
+        """
+        Injects a concrete version into the rule of a route, when the routes are registered per version.
+
+        Arguments:
+            route {route} -- the route registered for the version
+            version {str} -- one of the supported versions
+        """
+        raise NotImplementedError
+
     def get_specific_versionner(self):
-        version = self.requested_version or list(self.supported_versions.keys())[-1] #default version is the latest
-        if version not in self.supported_versions:
+        return self.supported_versions[self._get_version()]
+
+    def get_hooks(self):
+        """
+        Returns:
+            {Mapping} -- the hooks of the requested version, keyed by name.
+        """
+        return self._hooks_by_version[self._get_version()]
+
+    def _get_version(self):
+        version = self.requested_version or self._latest_version #default version is the latest
+        if version not in self._hooks_by_version:
             raise InvalidDataException("The specified version ({})is not correct: it should be among {}".format(version, str(self.supported_versions.keys())))
 
-        return self.supported_versions[version]
+        return version
 
-    # The following methods verify if the specific versionner has the corresponding
-    # method before calling it instead of using an inheritance mechanism: this is so
-    # the definition of inner versionner is clear and looks very readable.
     def body(self, body):
-        versionner = self.get_specific_versionner()
-        return versionner.body(body) if hasattr(versionner, "body") else body
+        return self.get_hooks()["body"](body)
 
     def body_dict(self, body):
         """
@@ -38,32 +243,52 @@ class BaseVersionner:
         Returns:
             {dict} -- the versionned body dictionary.
         """
+        return self.get_hooks()["body_dict"](body)
+
+    def has_hooks(self):
+        """
+        Returns:
+            {bool} -- whether the requested version defines any hook: the requests of the versions without
+                      hooks (eg: the latest) do not have to go through the versionner.
+        """
+        return self.get_hooks() is not _NO_HOOKS
+
+    def has_hook(self, hook_name):
+        """
+        Returns:
+            {bool} -- whether the requested version defines the given hook (eg: "body").
+        """
+        return self.get_hooks()[hook_name] is not _no_op
 
-        versionner = self.get_specific_versionner()
-        return versionner.body_dict(body) if hasattr(versionner, "body_dict") else body
+    def has_body_hooks(self):
+        """
+        Returns:
+            {bool} -- whether the requested version modifies the body, which then has to be read whole.
+        """
+        hooks = self.get_hooks()
+        return hooks["body"] is not _no_op or hooks["body_dict"] is not _no_op
 
     def response(self, response):
-        versionner = self.get_specific_versionner()
-        return versionner.response(response) if hasattr(versionner, "response") else response
+        return self.get_hooks()["response"](response)
 
     def headers(self, headers):
-        versionner = self.get_specific_versionner()
-        return versionner.headers(headers) if hasattr(versionner, "headers") else headers
+        return self.get_hooks()["headers"](headers)
 
     def query_string_args(self, query_string_args):
-        versionner = self.get_specific_versionner()
-        return versionner.query_string_args(query_string_args) if hasattr(versionner, "query_string_args") else query_string_args
+        return self.get_hooks()["query_string_args"](query_string_args)
 
     def response_body_dict(self, response_body_dict):
-        versionner = self.get_specific_versionner()
-        return versionner.response_body_dict(response_body_dict) if hasattr(versionner, "response_body_dict") else response_body_dict
+        return self.get_hooks()["response_body_dict"](response_body_dict)
 
     def set_request_args(self, request_args, request_kwargs):
         if "rest_helper_version" in request_kwargs:
-            self.requested_version = request_kwargs["rest_helper_version"]
-            request_kwargs.pop("rest_helper_version")
+            self.requested_version = request_kwargs.pop("rest_helper_version")
 
 class UrlRootVersionner(BaseVersionner):
     @staticmethod
     def version_route(route):
-        route.rule="/<rest_helper_version>"+route.rule
\ No newline at end of file
+        route.rule="/<rest_helper_version>"+route.rule
+
+    @staticmethod
+    def static_version_route(route, version):
+        route.rule="/"+version+route.rule
@@ -62,6 +62,7 @@ setup(
         "Operating System :: OS Independent"],
     package_data={"rest_helpers": ["templates/swagger-ui.html"]},
     install_requires=install_requires,
+    extras_require={"fast-json": ["orjson"]},
     include_package_data=True,
     tests_require=[  "mock >=0.7.2",
                      "coverage",